@@ -1,14 +1,13 @@
-import timeit
+import json
 
-from zilant_prime_core import aead  # noqa: F401
+from zilant_prime_core.bench_suite import run_suite
 
-setup = "from zilant_prime_core import aead; key=b'0'*32; data=b'x'*32"
-stmt = "aead.encrypt(key, data)"
+# the full suite, with baselines: `zilant bench --suite`
+PATTERN = "stream.*"
 
 
 def main() -> None:
-    t = min(timeit.repeat(stmt, setup=setup, number=1000, repeat=3))
-    print(f"encrypt 1000x: {t:.4f}s")
+    print(json.dumps(run_suite(PATTERN)["results"], indent=2))
 
 
 if __name__ == "__main__":
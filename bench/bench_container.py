@@ -1,14 +1,13 @@
-import timeit
+import json
 
-from zilant_prime_core.container import pack_file  # noqa: F401
+from zilant_prime_core.bench_suite import run_suite
 
-setup = "from zilant_prime_core.container import pack_file; open('tmp.txt','wb').write(b'x'*32)"
-stmt = "pack_file('tmp.txt','tmp.zil',b'pw')"
+# the full suite, with baselines: `zilant bench --suite`
+PATTERN = "container.*"
 
 
 def main() -> None:
-    t = min(timeit.repeat(stmt, setup=setup, number=100, repeat=3))
-    print(f"pack_file 100x: {t:.4f}s")
+    print(json.dumps(run_suite(PATTERN)["results"], indent=2))
 
 
 if __name__ == "__main__":
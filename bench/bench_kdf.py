@@ -1,14 +1,13 @@
-import timeit
+import json
 
-from zilant_prime_core.kdf import derive_key  # noqa: F401
+from zilant_prime_core.bench_suite import run_suite
 
-setup = "from zilant_prime_core.kdf import derive_key; pwd=b'x'; salt=b'y'*16"
-stmt = "derive_key(pwd, salt)"
+# the full suite, with baselines: `zilant bench --suite`
+PATTERN = "kdf.*"
 
 
 def main() -> None:
-    t = min(timeit.repeat(stmt, setup=setup, number=1000, repeat=3))
-    print(f"derive_key 1000x: {t:.4f}s")
+    print(json.dumps(run_suite(PATTERN)["results"], indent=2))
 
 
 if __name__ == "__main__":
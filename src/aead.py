@@ -9,6 +9,8 @@ from typing import Tuple, cast
 DEFAULT_KEY_LENGTH = 32
 DEFAULT_NONCE_LENGTH = 12
 DEFAULT_TAG_LENGTH = 16
+# marks PQAEAD payloads whose key is derived with HKDF-SHA256
+PQAEAD_MAGIC = b"ZPQAEAD\x02"
 
 
 class AEADInvalidTagError(Exception):
@@ -96,6 +98,13 @@ def decrypt(key: bytes, nonce: bytes, ciphertext: bytes, aad: bytes = b"") -> by
 
 
 class PQAEAD:
+    """KEM + ChaCha20-Poly1305 sealing.
+
+    Payload format: ``PQAEAD_MAGIC || kem_ct || nonce || ct``; the marker says the
+    key is derived from the KEM shared secret with HKDF-SHA256. Payloads
+    without it were sealed before the marker and use the Argon2id derivation.
+    """
+
     _NONCE_LEN = DEFAULT_NONCE_LENGTH
 
     @staticmethod
@@ -115,10 +124,17 @@ class PQAEAD:
         nonce = os.urandom(PQAEAD._NONCE_LEN)
         ch = ChaCha20Poly1305(key)
         ct = ch.encrypt(nonce, plaintext, aad)
-        return cast(bytes, ct_kem + nonce + ct)
+        return cast(bytes, PQAEAD_MAGIC + ct_kem + nonce + ct)
 
     @staticmethod
-    def decrypt(private_key: bytes, payload: bytes, aad: bytes = b"") -> bytes:
+    def decrypt(private_key: bytes, payload: bytes, aad: bytes = b"", kdf: str | None = None) -> bytes:
+        """Open a payload from :meth:`encrypt`.
+
+        Marked payloads always use HKDF. For unmarked ones ``kdf`` names the
+        derivation recorded alongside the payload (a container's ``pq_kdf``);
+        by default they are opened with the Argon2id one they were sealed with.
+        A wrong derivation is never retried: it fails like a wrong key.
+        """
         from .utils.pq_crypto import Kyber768KEM, derive_key_pq
 
         if not isinstance(private_key, (bytes, bytearray)):
@@ -128,12 +144,26 @@ class PQAEAD:
         if not isinstance(aad, (bytes, bytearray)):
             raise TypeError("aad must be bytes")
 
+        marked = payload[: len(PQAEAD_MAGIC)] == PQAEAD_MAGIC
+        if marked:
+            payload = payload[len(PQAEAD_MAGIC) :]
         kem = Kyber768KEM()
         ct_len = kem.ciphertext_length()
+        if len(payload) < ct_len + PQAEAD._NONCE_LEN:
+            raise ValueError("PQAEAD payload too short")
         kem_ct = payload[:ct_len]
         nonce = payload[ct_len : ct_len + PQAEAD._NONCE_LEN]
         ct = payload[ct_len + PQAEAD._NONCE_LEN :]
-        shared = kem.decapsulate(private_key, kem_ct)
-        key = derive_key_pq(shared)
+        if marked:
+            if kdf is not None:
+                from .utils.pq_crypto import PQ_KDF_HKDF
+
+                if kdf != PQ_KDF_HKDF:
+                    raise ValueError(f"PQAEAD payload is sealed with {PQ_KDF_HKDF!r}, not {kdf!r}")
+            key = derive_key_pq(kem.decapsulate(private_key, kem_ct))
+        else:
+            from .utils.pq_crypto import PQ_KDF_LEGACY, open_kem_key
+
+            key = open_kem_key(private_key, kem_ct, kdf or PQ_KDF_LEGACY)
         ch = ChaCha20Poly1305(key)
         return cast(bytes, ch.decrypt(nonce, ct, aad))
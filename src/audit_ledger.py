@@ -1,37 +1,765 @@
 from __future__ import annotations
 
+import atexit
+import base64
+import bisect
+import collections
+import functools
 import hashlib
+import hmac
+import itertools
 import json
 import logging
+import os
+import threading
 import time
+import zstandard as zstd
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Final
+from typing import Any, Callable, ContextManager, Dict, Final, Iterator, List, NamedTuple, Tuple
 
 __all__ = [
+    "CHECKPOINT_EVERY",
+    "INDEX_BLOCK",
+    "SEGMENT_MAX_AGE",
+    "SEGMENT_MAX_BYTES",
+    "LedgerWriter",
+    "batch",
+    "checkpoints",
+    "flush",
+    "merkle_root",
+    "prove_inclusion",
+    "query",
     "record_action",
     "record_decoy_event",
     "record_decoy_purged",
     "record_decoy_removed_early",
     "record_self_heal_triggered",
     "record_self_heal_done",
+    "verify_inclusion",
+    "verify_ledger",
 ]
 
 _LEDGER: Final[Path] = Path("audit-ledger.jsonl")
 _logger = logging.getLogger("audit")
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+# Каждые CHECKPOINT_EVERY записей в ``<ledger>.ckpt`` дописывается контрольная
+# точка: Merkle-корень листьев (поле ``sha256``) этих записей и голова цепочки.
+# С ключом ``ZILANT_LEDGER_KEY`` (urlsafe-base64, 32 байта) точки
+# подписываются HMAC-SHA256.
+CHECKPOINT_EVERY = 1024
+_GENESIS: Final[bytes] = bytes(32)
+
+# Хранилище: активный сегмент ``audit-ledger.jsonl`` и закрытые сегменты
+# ``audit-ledger.<первый seq>.jsonl.zst``. Когда активный сегмент вырастает
+# до SEGMENT_MAX_BYTES (или его первой записи больше SEGMENT_MAX_AGE секунд),
+# он сжимается — каждый блок индекса отдельным zstd-фреймом, так что блок
+# читается без распаковки всего сегмента. У каждого сегмента свой
+# разреженный индекс ``.idx``: запись на INDEX_BLOCK строк журнала
+# (смещение, диапазон timestamp, действия, Bloom-фильтр ``params.file``).
+INDEX_BLOCK = 256
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+SEGMENT_MAX_AGE: float | None = None
+_BLOOM_BITS: Final = 2048  # ~2% ложных срабатываний на блок из 256 разных файлов
+_BLOOM_HASHES: Final = 5
+
+
+def _ledger_key() -> bytes | None:
+    raw = os.environ.get("ZILANT_LEDGER_KEY")
+    return base64.urlsafe_b64decode(raw.encode()) if raw else None
+
+
+def _checkpoint_path(path: Path | str) -> Path:
+    return Path(path).with_suffix(".ckpt")
+
+
+def _index_path(path: Path | str) -> Path:
+    return Path(path).with_suffix(".idx")
+
+
+def _segment_paths(path: Path | str, first: int) -> Tuple[Path, Path]:
+    """Файл данных и индекс закрытого сегмента, начинающегося с записи ``first``."""
+    path = Path(path)
+    stem = path.with_suffix("").name
+    return path.with_name(f"{stem}.{first:012d}.jsonl.zst"), path.with_name(f"{stem}.{first:012d}.idx")
+
+
+def _closed_segments(path: Path | str) -> List[int]:
+    """Первые ``seq`` закрытых сегментов по возрастанию."""
+    path = Path(path)
+    stem = path.with_suffix("").name
+    firsts = []
+    for name in os.listdir(path.parent if str(path.parent) else "."):
+        mid = name[len(stem) + 1 : -len(".jsonl.zst")]
+        if name.startswith(stem + ".") and name.endswith(".jsonl.zst") and mid.isdigit():
+            firsts.append(int(mid))
+    return sorted(firsts)
+
+
+# ----------------------------------------------------------------- Merkle
+def _leaf_hash(leaf: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + leaf).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """Уровни дерева снизу вверх; непарный последний узел поднимается без изменений."""
+    level = [_leaf_hash(x) for x in leaves] or [hashlib.sha256(b"").digest()]
+    levels = [level]
+    while len(level) > 1:
+        up = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            up.append(level[-1])
+        levels.append(up)
+        level = up
+    return levels
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """Merkle-корень (листья и узлы с префиксами 0x00/0x01, как в RFC 6962)."""
+    return _levels(leaves)[-1][0]
+
+
+def _audit_path(leaves: List[bytes], index: int) -> List[bytes]:
+    path = []
+    for level in _levels(leaves)[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(level[sibling])
+        index //= 2
+    return path
+
+
+def _root_from_path(leaf: bytes, index: int, size: int, path: List[bytes]) -> bytes | None:
+    node = _leaf_hash(leaf)
+    it = iter(path)
+    while size > 1:
+        if index % 2:
+            node = _node_hash(next(it, b""), node)
+        elif index + 1 < size:
+            node = _node_hash(node, next(it, b""))
+        index //= 2
+        size = (size + 1) // 2
+    return node if next(it, None) is None else None
+
+
+# ----------------------------------------------------------------- формат строк
+def _serialize(entry: dict[str, Any]) -> Tuple[str, str]:
+    """Начало строки журнала (без ``seq``/``chain``) и её лист — SHA-256 канонической формы."""
+    # params сериализуются один раз: из них собираются и хэшируемая форма, и сама строка
+    ts = json.dumps(entry["timestamp"])
+    a = json.dumps(entry["action"])
+    p = json.dumps(entry["params"], sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(f'{{"action":{a},"params":{p},"timestamp":{ts}}}'.encode()).hexdigest()
+    return f'{{"timestamp":{ts},"action":{a},"params":{p},"sha256":"{digest}"', digest
+
+
+def _leaf_of(entry: dict[str, Any]) -> bytes | None:
+    """Лист записи, если её ``sha256`` сходится с содержимым."""
+    base = {k: entry.get(k) for k in ("timestamp", "action", "params")}
+    digest = hashlib.sha256(json.dumps(base, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+    return bytes.fromhex(digest) if entry.get("sha256") == digest else None
+
+
+def _stored_leaf(raw: bytes) -> bytes:
+    """Лист, записанный в строке (без перепроверки); для битой строки — хэш самой строки."""
+    # "sha256" — последний ключ перед seq/chain; внутри params такая подстрока была бы экранирована
+    at = raw.rfind(b'"sha256":"')
+    if at >= 0:
+        try:
+            return bytes.fromhex(raw[at + 10 : at + 74].decode("ascii"))
+        except ValueError:
+            pass
+    return hashlib.sha256(raw).digest()
+
+
+def _chain(prev: bytes, leaf: bytes) -> bytes:
+    return hashlib.sha256(prev + leaf).digest()
+
+
+def _last_line(fd: int, size: int) -> bytes:
+    """Последняя строка файла: читается только хвост."""
+    block = 4096
+    while True:
+        start = max(0, size - block)
+        data = os.pread(fd, size - start, start).rstrip(b"\n")
+        cut = data.rfind(b"\n")
+        if cut >= 0 or start == 0:
+            return data[cut + 1 :]
+        block *= 4
+
+
+def _last_record(path: Path) -> dict[str, Any] | None:
+    """Последняя JSON-строка файла (индекса, контрольных точек) или ``None``."""
+    try:
+        fd = os.open(path, os.O_RDONLY | _O_BINARY)
+    except FileNotFoundError:
+        return None
+    try:
+        size = os.fstat(fd).st_size
+        return json.loads(_last_line(fd, size)) if size else None
+    finally:
+        os.close(fd)
+
+
+def _read_records(path: Path) -> List[dict[str, Any]]:
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return []
+    return [json.loads(line) for line in text.splitlines() if line]
+
+
+def checkpoints(path: Path | None = None) -> List[dict[str, Any]]:
+    """Контрольные точки журнала по порядку."""
+    return _read_records(_checkpoint_path(path or _LEDGER))
+
+
+def _seal(ckpt: dict[str, Any], key: bytes | None) -> dict[str, Any]:
+    body = {k: v for k, v in ckpt.items() if k != "mac"}
+    body["alg"] = "hmac-sha256" if key else "sha256"
+    data = json.dumps(body, sort_keys=True, separators=(",", ":")).encode()
+    mac = hmac.new(key, data, hashlib.sha256) if key else hashlib.sha256(data)
+    return {**body, "mac": mac.hexdigest()}
+
+
+# ----------------------------------------------------------------- индекс
+def _bloom_bits(value: str) -> List[int]:
+    h = hashlib.blake2b(value.encode("utf-8", "surrogateescape"), digest_size=2 * _BLOOM_HASHES).digest()
+    return [int.from_bytes(h[2 * i : 2 * i + 2], "big") % _BLOOM_BITS for i in range(_BLOOM_HASHES)]
+
+
+def _index_record(seq: int, offset: int, lines: List[bytes], chain: bytes) -> dict[str, Any]:
+    """Запись индекса для блока строк, начинающегося с записи ``seq`` по смещению ``offset``."""
+    stamps, actions, bloom = [], set(), 0
+    for raw in lines:
+        try:
+            entry = json.loads(raw)
+            chain = _chain(chain, bytes.fromhex(entry["sha256"]))
+        except (ValueError, KeyError, TypeError):
+            chain = _chain(chain, _stored_leaf(raw))
+            continue  # битую строку найдёт verify_ledger
+        try:
+            stamps.append(entry["timestamp"])
+            actions.add(entry["action"])
+            file = entry["params"].get("file")
+        except (KeyError, TypeError, AttributeError):
+            continue
+        if isinstance(file, str):
+            for bit in _bloom_bits(file):
+                bloom |= 1 << bit
+    return {
+        "seq": seq,
+        "n": len(lines),
+        "offset": offset,
+        "size": sum(map(len, lines)),
+        "ts": [min(stamps, default=0), max(stamps, default=0)],
+        "actions": sorted(actions),
+        "files": base64.b64encode(bloom.to_bytes(_BLOOM_BITS // 8, "big")).decode(),
+        "chain": chain.hex(),
+    }
+
+
+class _Block(NamedTuple):
+    seq: int  # первая запись блока
+    rec: dict[str, Any] | None  # запись индекса; ``None`` — неиндексированный хвост активного сегмента
+    load: Callable[[], List[bytes]]
+
+
+def _load_block(data: Path, rec: dict[str, Any], closed: bool) -> List[bytes]:
+    with open(data, "rb") as fh:
+        if closed:
+            fh.seek(rec["zoff"])
+            raw = zstd.ZstdDecompressor().decompress(fh.read(rec["zlen"]))
+        else:
+            fh.seek(rec["offset"])
+            raw = fh.read(rec["size"])
+    return raw.splitlines(keepends=True)
+
+
+def _load_tail(data: Path, offset: int) -> List[bytes]:
+    try:
+        with open(data, "rb") as fh:
+            fh.seek(offset)
+            lines = fh.read().splitlines(keepends=True)
+    except FileNotFoundError:
+        return []
+    return lines if not lines or lines[-1].endswith(b"\n") else lines[:-1]  # недописанная строка
+
+
+def _segment_blocks(path: Path, first: int | None) -> List[_Block]:
+    """Блоки сегмента по порядку; ``first=None`` — активный сегмент."""
+    if first is not None:
+        data, idx = _segment_paths(path, first)
+        return [_Block(r["seq"], r, functools.partial(_load_block, data, r, True)) for r in _read_records(idx)]
+    recs = _read_records(_index_path(path))
+    blocks = [_Block(r["seq"], r, functools.partial(_load_block, path, r, False)) for r in recs]
+    if recs:
+        start, offset = recs[-1]["seq"] + recs[-1]["n"], recs[-1]["offset"] + recs[-1]["size"]
+    else:
+        start, offset = _active_first(path)[0], 0
+    blocks.append(_Block(start, None, functools.partial(_load_tail, path, offset)))
+    return blocks
+
+
+def _active_first(path: Path | str, closed: List[int] | None = None) -> Tuple[int, bytes]:
+    """Первый ``seq`` активного сегмента и голова цепочки перед ним."""
+    closed = _closed_segments(path) if closed is None else closed
+    if closed:
+        rec = _last_record(_segment_paths(path, closed[-1])[1])
+        if rec:
+            return rec["seq"] + rec["n"], bytes.fromhex(rec["chain"])
+    return 0, _GENESIS
+
+
+def _blocks(path: Path, from_seq: int = 0, *, reverse: bool = False) -> Iterator[_Block]:
+    """Блоки журнала во всех сегментах; индексы сегментов читаются по мере надобности."""
+    closed = _closed_segments(path)
+    segments: List[int | None] = [*closed, None]
+    if reverse:
+        for first in reversed(segments):
+            yield from reversed(_segment_blocks(path, first))
+        return
+    for first in segments[max(0, bisect.bisect_right(closed, from_seq) - 1) :]:
+        for block in _segment_blocks(path, first):
+            if block.rec is None or block.seq + block.rec["n"] > from_seq:
+                yield block
+
+
+def _entries_from(path: Path, seq: int) -> Iterator[bytes]:
+    """Строки журнала начиная с записи ``seq``."""
+    for block in _blocks(path, seq):
+        yield from block.load()[max(0, seq - block.seq) :]
+
+
+# ----------------------------------------------------------------- запись
+class _Head(NamedTuple):
+    """Что писатель знает об активном сегменте (проверяется по inode и размеру файла)."""
+
+    ino: int
+    size: int
+    seq: int  # следующий seq
+    chain: bytes  # голова цепочки
+    first: int  # первый seq сегмента
+    base: bytes  # голова цепочки перед сегментом
+    last: dict[str, Any] | None  # последняя запись индекса сегмента
+
+
+def _load_head(path: str, fd: int, st: os.stat_result) -> _Head:
+    first, base = _active_first(path)
+    last = _last_record(_index_path(path)) if st.st_size else None
+    if not st.st_size:
+        Path(_index_path(path)).unlink(missing_ok=True)  # остаток прерванной ротации
+    seq, chain = (last["seq"] + last["n"], bytes.fromhex(last["chain"])) if last else (first, base)
+    if st.st_size:
+        try:
+            tail = json.loads(_last_line(fd, st.st_size))
+            seq, chain = tail["seq"] + 1, bytes.fromhex(tail["chain"])
+        except (ValueError, KeyError, TypeError):
+            # строки без цепочки (записаны старой версией): проход от конца индекса
+            with open(os.dup(fd), "rb") as fh:
+                fh.seek(last["offset"] + last["size"] if last else 0)
+                for raw in fh:
+                    seq, chain = seq + 1, _chain(chain, _stored_leaf(raw))
+    return _Head(st.st_ino, st.st_size, seq, chain, first, base, last)
+
+
+class LedgerWriter:
+    """Буферизованная запись журнала с групповым коммитом.
+
+    Вне :meth:`batch` каждая запись коммитится сразу (как раньше). Внутри
+    ``batch()`` строки копятся в памяти и пишутся одним ``write`` под
+    ``flock``, когда набралось ``max_entries`` строк, прошло ``max_delay``
+    секунд с первой отложенной строки или при выходе из ``batch()``.
+    ``fsync=True`` — ``os.fsync`` после каждого коммита.
+
+    ``seq`` и ``chain`` записей вычисляются при коммите, под блокировкой,
+    поэтому цепочка не рвётся при записи из нескольких процессов. Там же
+    дописываются индекс и контрольные точки и ротируется сегмент. Состояние
+    активного сегмента кэшируется и перечитывается с диска, только если
+    файл изменил кто-то другой.
+    """
+
+    def __init__(self, *, max_entries: int = 256, max_delay: float = 0.5, fsync: bool = False) -> None:
+        self.max_entries = max_entries
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self._queue: Dict[str, List[Tuple[str, str]]] = {}  # абсолютный путь журнала -> (начало строки, лист)
+        self._state: Dict[str, _Head] = {}
+        self._pending = 0
+        self._since = 0.0
+        self._depth = 0
+        self._lock = threading.RLock()
+
+    def append(self, path: Path, head: str, leaf: str) -> None:
+        """Поставить запись в очередь; закоммитить, если сработал порог."""
+        with self._lock:
+            if not self._pending:
+                self._since = time.monotonic()
+            self._queue.setdefault(os.path.abspath(path), []).append((head, leaf))
+            self._pending += 1
+            if not self._depth or self._pending >= self.max_entries or time.monotonic() - self._since >= self.max_delay:
+                self.flush()
+
+    def flush(self) -> None:
+        """Записать всё, что накопилось в очереди."""
+        with self._lock:
+            queue, self._queue, self._pending = self._queue, {}, 0
+            for path, items in queue.items():
+                self._commit(path, items)
+
+    @staticmethod
+    def _open_locked(path: str) -> int:
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT | _O_BINARY, 0o644)
+            if fcntl is None:  # pragma: no cover - Windows
+                return fd
+            fcntl.flock(fd, fcntl.LOCK_EX)  # другие процессы не вклинятся посреди группы
+            try:
+                if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)  # пока ждали блокировку, сегмент ротировали
+
+    def _commit(self, path: str, items: List[Tuple[str, str]]) -> None:
+        fd = self._open_locked(path)
+        try:
+            st = os.fstat(fd)
+            head = self._state.get(path)
+            fresh = head is not None and (head.ino, head.size) == (st.st_ino, st.st_size)
+            if head is None or not fresh:
+                head = _load_head(path, fd, st)
+            seq, chain = head.seq, head.chain
+            lines = []
+            for text, leaf in items:
+                chain = _chain(chain, bytes.fromhex(leaf))
+                lines.append(f'{text},"seq":{seq},"chain":"{chain.hex()}"}}\n')
+                seq += 1
+            view = memoryview("".join(lines).encode("utf-8"))
+            head = head._replace(size=head.size + len(view), seq=seq, chain=chain)
+            while view:
+                view = view[os.write(fd, view) :]
+            if self.fsync:
+                os.fsync(fd)
+            head = self._index(path, head)
+            if not fresh or seq // CHECKPOINT_EVERY != (seq - len(items)) // CHECKPOINT_EVERY:
+                self._checkpoint(path, seq)
+            if self._rotation_due(path, head):
+                self._rotate(path, self._index(path, head, final=True))
+                self._state.pop(path, None)
+            else:
+                self._state[path] = head
+        finally:
+            os.close(fd)  # закрытие снимает flock
+
+    def _write_records(self, target: Path, records: List[dict[str, Any]], mode: str = "a") -> None:
+        with open(target, mode, encoding="utf-8") as fh:
+            fh.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+            if self.fsync:
+                fh.flush()
+                os.fsync(fh.fileno())
+
+    def _index(self, path: str, head: _Head, final: bool = False) -> _Head:
+        """Проиндексировать заполненные блоки (``final`` — и неполный последний)."""
+        last = head.last
+        start = last["seq"] + last["n"] if last else head.first
+        offset = last["offset"] + last["size"] if last else 0
+        chain = bytes.fromhex(last["chain"]) if last else head.base
+        todo = head.seq - start
+        if todo < INDEX_BLOCK and not (final and todo):
+            return head
+        records = []
+        with open(path, "rb") as fh:
+            fh.seek(offset)
+            while todo >= INDEX_BLOCK or (final and todo):
+                n = min(todo, INDEX_BLOCK)
+                rec = _index_record(start, offset, [fh.readline() for _ in range(n)], chain)
+                records.append(rec)
+                start, offset, chain, todo = start + n, offset + rec["size"], bytes.fromhex(rec["chain"]), todo - n
+        self._write_records(_index_path(path), records)
+        return head._replace(last=records[-1])
+
+    def _checkpoint(self, path: str, seq: int) -> None:
+        """Дописать контрольные точки для всех заполненных отрезков (под блокировкой журнала)."""
+        last = _last_record(_checkpoint_path(path)) or {"end": 0, "chain": _GENESIS.hex(), "mac": ""}
+        if last["end"] + CHECKPOINT_EVERY > seq:
+            return
+        key = _ledger_key()
+        added = []
+        lines = _entries_from(Path(path), last["end"])
+        while last["end"] + CHECKPOINT_EVERY <= seq:
+            leaves = [_stored_leaf(raw) for raw in itertools.islice(lines, CHECKPOINT_EVERY)]
+            chain = functools.reduce(_chain, leaves, bytes.fromhex(last["chain"]))
+            last = _seal(
+                {
+                    "start": last["end"],
+                    "end": last["end"] + CHECKPOINT_EVERY,
+                    "root": merkle_root(leaves).hex(),
+                    "chain": chain.hex(),
+                    "prev": last["mac"],
+                },
+                key,
+            )
+            added.append(last)
+        self._write_records(_checkpoint_path(path), added)
+
+    @staticmethod
+    def _rotation_due(path: str, head: _Head) -> bool:
+        if head.size >= SEGMENT_MAX_BYTES:
+            return True
+        if SEGMENT_MAX_AGE is None or not head.size:
+            return False
+        with open(path, "rb") as fh:
+            try:
+                born = json.loads(fh.readline())["timestamp"]
+            except (ValueError, KeyError, TypeError):
+                return False
+        return bool(time.time() - born >= SEGMENT_MAX_AGE)
+
+    def _rotate(self, path: str, head: _Head) -> None:
+        """Закрыть активный сегмент: сжать поблочно, перенести индекс, начать новый файл."""
+        records = _read_records(_index_path(path))
+        data, idx = _segment_paths(path, head.first)
+        comp = zstd.ZstdCompressor(level=9)
+        tmp = data.with_name(data.name + ".tmp")
+        with open(path, "rb") as src, open(tmp, "wb") as out:
+            for rec in records:
+                src.seek(rec["offset"])
+                frame = comp.compress(src.read(rec["size"]))
+                rec["zoff"], rec["zlen"] = out.tell(), len(frame)
+                out.write(frame)
+            if self.fsync:
+                out.flush()
+                os.fsync(out.fileno())
+        self._write_records(idx.with_name(idx.name + ".tmp"), records, "w")
+        os.replace(tmp, data)
+        os.replace(idx.with_name(idx.name + ".tmp"), idx)
+        os.unlink(_index_path(path))
+        os.unlink(path)  # ждущие блокировку писатели увидят новый inode и откроют новый файл
+
+    @contextmanager
+    def batch(self) -> Iterator["LedgerWriter"]:
+        """Групповой коммит на время блока; при выходе очередь сбрасывается."""
+        with self._lock:
+            self._depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._depth -= 1
+                if not self._depth:
+                    self.flush()
+
+
+_writer = LedgerWriter()
+atexit.register(_writer.flush)
+
+
+def batch() -> ContextManager[LedgerWriter]:
+    """Групповой коммит записей журнала внутри ``with``-блока (для массовых операций)."""
+    return _writer.batch()
+
+
+def flush() -> None:
+    """Сбросить отложенные записи журнала на диск."""
+    _writer.flush()
+
+
+# ----------------------------------------------------------------- чтение
+def query(
+    path: Path | None = None,
+    *,
+    since: float | None = None,
+    action: str | None = None,
+    file: str | None = None,
+    last: int | None = None,
+) -> Iterator[str]:
+    """Строки журнала (по порядку), подходящие под фильтры; ``last`` — только N последних.
+
+    Блоки, которые по индексу не могут содержать подходящих записей
+    (диапазон timestamp, список действий, Bloom-фильтр файлов), не читаются.
+    """
+    path = path or _LEDGER
+    flush()
+    mask = sum(1 << bit for bit in set(_bloom_bits(file))) if file is not None else 0
+
+    def wanted(block: _Block) -> bool:
+        rec = block.rec
+        if rec is None:
+            return True
+        if since is not None and rec["ts"][1] < since:
+            return False
+        if action is not None and action not in rec["actions"]:
+            return False
+        return not mask or int.from_bytes(base64.b64decode(rec["files"]), "big") & mask == mask
+
+    def matches(raw: bytes) -> bool:
+        if since is None and action is None and file is None:
+            return True
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            return False
+        params = entry.get("params")
+        return (
+            (since is None or entry.get("timestamp", 0) >= since)
+            and (action is None or entry.get("action") == action)
+            and (file is None or (isinstance(params, dict) and params.get("file") == file))
+        )
+
+    if last is None:
+        for block in _blocks(path):
+            if wanted(block):
+                for raw in block.load():
+                    if matches(raw):
+                        yield raw.decode("utf-8").rstrip("\n")
+        return
+    found: collections.deque[bytes] = collections.deque()
+    for block in _blocks(path, reverse=True):
+        if len(found) >= last:
+            break
+        if wanted(block):
+            for raw in reversed(block.load()):
+                if len(found) < last and matches(raw):
+                    found.appendleft(raw)
+    for raw in found:
+        yield raw.decode("utf-8").rstrip("\n")
+
+
+# ----------------------------------------------------------------- проверка
+def _trusted(ckpts: List[dict[str, Any]], key: bytes | None) -> int | None:
+    """Сколько первых контрольных точек можно принять на веру; ``None`` — точки подделаны.
+
+    На веру принимаются только точки с HMAC: SHA-256 без ключа пересчитает
+    любой, кто правит журнал. Такие точки (и точки с HMAC без ключа) не
+    доверенные, но и не ошибочные — их сверит полный проход. С ключом точка
+    без подписи — подделка.
+    """
+    prev: dict[str, Any] = {"end": 0, "mac": ""}
+    for ckpt in ckpts:
+        if ckpt.get("start") != prev["end"] or ckpt.get("prev") != prev["mac"]:
+            return None
+        signed = ckpt.get("alg") == "hmac-sha256"
+        if signed != (key is not None):
+            if key is None:
+                break  # подписи не проверить; остальное сверит полный проход
+            return None
+        if not hmac.compare_digest(_seal(ckpt, key)["mac"], ckpt.get("mac", "")):
+            return None
+        prev = ckpt
+    return len(ckpts) if key is not None else 0
+
+
+def verify_ledger(path: Path | None = None, *, key: bytes | None = None, full: bool = False) -> bool:
+    """Проверить журнал: содержимое записей, ``seq``, хэш-цепочку и контрольные точки.
+
+    По умолчанию проверка начинается с последней доверенной контрольной
+    точки (``key`` — ключ HMAC, иначе ``ZILANT_LEDGER_KEY``): проверяются
+    только записи после неё; без ключа доверенных точек нет и проход
+    полный. ``full=True`` — с начала журнала, со сверкой Merkle-корня
+    каждого отрезка между точками.
+    """
+    path = path or _LEDGER
+    flush()
+    key = key if key is not None else _ledger_key()
+    ckpts = checkpoints(path)
+    trusted = _trusted(ckpts, key)
+    if trusted is None:
+        return False
+    seq, chain, chained = 0, _GENESIS, False
+    lines = _entries_from(path, 0)
+    if trusted and not full:
+        start = ckpts[trusted - 1]
+        lines = _entries_from(path, start["end"] - 1)
+        try:  # последняя запись под точкой на месте: журнал не обрезан
+            entry = json.loads(next(lines))
+        except (StopIteration, ValueError):
+            return False
+        chained = "seq" in entry or "chain" in entry
+        if _leaf_of(entry) is None or (
+            chained and (entry.get("seq") != start["end"] - 1 or entry.get("chain") != start["chain"])
+        ):
+            return False
+        seq, chain = start["end"], bytes.fromhex(start["chain"])
+    bounds = {c["end"]: c for c in ckpts if c["end"] > seq}
+    leaves: List[bytes] = []
+    for raw in lines:
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            return False
+        leaf = _leaf_of(entry)
+        if leaf is None:
+            return False
+        chain = _chain(chain, leaf)
+        # без seq/chain бывают только строки старого формата, а они все до первой цепочки
+        chained = chained or "seq" in entry or "chain" in entry
+        if chained and (entry.get("seq") != seq or entry.get("chain") != chain.hex()):
+            return False
+        leaves.append(leaf)
+        seq += 1
+        ckpt = bounds.pop(seq, None)
+        if ckpt is not None:
+            if ckpt["chain"] != chain.hex() or ckpt["root"] != merkle_root(leaves).hex():
+                return False
+            leaves.clear()
+    return not bounds  # точки не могут покрывать больше записей, чем есть
+
+
+def prove_inclusion(seq: int, path: Path | None = None) -> dict[str, Any]:
+    """Доказательство включения записи ``seq``: путь в Merkle-дереве её отрезка.
+
+    Через индекс читаются только записи этого отрезка; размер доказательства — O(log n).
+    """
+    path = path or _LEDGER
+    flush()
+    ckpt = next((c for c in checkpoints(path) if c["start"] <= seq < c["end"]), None)
+    if ckpt is None:
+        raise ValueError(f"entry {seq} is not covered by a checkpoint yet")
+    size = ckpt["end"] - ckpt["start"]
+    entries = [json.loads(raw) for raw in itertools.islice(_entries_from(path, ckpt["start"]), size)]
+    leaves = [bytes.fromhex(e["sha256"]) for e in entries]
+    index = seq - ckpt["start"]
+    return {
+        "entry": entries[index],
+        "index": index,
+        "size": size,
+        "path": [h.hex() for h in _audit_path(leaves, index)],
+        "checkpoint": ckpt,
+    }
+
+
+def verify_inclusion(proof: dict[str, Any], key: bytes | None = None) -> bool:
+    """Проверить доказательство из :func:`prove_inclusion` (подпись точки и путь до корня)."""
+    ckpt = proof["checkpoint"]
+    key = key if key is not None else _ledger_key()
+    if (ckpt.get("alg") == "hmac-sha256") != (key is not None):  # с ключом точка без подписи не принимается
+        return False
+    want = _seal(ckpt, key)
+    if not hmac.compare_digest(want["mac"], ckpt.get("mac", "")):
+        return False
+    leaf = _leaf_of(proof["entry"])
+    if leaf is None:
+        return False
+    root = _root_from_path(leaf, proof["index"], proof["size"], [bytes.fromhex(h) for h in proof["path"]])
+    return root is not None and root.hex() == ckpt["root"]
+
 
 def _append(entry: dict[str, Any]) -> None:
     """Записать JSON-строку, добавить SHA-256, вывести читабельный лог."""
-    # Чистый сериализуемый объект без sha256:
-    ser = json.dumps(
-        {k: entry[k] for k in ("timestamp", "action", "params")},
-        sort_keys=True,
-        separators=(",", ":"),
-    )
-    entry["sha256"] = hashlib.sha256(ser.encode()).hexdigest()
-
-    with _LEDGER.open("a", encoding="utf-8") as fh:
-        fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    head, entry["sha256"] = _serialize(entry)
+    _writer.append(_LEDGER, head, entry["sha256"])
 
     act = entry["action"]
     prm = entry["params"]
@@ -3,20 +3,38 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import shutil
+import struct
 from collections import defaultdict
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
 from pathlib import Path
-from typing import Any, DefaultDict, cast
+from typing import IO, Any, Callable, DefaultDict, Iterable, Iterator, cast
 
-from aead import PQAEAD, decrypt, encrypt
+from aead import DEFAULT_TAG_LENGTH, PQAEAD, PQAEAD_MAGIC, decrypt, encrypt
 from crypto_core import hash_sha3
-from utils.file_utils import atomic_write
+from utils.file_utils import HEADER_LIMIT, atomic_write, pread_slab, read_header
 from utils.logging import get_logger
+from utils.pipeline import ordered_map, resolve_workers
 
 ZIL_MAGIC = b"ZILANT"
 ZIL_VERSION = 1
+ZIL_STREAM_VERSION = 2
+# v1 layout whose pq key is derived by the KDF named in ``pq_kdf``; readers
+# that predate ``pq_kdf`` reject it as unsupported instead of failing the tag
+ZIL_PQ_VERSION = 3
+_V1_LAYOUT = (ZIL_VERSION, ZIL_PQ_VERSION)
 HEADER_SEPARATOR = b"\n\n"
 
+# ZILANT v2: payload is a sequence of independently sealed chunks, so pack and
+# unpack work with a bounded buffer. Inputs from STREAM_THRESHOLD up use it.
+STREAM_CHUNK = 1024 * 1024
+STREAM_THRESHOLD = 64 * 1024 * 1024
+_STREAM_PREFIX_LEN = 8
+_CHECKSUM_FIELD = b'"checksum_hex": "'
+
 logger = get_logger("container")
 
 # in-memory counter of unpack attempts per container path
@@ -27,6 +45,214 @@ def _record_attempt(path: Path) -> None:
     _ATTEMPTS[str(path)] += 1
 
 
+def _read_container_header(fh: IO[bytes]) -> dict[str, Any]:
+    """Parse the JSON header and leave ``fh`` positioned at the payload."""
+    try:
+        header_bytes = read_header(fh, HEADER_SEPARATOR, HEADER_LIMIT)
+    except ValueError:
+        raise ValueError("Invalid ZIL container format") from None
+    return cast(dict[str, Any], json.loads(header_bytes.decode("utf-8")))
+
+
+def _read_payload(fh: IO[bytes], meta: dict[str, Any]) -> bytes:
+    """Read a v1 payload, stopping before any appended delta records."""
+    size = meta.get("payload_len")
+    return fh.read() if size is None else fh.read(int(size))
+
+
+def _stream_chunk_count(orig_size: int, chunk_size: int) -> int:
+    return max(1, -(-orig_size // chunk_size))
+
+
+def _stream_nonce(prefix: bytes, idx: int) -> bytes:
+    return prefix + struct.pack(">I", idx)
+
+
+def _stream_aad(idx: int, last: bool) -> bytes:
+    """Bind each chunk to its position and mark the final one against truncation."""
+    return struct.pack(">QB", idx, 1 if last else 0)
+
+
+def _pack_file_v2(
+    input_path: Path,
+    output_path: Path,
+    key: bytes,
+    pq_public_key: bytes | None,
+    extra_meta: dict[str, Any] | None,
+) -> int:
+    """Write a chunked ZILANT v2 container and return its size in bytes."""
+    prefix = os.urandom(_STREAM_PREFIX_LEN)
+    tmp = output_path.with_suffix(output_path.suffix + ".tmp")
+    with open(input_path, "rb") as f_in:
+        orig_size = os.fstat(f_in.fileno()).st_size
+        meta: dict[str, Any] = {
+            "magic": ZIL_MAGIC.decode("ascii"),
+            "version": ZIL_STREAM_VERSION,
+            "mode": "classic",
+        }
+        kem_ct = b""
+        enc_key = bytes(key)
+        if pq_public_key is not None:
+            if not isinstance(pq_public_key, (bytes, bytearray)):
+                raise TypeError("pq_public_key must be bytes")
+            from zilant_prime_core.utils.pq_crypto import PQ_KDF_HKDF, Kyber768KEM, derive_key_pq
+
+            kem_ct, shared = Kyber768KEM().encapsulate(pq_public_key)
+            enc_key = derive_key_pq(shared)
+            meta["mode"] = "pq"
+            meta["kem_ct_len"] = len(kem_ct)
+            meta["pq_kdf"] = PQ_KDF_HKDF
+        meta.update(
+            {
+                "nonce_hex": prefix.hex(),
+                "chunk_size": STREAM_CHUNK,
+                "orig_size": orig_size,
+                # placeholder, patched in place once the payload has been hashed
+                "checksum_hex": "0" * 64,
+            }
+        )
+        if extra_meta:
+            meta.update(extra_meta)
+        meta.setdefault("heal_level", 0)
+        meta.setdefault("heal_history", [])
+        header_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        checksum_pos = header_bytes.find(_CHECKSUM_FIELD) + len(_CHECKSUM_FIELD)
+
+        hasher = hashlib.sha3_256()
+        aead = ChaCha20Poly1305(enc_key)
+        count = _stream_chunk_count(orig_size, STREAM_CHUNK)
+        try:
+            with open(tmp, "wb") as f_out:
+                f_out.write(header_bytes + HEADER_SEPARATOR + kem_ct)
+                for idx in range(count):
+                    chunk = f_in.read(STREAM_CHUNK)
+                    if len(chunk) != min(STREAM_CHUNK, orig_size - idx * STREAM_CHUNK):
+                        raise ValueError("input changed while packing")
+                    hasher.update(chunk)
+                    f_out.write(aead.encrypt(_stream_nonce(prefix, idx), chunk, _stream_aad(idx, idx == count - 1)))
+                if f_in.read(1):
+                    raise ValueError("input changed while packing")
+                size = f_out.tell()
+                f_out.seek(checksum_pos)
+                f_out.write(hasher.hexdigest().encode("ascii"))
+                f_out.flush()
+                try:
+                    os.fsync(f_out.fileno())
+                except AttributeError:  # pragma: no cover - fsync is missing only on exotic platforms
+                    pass
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+    tmp.replace(output_path)
+    return size
+
+
+def _v2_key(fh: IO[bytes], meta: dict[str, Any], key: bytes, pq_private_key: bytes | None) -> bytes:
+    """Return the payload key, reading the KEM ciphertext that precedes pq chunks."""
+    if meta.get("mode", "classic") != "pq":
+        return bytes(key)
+    if not isinstance(pq_private_key, (bytes, bytearray)):
+        raise TypeError("pq_private_key must be bytes")
+    from zilant_prime_core.utils.pq_crypto import PQ_KDF_LEGACY, open_kem_key
+
+    kem_ct = fh.read(meta["kem_ct_len"])
+    return cast(bytes, open_kem_key(pq_private_key, kem_ct, meta.get("pq_kdf", PQ_KDF_LEGACY)))
+
+
+def _v2_params(meta: dict[str, Any]) -> tuple[bytes, int, int, int]:
+    prefix = bytes.fromhex(meta["nonce_hex"])
+    chunk_size = int(meta["chunk_size"])
+    orig_size = int(meta["orig_size"])
+    if chunk_size <= 0 or orig_size < 0:
+        raise ValueError("Invalid ZIL stream parameters")
+    return prefix, chunk_size, orig_size, _stream_chunk_count(orig_size, chunk_size)
+
+
+def _iter_file_v2(
+    fh: IO[bytes],
+    meta: dict[str, Any],
+    key: bytes,
+    pq_private_key: bytes | None,
+) -> Iterator[bytes]:
+    """Yield decrypted v2 chunks from ``fh``; the checksum is checked after the last one."""
+    dec_key = _v2_key(fh, meta, key, pq_private_key)
+    prefix, chunk_size, orig_size, count = _v2_params(meta)
+
+    hasher = hashlib.sha3_256()
+    aead = ChaCha20Poly1305(dec_key)
+    for idx in range(count):
+        clen = min(chunk_size, orig_size - idx * chunk_size) + DEFAULT_TAG_LENGTH
+        ct = fh.read(clen)
+        if len(ct) != clen:
+            raise ValueError("Truncated ZIL payload")
+        pt = aead.decrypt(_stream_nonce(prefix, idx), ct, _stream_aad(idx, idx == count - 1))
+        hasher.update(pt)
+        if idx == count - 1 and hasher.hexdigest() != meta["checksum_hex"]:
+            raise ValueError("Integrity check failed")
+        yield pt
+
+
+def _unpack_file_v2(
+    fh: IO[bytes],
+    meta: dict[str, Any],
+    output_path: Path,
+    key: bytes,
+    pq_private_key: bytes | None,
+) -> None:
+    """Decrypt a chunked ZILANT v2 payload from ``fh`` with a bounded buffer."""
+    tmp = output_path.with_suffix(output_path.suffix + ".tmp")
+    try:
+        with open(tmp, "wb") as f_out:
+            for pt in _iter_file_v2(fh, meta, key, pq_private_key):
+                f_out.write(pt)
+            f_out.flush()
+            try:
+                os.fsync(f_out.fileno())
+            except AttributeError:  # pragma: no cover - fsync is missing only on exotic platforms
+                pass
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    tmp.replace(output_path)
+
+
+def _decrypt_v1(meta: dict[str, Any], payload: bytes, key: bytes, pq_private_key: bytes | None) -> bytes:
+    mode = meta.get("mode", "classic")
+    orig_size = meta["orig_size"]
+    checksum_hex = meta["checksum_hex"]
+
+    plaintext: bytes
+    if mode == "pq":
+        if not isinstance(pq_private_key, (bytes, bytearray)):
+            raise TypeError("pq_private_key must be bytes")
+        kem_len = meta["kem_ct_len"]
+        kem_ct = payload[:kem_len]
+        nonce = payload[kem_len : kem_len + PQAEAD._NONCE_LEN]
+        ct = payload[kem_len + PQAEAD._NONCE_LEN :]
+        from zilant_prime_core.utils.pq_crypto import PQ_KDF_LEGACY, open_kem_key
+
+        if "pq_kdf" not in meta and meta.get("version") != ZIL_VERSION:
+            raise ValueError("pq container without pq_kdf")  # only version 1 predates the field
+        key_dec = open_kem_key(pq_private_key, kem_ct, meta.get("pq_kdf", PQ_KDF_LEGACY))
+        plaintext = decrypt(key_dec, nonce, ct, aad=b"")
+    else:
+        nonce = bytes.fromhex(meta["nonce_hex"])
+        plaintext = decrypt(key, nonce, payload, aad=b"")
+
+    actual_checksum = cast(bytes, hash_sha3(plaintext)).hex()
+    if actual_checksum != checksum_hex:
+        raise ValueError("Integrity check failed")
+    if len(plaintext) != orig_size:
+        raise ValueError("Original size mismatch")
+    return plaintext
+
+
+def _payload_size_v2(meta: dict[str, Any]) -> int:
+    orig_size = int(meta.get("orig_size", 0))
+    count = _stream_chunk_count(orig_size, int(meta.get("chunk_size", STREAM_CHUNK)))
+    return int(meta.get("kem_ct_len", 0)) + orig_size + count * int(DEFAULT_TAG_LENGTH)
+
+
 def get_open_attempts(path: Path) -> int:
     """Return number of times ``unpack_file`` was called for this container."""
     return _ATTEMPTS.get(str(path), 0)
@@ -39,7 +265,13 @@ def pack_file(
     pq_public_key: bytes | None = None,
     *,
     extra_meta: dict[str, Any] | None = None,
+    streaming: bool | None = None,
 ) -> None:
+    """Encrypt ``input_path`` into a ZILANT container at ``output_path``.
+
+    ``streaming`` selects the chunked v2 layout, which keeps memory bounded;
+    by default it is used for inputs of ``STREAM_THRESHOLD`` bytes or more.
+    """
     if not isinstance(input_path, Path):
         raise TypeError("input_path must be a pathlib.Path")
     if not isinstance(output_path, Path):
@@ -48,6 +280,16 @@ def pack_file(
         raise TypeError("key must be bytes")
     if len(key) != 32:
         raise ValueError("key must be 32 bytes long")
+    bad = sorted(_PAYLOAD_FIELDS.intersection(extra_meta or ()))
+    if bad:
+        raise ValueError(f"header fields {', '.join(map(repr, bad))} cannot be set through extra_meta")
+
+    if streaming is None:
+        streaming = input_path.stat().st_size >= STREAM_THRESHOLD
+    if streaming:
+        size = _pack_file_v2(input_path, output_path, key, pq_public_key, extra_meta)
+        logger.info("Packed '%s' -> '%s', size=%d bytes (v2)", input_path.name, output_path.name, size)
+        return
 
     plaintext = input_path.read_bytes()
     checksum = cast(bytes, hash_sha3(plaintext))
@@ -55,12 +297,17 @@ def pack_file(
     if pq_public_key is not None:
         if not isinstance(pq_public_key, (bytes, bytearray)):
             raise TypeError("pq_public_key must be bytes")
+        from zilant_prime_core.utils.pq_crypto import PQ_KDF_HKDF
+
         payload = PQAEAD.encrypt(pq_public_key, plaintext, aad=b"")
+        if payload.startswith(PQAEAD_MAGIC):
+            payload = payload[len(PQAEAD_MAGIC) :]  # the header records pq_kdf instead
         meta_pq: dict[str, Any] = {
             "magic": ZIL_MAGIC.decode("ascii"),
-            "version": ZIL_VERSION,
+            "version": ZIL_PQ_VERSION,
             "mode": "pq",
             "kem_ct_len": len(payload) - len(plaintext) - PQAEAD._NONCE_LEN,
+            "pq_kdf": PQ_KDF_HKDF,
             "orig_size": len(plaintext),
             "checksum_hex": checksum.hex(),
         }
@@ -116,47 +363,19 @@ def unpack_file(
     _record_attempt(input_path)
 
     try:
-        data = input_path.read_bytes()
-        sep_idx = data.find(HEADER_SEPARATOR)
-        if sep_idx == -1:
-            raise ValueError("Invalid ZIL container format")
-
-        header_bytes = data[:sep_idx]
-        payload = data[sep_idx + len(HEADER_SEPARATOR) :]
-        meta: dict[str, Any] = json.loads(header_bytes.decode("utf-8"))
-
-        if meta.get("magic") != ZIL_MAGIC.decode("ascii"):
-            raise ValueError("Invalid ZIL magic value")
-        if meta.get("version") != ZIL_VERSION:
-            raise ValueError("Unsupported ZIL version")
-
-        mode = meta.get("mode", "classic")
-        orig_size = meta["orig_size"]
-        checksum_hex = meta["checksum_hex"]
-
-        if mode == "pq":
-            if not isinstance(pq_private_key, (bytes, bytearray)):
-                raise TypeError("pq_private_key must be bytes")
-            kem_len = meta["kem_ct_len"]
-            kem_ct = payload[:kem_len]
-            nonce = payload[kem_len : kem_len + PQAEAD._NONCE_LEN]
-            ct = payload[kem_len + PQAEAD._NONCE_LEN :]
-            from zilant_prime_core.utils.pq_crypto import Kyber768KEM, derive_key_pq
-
-            kem = Kyber768KEM()
-            shared = kem.decapsulate(pq_private_key, kem_ct)
-            key_dec = derive_key_pq(shared)
-            plaintext = decrypt(key_dec, nonce, ct, aad=b"")
-        else:
-            nonce = bytes.fromhex(meta["nonce_hex"])
-            plaintext = decrypt(key, nonce, payload, aad=b"")
-
-        actual_checksum = cast(bytes, hash_sha3(plaintext)).hex()
-        if actual_checksum != checksum_hex:
-            raise ValueError("Integrity check failed")
-        if len(plaintext) != orig_size:
-            raise ValueError("Original size mismatch")
-
+        with open(input_path, "rb") as fh:
+            meta = _read_container_header(fh)
+            if meta.get("magic") != ZIL_MAGIC.decode("ascii"):
+                raise ValueError("Invalid ZIL magic value")
+            if meta.get("version") == ZIL_STREAM_VERSION:
+                _unpack_file_v2(fh, meta, output_path, key, pq_private_key)
+                logger.info("Unpacked '%s' -> '%s' (v2)", input_path.name, output_path.name)
+                return
+            if meta.get("version") not in _V1_LAYOUT:
+                raise ValueError("Unsupported ZIL version")
+            payload = _read_payload(fh, meta)
+
+        plaintext = _decrypt_v1(meta, payload, key, pq_private_key)
         atomic_write(output_path, plaintext)
         logger.info("Unpacked '%s' -> '%s'", input_path.name, output_path.name)
     except ValueError:
@@ -171,6 +390,151 @@ def unpack_file(
         raise
 
 
+def iter_plaintext(path: Path, key: bytes, pq_private_key: bytes | None = None) -> Iterator[bytes]:
+    """Yield the decrypted payload of a ZILANT container in pieces.
+
+    v2 containers are streamed chunk by chunk, so callers that consume the
+    data incrementally never hold the whole plaintext. Integrity failures
+    surface as ``ValueError`` once the last piece has been read, so nothing
+    derived from the stream should be committed before it is exhausted.
+    """
+    with open(path, "rb") as fh:
+        meta = _read_container_header(fh)
+        if meta.get("magic") != ZIL_MAGIC.decode("ascii"):
+            raise ValueError("Invalid ZIL magic value")
+        if meta.get("version") == ZIL_STREAM_VERSION:
+            yield from _iter_file_v2(fh, meta, key, pq_private_key)
+            return
+        if meta.get("version") not in _V1_LAYOUT:
+            raise ValueError("Unsupported ZIL version")
+        payload = _read_payload(fh, meta)
+    yield _decrypt_v1(meta, payload, key, pq_private_key)
+
+
+class PlaintextChunks:
+    """Random access to the decrypted payload of a ZILANT container, chunk by chunk.
+
+    v2 chunks are read with ``pread`` and opened one at a time, so callers
+    decrypt only what they touch. Each chunk tag binds it to its index and
+    marks the last one; the whole-payload checksum is only checked by full
+    reads (:func:`unpack_file`, :func:`iter_plaintext`). A v1 payload is one
+    chunk, decrypted and verified when the reader is opened.
+    """
+
+    def __init__(self, path: Path, key: bytes, pq_private_key: bytes | None = None) -> None:
+        self._fh = open(path, "rb")
+        self._v1: bytes | None = None
+        try:
+            meta = _read_container_header(self._fh)
+            if meta.get("magic") != ZIL_MAGIC.decode("ascii"):
+                raise ValueError("Invalid ZIL magic value")
+            if meta.get("version") == ZIL_STREAM_VERSION:
+                self._aead = ChaCha20Poly1305(_v2_key(self._fh, meta, key, pq_private_key))
+                self._prefix, self.chunk_size, self.size, self.count = _v2_params(meta)
+                self._base = self._fh.tell()
+            elif meta.get("version") in _V1_LAYOUT:
+                self._v1 = _decrypt_v1(meta, _read_payload(self._fh, meta), key, pq_private_key)
+                self.chunk_size, self.size, self.count = max(len(self._v1), 1), len(self._v1), 1
+                self._fh.close()
+            else:
+                raise ValueError("Unsupported ZIL version")
+        except BaseException:
+            self._fh.close()
+            raise
+
+    def chunk(self, idx: int) -> bytes:
+        """Decrypt chunk ``idx``; safe to call from several threads."""
+        if not 0 <= idx < self.count:
+            raise IndexError(idx)
+        if self._v1 is not None:
+            return self._v1
+        stride = self.chunk_size + DEFAULT_TAG_LENGTH
+        clen = min(self.chunk_size, self.size - idx * self.chunk_size) + DEFAULT_TAG_LENGTH
+        ct = pread_slab(self._fh.fileno(), clen, self._base + idx * stride)
+        if len(ct) != clen:
+            raise ValueError("Truncated ZIL payload")
+        return cast(
+            bytes, self._aead.decrypt(_stream_nonce(self._prefix, idx), ct, _stream_aad(idx, idx == self.count - 1))
+        )
+
+    def close(self) -> None:
+        self._fh.close()
+        self._v1 = None
+
+    def __enter__(self) -> PlaintextChunks:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+
+# Header fields that describe the payload; a header-only rewrite must not change them.
+_PAYLOAD_FIELDS = frozenset(
+    {
+        "magic",
+        "version",
+        "mode",
+        "nonce_hex",
+        "orig_size",
+        "checksum_hex",
+        "kem_ct_len",
+        "pq_kdf",
+        "chunk_size",
+        "chunks",
+        "root_tag",
+        "index_offset",
+        "index_mac",
+        # appended delta records (see zilant_prime_core.deltalog)
+        "payload_len",
+        "deltas",
+        "deltas_mac",
+    }
+)
+HEADER_SLACK = 512
+
+
+def rewrite_header(path: Path, updates: dict[str, Any], *, allow: Iterable[str] = ()) -> dict[str, Any]:
+    """Merge ``updates`` into the JSON header of ``path`` without touching the payload.
+
+    The payload is neither decrypted nor re-encrypted. If the new header
+    fits into the space of the old one it is overwritten in place and padded
+    with spaces; otherwise the file is copied once with at least
+    ``HEADER_SLACK`` bytes of padding so later rewrites can stay in place.
+    Returns the merged header. Fields describing the payload cannot be
+    changed unless listed in ``allow``.
+    """
+    with open(path, "r+b") as fh:
+        meta = _read_container_header(fh)
+        body_start = fh.tell()
+        bad = sorted(f for f in (_PAYLOAD_FIELDS - set(allow)) & updates.keys() if updates[f] != meta.get(f))
+        if bad:
+            raise ValueError(f"header fields {', '.join(map(repr, bad))} cannot be rewritten")
+        meta.update(updates)
+        header_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        room = body_start - len(HEADER_SEPARATOR)
+        if len(header_bytes) <= room:
+            fh.seek(0)
+            fh.write(header_bytes + b" " * (room - len(header_bytes)))
+            fh.flush()
+            os.fsync(fh.fileno())
+            return meta
+
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        slack = max(HEADER_SLACK, len(header_bytes) // 8)
+        try:
+            with open(tmp, "wb") as out:
+                out.write(header_bytes + b" " * slack + HEADER_SEPARATOR)
+                fh.seek(body_start)
+                shutil.copyfileobj(fh, out, STREAM_CHUNK)
+                out.flush()
+                os.fsync(out.fileno())
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+    tmp.replace(path)
+    return meta
+
+
 def pack(meta: dict[str, Any], payload: bytes, key: bytes) -> bytes:
     if not isinstance(meta, dict):
         raise TypeError("meta must be a dict")
@@ -208,13 +572,9 @@ def unpack(blob: bytes, key: bytes) -> tuple[dict[str, Any], bytes]:
 
 
 def get_metadata(path: Path) -> dict[str, Any]:
-    """Extract container metadata without decrypting payload."""
-    data = path.read_bytes()
-    sep_idx = data.find(HEADER_SEPARATOR)
-    if sep_idx == -1:
-        raise ValueError("Invalid ZIL container format")
-    header_bytes = data[:sep_idx]
-    meta = cast(dict[str, Any], json.loads(header_bytes.decode("utf-8")))
+    """Extract container metadata reading only the header."""
+    with open(path, "rb") as fh:
+        meta = _read_container_header(fh)
     meta.setdefault("heal_level", 0)
     meta.setdefault("heal_history", [])
     meta.setdefault("recovery_key_hex", None)
@@ -222,27 +582,147 @@ def get_metadata(path: Path) -> dict[str, Any]:
 
 
 def verify_integrity(path: Path) -> bool:
-    """Quickly check container header structure without decrypting."""
-    data = path.read_bytes()
-    sep_idx = data.find(HEADER_SEPARATOR)
-    if sep_idx == -1:
-        return False
-    try:
-        meta = cast(dict[str, Any], json.loads(data[:sep_idx].decode("utf-8")))
-    except Exception:
-        return False
+    """Quickly check container header structure without decrypting or reading the payload."""
+    with open(path, "rb") as fh:
+        try:
+            meta = _read_container_header(fh)
+        except Exception:
+            return False
+        payload_len = os.fstat(fh.fileno()).st_size - fh.tell()
+    if meta.get("magic") == "ZSNAP":  # snapshot: manifest plus a chunk store, not a payload
+        from zilant_prime_core.chunkstore import verify_snapshot
+
+        return cast(bool, verify_snapshot(path))
     if meta.get("magic") != ZIL_MAGIC.decode("ascii"):
         return False
-    if meta.get("version") != ZIL_VERSION:
+    if meta.get("version") == ZIL_STREAM_VERSION:
+        try:
+            return payload_len >= _payload_size_v2(meta)
+        except (TypeError, ValueError):
+            return False
+    if meta.get("version") not in _V1_LAYOUT:
         return False
-    payload = data[sep_idx + len(HEADER_SEPARATOR) :]
     orig_size = cast(int, meta.get("orig_size", 0))
-    return len(payload) >= orig_size
+    return payload_len >= orig_size
+
+
+def _batch_result(src: Path, dst: Path, exc: BaseException | None) -> dict[str, Any]:
+    result: dict[str, Any] = {"src": str(src), "dst": str(dst), "ok": exc is None}
+    if exc is None:
+        result["bytes"] = dst.stat().st_size
+    else:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+def _claim_destinations(jobs: Iterable[tuple[Path, Path]]) -> Iterator[tuple[Path, Path, Exception | None]]:
+    """Pair each job with an error if an earlier job of the batch writes the same destination.
+
+    Checked before a job is submitted: two workers writing one ``dst`` (and
+    its ``.tmp``) would race, and with ``overwrite`` one result would be lost.
+    """
+    owners: dict[str, Path] = {}
+    for src, dst in jobs:
+        name = os.path.normcase(os.path.abspath(dst))
+        if name in owners:
+            yield src, dst, FileExistsError(f"{dst} is also the destination of {owners[name]}")
+        else:
+            owners[name] = src
+            yield src, dst, None
+
+
+def _pack_job(job: tuple[Path, Path, bytes | Exception, bytes | None, dict[str, Any] | None, bool]) -> dict[str, Any]:
+    src, dst, key, pq_public_key, extra_meta, overwrite = job
+    if isinstance(key, Exception):
+        return _batch_result(src, dst, key)
+    try:
+        if dst.exists() and not overwrite:
+            raise FileExistsError(f"{dst} already exists")
+        pack_file(src, dst, key, pq_public_key, extra_meta=extra_meta)
+        os.chmod(dst, 0o600)
+    except Exception as exc:
+        return _batch_result(src, dst, exc)
+    return _batch_result(src, dst, None)
+
+
+def _unpack_job(job: tuple[Path, Path, bytes | Exception, bytes | None, bool]) -> dict[str, Any]:
+    src, dst, key, pq_private_key, overwrite = job
+    if isinstance(key, Exception):
+        return _batch_result(src, dst, key)
+    try:
+        if dst.exists() and not overwrite:
+            raise FileExistsError(f"{dst} already exists")
+        unpack_file(src, dst, key, pq_private_key)
+        os.chmod(dst, 0o600)
+    except Exception as exc:
+        return _batch_result(src, dst, exc)
+    return _batch_result(src, dst, None)
+
+
+def pack_many(
+    jobs: Iterable[tuple[Path, Path]],
+    key: bytes,
+    pq_public_key: bytes | None = None,
+    *,
+    extra_meta: dict[str, Any] | None = None,
+    workers: int = 0,
+    overwrite: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """Pack many ``(src, dst)`` pairs with one key across a process pool.
+
+    Yields one result dict per job, in input order: ``src``, ``dst``, ``ok``
+    and either ``bytes`` (container size) or ``error``. A failing file does
+    not stop the batch. A job whose ``dst`` an earlier job already writes
+    fails without running. ``workers <= 0`` uses all CPUs.
+    """
+    if not isinstance(key, (bytes, bytearray)):
+        raise TypeError("key must be bytes")
+    if len(key) != 32:
+        raise ValueError("key must be 32 bytes long")
+    key = bytes(key)
+    items = (
+        (src, dst, clash or key, pq_public_key, extra_meta, overwrite) for src, dst, clash in _claim_destinations(jobs)
+    )
+    yield from ordered_map(_pack_job, items, resolve_workers(workers), processes=True)
+
+
+def unpack_many(
+    jobs: Iterable[tuple[Path, Path]],
+    key: bytes | Callable[[Path], bytes],
+    pq_private_key: bytes | None = None,
+    *,
+    workers: int = 0,
+    overwrite: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """Unpack many ``(src, dst)`` pairs across a process pool.
+
+    ``key`` is either the key shared by every container or a callable that
+    returns the key for a container path; it is resolved in the calling
+    process, so a caller can derive each distinct key once. Results have the
+    same shape as :func:`pack_many`; a key lookup failure or a duplicate
+    destination is reported as that job's error.
+    """
+
+    def items() -> Iterator[tuple[Path, Path, bytes | Exception, bytes | None, bool]]:
+        for src, dst, clash in _claim_destinations(jobs):
+            job_key: bytes | Exception
+            try:
+                job_key = clash or bytes(key(src) if callable(key) else key)
+            except Exception as exc:
+                job_key = exc
+            yield src, dst, job_key, pq_private_key, overwrite
+
+    yield from ordered_map(_unpack_job, items(), resolve_workers(workers), processes=True)
 
 
 __all__ = [
     "pack_file",
     "unpack_file",
+    "pack_many",
+    "unpack_many",
+    "iter_plaintext",
+    "PlaintextChunks",
+    "rewrite_header",
     "pack",
     "unpack",
     "get_metadata",
@@ -250,5 +730,9 @@ __all__ = [
     "verify_integrity",
     "ZIL_MAGIC",
     "ZIL_VERSION",
+    "ZIL_PQ_VERSION",
+    "ZIL_STREAM_VERSION",
+    "STREAM_CHUNK",
+    "STREAM_THRESHOLD",
     "HEADER_SEPARATOR",
 ]
@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+import base64
 import hashlib
+import hmac
+import json
+import os
 import secrets
 from pathlib import Path
-from typing import List, cast
+from typing import Any, List, cast
 
 import shamir  # our local shamir.py stub
 
@@ -61,37 +65,149 @@ def recover_secret(shards: List[bytes]) -> bytes:
     return cast(bytes, secret_int.to_bytes(length, "big"))
 
 
+def _log_key() -> bytes | None:
+    raw = os.environ.get("ZILANT_LEDGER_KEY")
+    return base64.urlsafe_b64decode(raw.encode()) if raw else None
+
+
 class AuditLog:
-    """Append-only audit log secured with hash chaining."""
+    """Append-only audit log secured with hash chaining.
+
+    The chain head is cached in memory and in a ``<log>.head`` sidecar,
+    both keyed by the log's size and mtime; when neither matches, only the
+    last block of the log is read. Appends are O(1) in the log size.
+
+    With ``ZILANT_LEDGER_KEY`` set (the audit ledger's key), every
+    ``_CHECKPOINT_BYTES`` of log get an HMAC-SHA256 signed checkpoint in
+    ``<log>.ckpt``: the offset of a line and the chain digest before it.
+    :meth:`verify_log` re-hashes only the lines from the last one on.
+    """
+
+    _TAIL_BLOCK = 4096
+    _CHECKPOINT_BYTES = 1 << 20
 
     def __init__(self, path: Path | None = None) -> None:
         self.path = path or Path("audit.log")
+        self.head_path = self.path.with_name(self.path.name + ".head")
+        self.ckpt_path = self.path.with_name(self.path.name + ".ckpt")
+        self._head: tuple[int, int, bytes] | None = None  # (size, mtime_ns, digest)
+        self._ckpt_offset: int | None = None  # offset of the last checkpoint, once read
 
     def append_event(self, event: str) -> None:
         prev = self._last_digest()
         new = hashlib.sha256(prev + event.encode()).digest()
         with open(self.path, "a", encoding="utf-8") as f:
+            offset = os.fstat(f.fileno()).st_size
             f.write(f"{new.hex()} {event}\n")
+            f.flush()
+            st = os.fstat(f.fileno())
+        self._head = (st.st_size, st.st_mtime_ns, new)
+        try:
+            self.head_path.write_text(f"{st.st_size} {st.st_mtime_ns} {new.hex()}\n", encoding="ascii")
+        except OSError:
+            pass  # the sidecar is only a cache
+        if self._ckpt_offset is None or offset - self._ckpt_offset >= self._CHECKPOINT_BYTES:
+            self._checkpoint(offset, prev)
+
+    @staticmethod
+    def _mac(ckpt: dict[str, Any], key: bytes) -> str:
+        body = {k: v for k, v in ckpt.items() if k != "mac"}
+        return hmac.new(key, json.dumps(body, sort_keys=True).encode(), hashlib.sha256).hexdigest()
+
+    def _checkpoints(self) -> List[dict[str, Any]]:
+        try:
+            text = self.ckpt_path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return []
+        return [json.loads(line) for line in text.splitlines() if line]
+
+    def _checkpoint(self, offset: int, digest: bytes) -> None:
+        """Sign the line at ``offset`` if the last checkpoint (re-read: others append too) is far enough."""
+        key = _log_key()
+        if key is None:
+            return
+        last = (self._checkpoints() or [{"offset": 0, "mac": ""}])[-1]
+        self._ckpt_offset = last["offset"]
+        if offset - last["offset"] < self._CHECKPOINT_BYTES:
+            return
+        ckpt: dict[str, Any] = {"offset": offset, "digest": digest.hex(), "prev": last["mac"]}
+        ckpt["mac"] = self._mac(ckpt, key)
+        with open(self.ckpt_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(ckpt) + "\n")
+        self._ckpt_offset = offset
+
+    def _resume_point(self, size: int) -> tuple[int, bytes] | None:
+        """Offset and digest of the last checkpoint; ``None`` if a checkpoint is forged."""
+        key = _log_key()
+        if key is None:
+            return 0, b""  # nothing to trust without the key
+        offset, digest, prev = 0, b"", ""
+        for ckpt in self._checkpoints():
+            # the signed line must still be there; verify_log re-hashes it against the digest
+            if not (
+                ckpt.get("prev") == prev
+                and offset < ckpt.get("offset", 0) < size
+                and hmac.compare_digest(self._mac(ckpt, key), ckpt.get("mac", ""))
+            ):
+                return None
+            offset, digest, prev = ckpt["offset"], bytes.fromhex(ckpt["digest"]), ckpt["mac"]
+        return offset, digest
 
     def _last_digest(self) -> bytes:
-        if not self.path.exists():
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
             return b""
-        lines = self.path.read_bytes().splitlines()
-        if not lines:
+        if self._head is not None and self._head[:2] == (st.st_size, st.st_mtime_ns):
+            return self._head[2]
+        digest = self._sidecar_digest(st.st_size, st.st_mtime_ns)
+        if digest is None:
+            digest = self._tail_digest(st.st_size)
+        self._head = (st.st_size, st.st_mtime_ns, digest)
+        return digest
+
+    def _sidecar_digest(self, size: int, mtime_ns: int) -> bytes | None:
+        try:
+            s_size, s_mtime, s_hex = self.head_path.read_text(encoding="ascii").split()
+            if (int(s_size), int(s_mtime)) == (size, mtime_ns):
+                return bytes.fromhex(s_hex)
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _tail_digest(self, size: int) -> bytes:
+        """Digest from the last line, reading the log backwards one block at a time."""
+        if not size:
             return b""
-        last = lines[-1].split(b" ", 1)[0]
+        block = self._TAIL_BLOCK
+        with open(self.path, "rb") as f:
+            while True:
+                start = max(0, size - block)
+                f.seek(start)
+                data = f.read(size - start).rstrip(b"\r\n")
+                cut = data.rfind(b"\n")
+                if cut >= 0 or start == 0:
+                    break
+                block *= 2
+        last = data[cut + 1 :].split(b" ", 1)[0]
         try:
             return bytes.fromhex(last.decode())
         except Exception:
             return b""
 
-    def verify_log(self) -> bool:
-        digest = b""
+    def verify_log(self, *, full: bool = False) -> bool:
+        """Check the hash chain after the last signed checkpoint (``full`` — from the start)."""
         if not self.path.exists():
             return True
-        for line in self.path.read_text().splitlines():
-            hex_d, evt = line.split(" ", 1)
-            digest = hashlib.sha256(digest + evt.encode()).digest()
-            if digest.hex() != hex_d:
-                return False
+        start = self._resume_point(self.path.stat().st_size)
+        if start is None:
+            return False
+        offset, digest = (0, b"") if full else start
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                hex_d, _, evt = raw.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+                digest = hashlib.sha256(digest + evt.encode()).digest()
+                if digest.hex() != hex_d:
+                    return False
         return True
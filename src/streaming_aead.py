@@ -4,13 +4,20 @@
 from __future__ import annotations
 
 import hashlib
+import hmac
 import json
 import os
+import struct
+import threading
 import time
 import zstandard as zstd
+from contextlib import nullcontext
 from cryptography.hazmat.primitives.poly1305 import Poly1305
 from pathlib import Path
-from typing import IO, List, cast
+from typing import IO, Any, Callable, ContextManager, Iterator, List, Tuple, cast
+
+from utils.file_utils import HEADER_LIMIT, pread_slab, read_header
+from utils.pipeline import ordered_map, resolve_workers
 
 # Первый приоритет — криптография из cryptography (XChaCha20-Poly1305)
 try:
@@ -21,6 +28,12 @@ except ImportError:  # pragma: no cover - fallback
 CHUNK = 4 * 1024 * 1024
 NONCE_SZ = 24
 TAG_SZ = 16
+ZSTR_VERSION = 2
+
+# запись индекса v2: смещение записи от начала тела (u64) + длина cipher (u32)
+_INDEX_ENTRY = struct.Struct(">QI")
+
+_local = threading.local()
 
 
 def _derive_nonce(chunk_id: int, key: bytes) -> bytes:
@@ -54,7 +67,7 @@ def decrypt_chunk(key: bytes, nonce: bytes, cipher: bytes, aad: bytes = b"") ->
     else:
         from nacl.bindings import crypto_aead_xchacha20poly1305_ietf_decrypt
 
-        pt = crypto_aead_xchacha20poly1305_ietf_decrypt(cipher, aad, nonce, key)
+        pt = crypto_aead_xchacha20poly1305_ietf_decrypt(bytes(cipher), aad, nonce, key)
     return cast(bytes, pt)
 
 
@@ -73,50 +86,114 @@ def _tree_mac(tags: List[bytes], key: bytes) -> bytes:
     return nodes[0] if nodes else Poly1305.generate_tag(key, b"")
 
 
+def _compressor() -> zstd.ZstdCompressor:
+    """Per-thread zstd-компрессор (объекты ZstdCompressor не потокобезопасны)."""
+    comp = getattr(_local, "comp", None)
+    if comp is None:
+        comp = _local.comp = zstd.ZstdCompressor(level=3)
+    return cast(zstd.ZstdCompressor, comp)
+
+
+def _open_src(src: Path | IO[bytes]) -> ContextManager[IO[bytes]]:
+    """Путь открываем сами; чужой file-like отдаём как есть (его закрывает владелец)."""
+    if isinstance(src, (str, os.PathLike)):
+        return open(src, "rb")
+    return nullcontext(src)
+
+
+def _read_chunks(f_in: IO[bytes]) -> Iterator[Tuple[int, bytes]]:
+    """Reader-стадия: нарезает поток на (chunk_id, CHUNK-байт)."""
+    chunk_id = 0
+    while True:
+        chunk = f_in.read(CHUNK)
+        if not chunk:
+            break
+        yield chunk_id, chunk
+        chunk_id += 1
+
+
+def _seal_chunk(key: bytes, item: Tuple[int, bytes]) -> Tuple[int, bytes]:
+    """Worker-стадия: zstd + AEAD одного чанка. Nonce зависит только от chunk_id."""
+    chunk_id, chunk = item
+    cdata = _compressor().compress(chunk)
+    return len(chunk), encrypt_chunk(key, _derive_nonce(chunk_id, key), cdata)
+
+
+def _index_mac(key: bytes, meta: dict[str, Any], index: bytes) -> bytes:
+    """Keyed BLAKE2b над таблицей смещений и параметрами потока (ZSTR v2)."""
+    mac = hashlib.blake2b(key=key, digest_size=32, person=b"ZSTR-index")
+    mac.update(struct.pack(">QQQ", meta["chunks"], meta["orig_size"], meta["chunk_size"]))
+    mac.update(index)
+    return mac.digest()
+
+
 def pack_stream(
-    src: Path,
+    src: Path | IO[bytes],
     dst: Path,
     key: bytes,
     threads: int = 0,
     progress: bool = False,
+    extra_meta: dict[str, Any] | Callable[[], dict[str, Any]] | None = None,
 ) -> None:
     """
     Упаковывает и шифрует src→dst:
       - разбивает на CHUNK-чанки,
       - сжимает zstd,
       - шифрует AEAD,
-      - сохраняет Merkle-MAC в header.
+      - сохраняет Merkle-MAC в header,
+      - дописывает в конец аутентифицированный индекс чанков (ZSTR v2).
+
+    Конвейер: reader → ``threads`` воркеров (zstd+AEAD) → упорядоченный writer
+    (``threads=0`` — по числу CPU). Результат байт-в-байт совпадает
+    с последовательной упаковкой. ``extra_meta`` дописывается в header
+    (служебные поля ZSTR им не перекрываются); если это функция, она
+    вызывается, когда тело уже записано.
+
+    ``src`` — путь или открытый file-like (читается до EOF, не закрывается).
+    При ошибке чтения или записи временный файл удаляется.
     """
-    comp = zstd.ZstdCompressor(level=3, threads=threads or 0)
+    workers = resolve_workers(threads)
     tags: List[bytes] = []
+    index = bytearray()
     tmp = dst.with_suffix(dst.suffix + ".tmp")
 
-    # 1) создаём зашифрованное тело
-    with open(src, "rb") as f_in, open(tmp, "wb") as f_out:
-        chunk_id = 0
-        size = 0
-        while True:
-            chunk = f_in.read(CHUNK)
-            if not chunk:
-                break
-            size += len(chunk)
-            cdata = comp.compress(chunk)
-            nonce = _derive_nonce(chunk_id, key)
-            cipher = encrypt_chunk(key, nonce, cdata)
-            tags.append(cipher[-TAG_SZ:])
-            f_out.write(len(cipher).to_bytes(4, "big"))
-            f_out.write(cipher)
-            chunk_id += 1
-
-    # 2) делаем header с Merkle-корнем
+    # 1) создаём зашифрованное тело + индекс
+    try:
+        with _open_src(src) as f_in, open(tmp, "wb") as f_out:
+            size = 0
+            body_len = 0
+            for plain_len, cipher in ordered_map(
+                lambda item: _seal_chunk(key, item),
+                _read_chunks(f_in),
+                workers,
+            ):
+                size += plain_len
+                tags.append(cipher[-TAG_SZ:])
+                index += _INDEX_ENTRY.pack(body_len, len(cipher))
+                f_out.write(len(cipher).to_bytes(4, "big"))
+                f_out.write(cipher)
+                body_len += 4 + len(cipher)
+            f_out.write(index)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    # 2) делаем header с Merkle-корнем и MAC индекса
     root = _tree_mac(tags, key)
-    meta = {
-        "magic": "ZSTR",
-        "version": 1,
-        "chunks": len(tags),
-        "root_tag": root.hex(),
-        "orig_size": size,
-    }
+    meta: dict[str, Any] = dict((extra_meta() if callable(extra_meta) else extra_meta) or {})
+    meta.update(
+        {
+            "magic": "ZSTR",
+            "version": ZSTR_VERSION,
+            "chunks": len(tags),
+            "root_tag": root.hex(),
+            "orig_size": size,
+            "chunk_size": CHUNK,
+            "index_offset": body_len,
+        }
+    )
+    meta["index_mac"] = _index_mac(key, meta, bytes(index)).hex()
     header = json.dumps(meta).encode("utf-8") + b"\n\n"
 
     # 3) пишем header + тело
@@ -141,42 +218,76 @@ def _read_exact(fh: IO[bytes], n: int) -> bytes:
     return bytes(buf)
 
 
+def _read_records(
+    f_in: IO[bytes],
+    chunk_count: int,
+    pos: int,
+    tags: List[bytes],
+) -> Iterator[Tuple[int, int, bytes]]:
+    """Reader-стадия: отдаёт (chunk_id, позиция записи, cipher), копит теги в ``tags``."""
+    for cid in range(chunk_count):
+        clen = int.from_bytes(_read_exact(f_in, 4), "big")
+        cipher = _read_exact(f_in, clen)
+        tags.append(cipher[-TAG_SZ:])
+        yield cid, pos, cipher
+        pos += 4 + clen
+
+
+def _open_chunk(key: bytes, item: Tuple[int, int, bytes], offset: int) -> bytes | None:
+    """Worker-стадия: AEAD-проверка + zstd. Чанки до ``offset`` только аутентифицируются."""
+    cid, pos, cipher = item
+    plain = decrypt_chunk(key, _derive_nonce(cid, key), cipher)
+    if pos < offset:
+        return None
+    return cast(bytes, zstd.decompress(plain))
+
+
+def _decrypt_records(
+    f_in: IO[bytes],
+    key: bytes,
+    chunk_count: int,
+    pos: int,
+    offset: int,
+    threads: int,
+    out_fh: IO[bytes] | None,
+) -> List[bytes]:
+    """Параллельная расшифровка с упорядоченной записью; возвращает теги чанков."""
+    tags: List[bytes] = []
+    for data in ordered_map(
+        lambda item: _open_chunk(key, item, offset),
+        _read_records(f_in, chunk_count, pos, tags),
+        resolve_workers(threads),
+    ):
+        if out_fh is not None and data is not None:
+            out_fh.write(data)
+    return tags
+
+
 def resume_decrypt(
     path: Path,
     key: bytes,
     have_bytes: int,
     out_path: Path,
     offset: int = 0,
+    threads: int = 0,
 ) -> None:
     """
     Resume decrypting *path* once ≥51% данных скачано.
-    ``offset`` пропускает первые offset байт до записи.
+    ``offset`` пропускает первые offset байт до записи,
+    ``threads`` — число воркеров расшифровки (0 — по числу CPU).
     """
     total = os.path.getsize(path)
     if have_bytes < total * 0.51:
         raise ValueError("insufficient data for resume")
 
     with open(path, "rb") as f_in:
-        header = bytearray()
-        while not header.endswith(b"\n\n"):
-            header.extend(_read_exact(f_in, 1))
-        meta = json.loads(header[:-2].decode("utf-8"))
+        meta = json.loads(read_header(f_in, limit=HEADER_LIMIT).decode("utf-8"))
+        body_start = f_in.tell()
         root_tag = bytes.fromhex(meta["root_tag"])
         chunk_count = meta["chunks"]
-        tags: List[bytes] = []
-        pos = len(header)
 
         with open(out_path, "wb") as f_out:
-            for cid in range(chunk_count):
-                clen = int.from_bytes(_read_exact(f_in, 4), "big")
-                cipher = _read_exact(f_in, clen)
-                nonce = _derive_nonce(cid, key)
-                plain = decrypt_chunk(key, nonce, cipher)
-                data = zstd.decompress(plain)
-                if pos >= offset:
-                    f_out.write(data)
-                pos += 4 + clen
-                tags.append(cipher[-TAG_SZ:])
+            tags = _decrypt_records(f_in, key, chunk_count, body_start, offset, threads, f_out)
 
     if _tree_mac(tags, key) != root_tag:
         raise ValueError("MAC mismatch")
@@ -189,38 +300,123 @@ def unpack_stream(
     verify_only: bool = False,
     progress: bool = False,
     offset: int = 0,
+    threads: int = 0,
 ) -> None:
     """
     Распаковывает src→dst (или только проверяет, если verify_only=True).
+    Чанки расшифровываются ``threads`` воркерами (0 — по числу CPU)
+    и пишутся строго по порядку.
     """
     with open(src, "rb") as f_in:
-        header = bytearray()
-        while not header.endswith(b"\n\n"):
-            b = f_in.read(1)
-            if not b:
-                raise ValueError("truncated header")
-            header.extend(b)
-        meta = json.loads(header[:-2].decode("utf-8"))
+        meta = json.loads(read_header(f_in, limit=HEADER_LIMIT).decode("utf-8"))
+        body_start = f_in.tell()
         root_tag = bytes.fromhex(meta["root_tag"])
         chunk_count = meta["chunks"]
-        tags: List[bytes] = []
-        pos = len(header)
 
         out_fh = None if verify_only else open(dst, "wb")
         try:
-            for cid in range(chunk_count):
-                clen = int.from_bytes(_read_exact(f_in, 4), "big")
-                cipher = _read_exact(f_in, clen)
-                tags.append(cipher[-TAG_SZ:])
-                nonce = _derive_nonce(cid, key)
-                plain = decrypt_chunk(key, nonce, cipher)
-                data = zstd.decompress(plain)
-                if out_fh and pos >= offset:
-                    out_fh.write(data)
-                pos += 4 + clen
+            tags = _decrypt_records(f_in, key, chunk_count, body_start, offset, threads, out_fh)
         finally:
             if out_fh:
                 out_fh.close()
+        if meta.get("version", 1) >= 2:
+            _load_index(f_in, meta, body_start, key)
 
     if _tree_mac(tags, key) != root_tag:
         raise ValueError("MAC mismatch")
+
+
+def _load_index(fh: IO[bytes], meta: dict[str, Any], body_start: int, key: bytes) -> List[Tuple[int, int]]:
+    """Прочитать и проверить индекс чанков ZSTR v2."""
+    if meta.get("version", 1) < 2 or "index_offset" not in meta:
+        raise ValueError("stream has no chunk index (ZSTR v1)")
+    size = meta["chunks"] * _INDEX_ENTRY.size
+    fh.seek(body_start + meta["index_offset"])
+    index = fh.read(size)
+    if len(index) != size:
+        raise ValueError("truncated chunk index")
+    if not hmac.compare_digest(_index_mac(key, meta, index), bytes.fromhex(meta.get("index_mac", ""))):
+        raise ValueError("index MAC mismatch")
+    return [(body_start + off, clen) for off, clen in _INDEX_ENTRY.iter_unpack(index)]
+
+
+def read_range(
+    path: Path,
+    key: bytes,
+    start: int,
+    length: int,
+    threads: int = 0,
+) -> bytes:
+    """
+    Вернуть ``length`` байт открытого текста начиная с ``start``.
+    Расшифровываются только чанки, покрывающие диапазон (нужен ZSTR v2).
+    """
+    if start < 0 or length < 0:
+        raise ValueError("start and length must be non-negative")
+
+    with open(path, "rb") as fh:
+        meta = json.loads(read_header(fh, limit=HEADER_LIMIT).decode("utf-8"))
+        index = _load_index(fh, meta, fh.tell(), key)
+
+        end = min(start + length, meta["orig_size"])
+        if start >= end:
+            return b""
+        chunk_size = meta["chunk_size"]
+        first, last = start // chunk_size, (end - 1) // chunk_size
+
+        def _records() -> Iterator[Tuple[int, int, bytes]]:
+            for cid in range(first, last + 1):
+                off, clen = index[cid]
+                fh.seek(off)
+                if int.from_bytes(_read_exact(fh, 4), "big") != clen:
+                    raise ValueError("chunk length mismatch")
+                yield cid, 0, _read_exact(fh, clen)
+
+        workers = min(resolve_workers(threads), last - first + 1)
+        data = b"".join(
+            cast(bytes, d) for d in ordered_map(lambda item: _open_chunk(key, item, 0), _records(), workers)
+        )
+
+    lo = start - first * chunk_size
+    return data[lo : lo + (end - start)]
+
+
+class StreamChunks:
+    """
+    Произвольный доступ к открытому тексту ZSTR v2 по чанкам.
+    Индекс читается и проверяется один раз при открытии; ``chunk`` делает
+    один ``pread`` и расшифровывает только запрошенный чанк (потокобезопасно).
+    """
+
+    def __init__(self, path: Path, key: bytes) -> None:
+        self._key = key
+        self._fh = open(path, "rb")
+        try:
+            meta = json.loads(read_header(self._fh, limit=HEADER_LIMIT).decode("utf-8"))
+            if meta.get("magic") != "ZSTR":
+                raise ValueError("not a ZSTR stream")
+            self._index = _load_index(self._fh, meta, self._fh.tell(), key)
+        except BaseException:
+            self._fh.close()
+            raise
+        self.size: int = meta["orig_size"]
+        self.chunk_size: int = meta["chunk_size"]
+        self.count: int = meta["chunks"]
+
+    def chunk(self, idx: int) -> bytes:
+        if not 0 <= idx < self.count:
+            raise IndexError(idx)
+        off, clen = self._index[idx]
+        record = pread_slab(self._fh.fileno(), 4 + clen, off)
+        if len(record) != 4 + clen or int.from_bytes(record[:4], "big") != clen:
+            raise ValueError("chunk length mismatch")
+        return cast(bytes, _open_chunk(self._key, (idx, 0, cast(bytes, record[4:])), 0))
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def __enter__(self) -> StreamChunks:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
@@ -4,9 +4,16 @@
 from __future__ import annotations
 
 import os
+import threading
 from pathlib import Path
+from typing import IO
 
-__all__ = ["atomic_write", "secure_delete"]
+__all__ = ["HEADER_LIMIT", "atomic_write", "pread_slab", "read_header", "secure_delete"]
+
+# JSON headers of containers can carry a sealed, compressed file manifest.
+HEADER_LIMIT = 16 * 1024 * 1024
+_HEADER_BLOCK = 4096
+_HEADER_BLOCK_MAX = 1024 * 1024
 
 
 def atomic_write(path: Path, data: bytes) -> None:
@@ -29,3 +36,55 @@ def secure_delete(path: Path) -> None:
         f.flush()
         os.fsync(f.fileno())
     path.unlink()
+
+
+_SLABS = threading.local()
+_SEEK_LOCK = threading.Lock()
+
+
+def pread_slab(fd: int, n: int, offset: int) -> memoryview:
+    """Read up to ``n`` bytes at ``offset`` into a per-thread reusable buffer.
+
+    Saves an allocation per read on hot random-access paths. The view is
+    only valid until the same thread calls this again, so consume it (e.g.
+    decrypt it) right away. Without positional reads (Windows) the file
+    offset of ``fd`` is moved, under a lock shared by all callers.
+    """
+    if not hasattr(os, "preadv") and hasattr(os, "pread"):  # pragma: no cover - older macOS
+        return memoryview(os.pread(fd, n, offset))
+    buf = getattr(_SLABS, "buf", None)
+    if buf is None or len(buf) < n:
+        buf = _SLABS.buf = bytearray(n)
+    view = memoryview(buf)[:n]
+    if hasattr(os, "preadv"):
+        return view[: os.preadv(fd, [view], offset)]
+    with _SEEK_LOCK, open(fd, "rb", buffering=0, closefd=False) as raw:
+        raw.seek(offset)
+        return view[: raw.readinto(view) or 0]
+
+
+def read_header(fh: IO[bytes], separator: bytes = b"\n\n", limit: int | None = None) -> bytes:
+    """Return the bytes before ``separator`` and leave ``fh`` at the body start.
+
+    Reads in growing blocks rather than byte by byte, so a typical JSON
+    header costs a single ``read`` call. Raises ``ValueError`` if the
+    separator is missing or lies beyond ``limit`` bytes.
+    """
+    start = fh.tell()
+    buf = bytearray()
+    block = _HEADER_BLOCK
+    while True:
+        scan_from = max(len(buf) - len(separator) + 1, 0)
+        chunk = fh.read(block)
+        if not chunk:
+            raise ValueError("truncated header")
+        buf += chunk
+        idx = buf.find(separator, scan_from)
+        if idx != -1:
+            if limit is not None and idx > limit:
+                raise ValueError("header too large")
+            fh.seek(start + idx + len(separator))
+            return bytes(buf[:idx])
+        if limit is not None and len(buf) > limit:
+            raise ValueError("header too large")
+        block = min(block * 2, _HEADER_BLOCK_MAX)
@@ -0,0 +1,62 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core Contributors
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, TypeVar
+
+__all__ = ["ordered_map", "resolve_workers"]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def resolve_workers(threads: int) -> int:
+    """Map a user ``threads`` value to a worker count (``<= 0`` → all CPUs)."""
+    if threads > 0:
+        return threads
+    return os.cpu_count() or 1
+
+
+def ordered_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: int,
+    window: int | None = None,
+    *,
+    processes: bool = False,
+) -> Iterator[R]:
+    """Apply ``func`` to ``items`` on ``workers`` threads, yielding results in input order.
+
+    At most ``window`` items (default ``2 * workers``) are in flight, so the
+    consumer applies backpressure to the producer and memory stays bounded.
+    ``workers <= 1`` runs inline without a pool. With ``processes=True`` a
+    process pool is used instead, for CPU-bound work that holds the GIL;
+    ``func`` and the items must then be picklable.
+    """
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    limit = max(window or 2 * workers, 1)
+    pending: Deque[Future[R]] = deque()
+    pool: Executor
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zil-pipe")
+    try:
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+        pool.shutdown(wait=True)
@@ -0,0 +1,346 @@
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+# SPDX-License-Identifier: MIT
+"""Benchmark suite for the hot paths, with JSON results and a regression gate.
+
+Every case times one operation on data prepared in a temporary directory:
+streaming pack/unpack at several sizes and thread counts, ZILANT containers
+(classic and pq), the KDFs, ZilantFS operations, audit-ledger appends and
+the integrity scan behind ``heal-scan``. ::
+
+    zilant bench --suite --save baseline.json
+    zilant bench --suite --baseline baseline.json --threshold 0.15
+
+A case regresses when its median time grows by more than ``threshold``
+(a fraction) against the baseline; cases missing on either side or skipped
+(for example pq without ``pqclean``) are not compared.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import platform
+import statistics
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, cast
+
+__all__ = ["CASES", "DEFAULT_THRESHOLD", "SUITE_VERSION", "compare", "run_suite"]
+
+SUITE_VERSION = 1
+DEFAULT_THRESHOLD = 0.10
+MiB = 1024 * 1024
+
+Run = Callable[[], None]
+Setup = Callable[[Path, ExitStack], Run]
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Setup
+    nbytes: int = 0  # per run, for MB/s
+    ops: int = 0  # per run, for ops/s
+    quick: bool = True  # part of ``--quick``
+
+
+class Skip(Exception):
+    """Raised by a setup when the case cannot run here (missing optional dependency)."""
+
+
+CASES: List[Case] = []
+KEY = b"k" * 32
+
+
+def _case(name: str, *, nbytes: int = 0, ops: int = 0, quick: bool = True) -> Callable[[Setup], Setup]:
+    def register(setup: Setup) -> Setup:
+        CASES.append(Case(name, setup, nbytes, ops, quick))
+        return setup
+
+    return register
+
+
+def _payload(path: Path, size: int) -> Path:
+    """Half random, half repetitive: neither zstd's best nor worst case."""
+    with open(path, "wb") as fh:
+        left = size
+        while left > 0:
+            step = min(left, MiB)
+            fh.write(os.urandom(step // 2) + (b"zilant-bench" * (step // 24 + 1))[: step - step // 2])
+            left -= step
+    return path
+
+
+@contextmanager
+def _cwd(path: Path) -> Iterator[None]:
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old)
+
+
+# ───────────────────────────── streaming (ZSTR)
+def _stream_cases() -> None:
+    from streaming_aead import pack_stream, unpack_stream
+
+    for size in (1, 16, 64):
+        for threads in (1, 0):
+            tag = f"{size}MiB,t{threads or 'max'}"
+
+            def pack(tmp: Path, _: ExitStack, size: int = size, threads: int = threads) -> Run:
+                src = _payload(tmp / "in.bin", size * MiB)
+                return lambda: pack_stream(src, tmp / "out.zst", KEY, threads=threads)
+
+            def unpack(tmp: Path, _: ExitStack, size: int = size, threads: int = threads) -> Run:
+                pack_stream(_payload(tmp / "in.bin", size * MiB), tmp / "c.zst", KEY)
+                return lambda: unpack_stream(tmp / "c.zst", tmp / "out.bin", KEY, threads=threads)
+
+            _case(f"stream.pack[{tag}]", nbytes=size * MiB, quick=size < 64)(pack)
+            _case(f"stream.unpack[{tag}]", nbytes=size * MiB, quick=size < 64)(unpack)
+
+
+_stream_cases()
+
+
+# ───────────────────────────── ZILANT containers
+def _pq_keypair() -> tuple[bytes, bytes]:
+    from zilant_prime_core.utils.pq_crypto import Kyber768KEM
+
+    try:
+        return cast(tuple[bytes, bytes], Kyber768KEM().generate_keypair())
+    except RuntimeError as exc:
+        raise Skip(str(exc)) from None
+
+
+def _container_cases() -> None:
+    from container import pack_file, unpack_file
+
+    for mode in ("classic", "pq"):
+        for size in (1, 16):
+            tag = f"{mode},{size}MiB"
+
+            def pack(tmp: Path, _: ExitStack, size: int = size, mode: str = mode) -> Run:
+                pub = _pq_keypair()[0] if mode == "pq" else None
+                src = _payload(tmp / "in.bin", size * MiB)
+                return lambda: pack_file(src, tmp / "out.zil", KEY, pub)
+
+            def unpack(tmp: Path, _: ExitStack, size: int = size, mode: str = mode) -> Run:
+                pub, priv = _pq_keypair() if mode == "pq" else (None, None)
+                pack_file(_payload(tmp / "in.bin", size * MiB), tmp / "c.zil", KEY, pub)
+                out = tmp / "out.bin"
+
+                def run() -> None:
+                    if out.exists():
+                        out.unlink()
+                    unpack_file(tmp / "c.zil", out, KEY, pq_private_key=priv)
+
+                return run
+
+            _case(f"container.pack[{tag}]", nbytes=size * MiB)(pack)
+            _case(f"container.unpack[{tag}]", nbytes=size * MiB)(unpack)
+
+
+_container_cases()
+
+
+# ───────────────────────────── KDFs
+@_case("kdf.argon2id", ops=1)
+def _kdf_argon2(tmp: Path, _: ExitStack) -> Run:
+    from zilant_prime_core.crypto.kdf import derive_key
+
+    def run() -> None:
+        derive_key(b"bench-password", os.urandom(16))  # fresh salt: no cache hits
+
+    return run
+
+
+@_case("kdf.hkdf_pq", ops=1000)
+def _kdf_hkdf(tmp: Path, _: ExitStack) -> Run:
+    from zilant_prime_core.utils.pq_crypto import derive_key_pq
+
+    secrets = [os.urandom(32) for _ in range(1000)]
+
+    def run() -> None:
+        for s in secrets:
+            derive_key_pq(s)
+
+    return run
+
+
+# ───────────────────────────── ZilantFS
+def _mounted(tmp: Path, stack: ExitStack, files: int = 0, size: int = 0) -> Any:
+    from zilant_prime_core.zilfs import ZilantFS, pack_dir
+
+    cont = tmp / "vol.zil"
+    if files:
+        src = tmp / "vol"
+        src.mkdir()
+        for i in range(files):
+            _payload(src / f"f{i}.bin", size)
+        pack_dir(src, cont, KEY)
+    fs = ZilantFS(cont, KEY)
+    stack.callback(fs.destroy, "/")
+    return fs
+
+
+@_case("zilfs.write[16MiB]", nbytes=16 * MiB)
+def _fs_write(tmp: Path, stack: ExitStack) -> Run:
+    fs = _mounted(tmp, stack)
+    block = os.urandom(128 * 1024)
+
+    def run() -> None:
+        fh = fs.create("/big.bin", 0o644)
+        for off in range(0, 16 * MiB, len(block)):
+            fs.write("/big.bin", block, off, fh)
+        fs.release("/big.bin", fh)
+
+    return run
+
+
+@_case("zilfs.read[16MiB]", nbytes=16 * MiB)
+def _fs_read(tmp: Path, stack: ExitStack) -> Run:
+    fs = _mounted(tmp, stack, files=1, size=16 * MiB)
+
+    def run() -> None:
+        fh = fs.open("/f0.bin", os.O_RDONLY)
+        for off in range(0, 16 * MiB, 128 * 1024):
+            fs.read("/f0.bin", 128 * 1024, off, fh)
+        fs.release("/f0.bin", fh)
+
+    return run
+
+
+@_case("zilfs.getattr", ops=1000)
+def _fs_getattr(tmp: Path, stack: ExitStack) -> Run:
+    fs = _mounted(tmp, stack, files=10, size=1024)
+    paths = [f"/f{i % 10}.bin" for i in range(1000)]
+
+    def run() -> None:
+        for p in paths:
+            fs.getattr(p)
+
+    return run
+
+
+@_case("zilfs.flush_delta", ops=1)
+def _fs_flush(tmp: Path, stack: ExitStack) -> Run:
+    fs = _mounted(tmp, stack, files=20, size=256 * 1024)
+    data = os.urandom(64 * 1024)
+
+    def run() -> None:
+        fh = fs.open("/f0.bin", os.O_RDWR)
+        fs.write("/f0.bin", data, 0, fh)
+        fs.release("/f0.bin", fh)
+        fs.flush_changes()
+
+    return run
+
+
+# ───────────────────────────── audit ledger, heal-scan
+@_case("ledger.append", ops=200)
+def _ledger_append(tmp: Path, stack: ExitStack) -> Run:
+    from audit_ledger import record_action
+
+    stack.enter_context(_cwd(tmp))  # the ledger lives in the working directory
+
+    def run() -> None:
+        for i in range(200):
+            record_action("bench", {"i": i})
+
+    return run
+
+
+@_case("ledger.append[batch]", ops=200)
+def _ledger_append_batch(tmp: Path, stack: ExitStack) -> Run:
+    from audit_ledger import batch, record_action
+
+    stack.enter_context(_cwd(tmp))
+
+    def run() -> None:
+        with batch():
+            for i in range(200):
+                record_action("bench", {"i": i})
+
+    return run
+
+
+@_case("heal.scan[50]", ops=50)
+def _heal_scan(tmp: Path, _: ExitStack) -> Run:
+    from container import pack_file, verify_integrity
+
+    src = _payload(tmp / "in.bin", 64 * 1024)
+    for i in range(50):
+        pack_file(src, tmp / f"c{i}.zil", KEY)
+    paths = sorted(tmp.glob("*.zil"))
+
+    def run() -> None:
+        for p in paths:  # what ``heal-scan`` does for every container
+            verify_integrity(p)
+
+    return run
+
+
+# ───────────────────────────── runner
+def _measure(case: Case, repeat: int) -> Dict[str, Any]:
+    with TemporaryDirectory(prefix="zil-bench-") as tmp, ExitStack() as stack:
+        try:
+            run = case.setup(Path(tmp), stack)
+        except Skip as exc:
+            return {"skipped": str(exc)}
+        run()  # warm-up: page cache, imports, per-thread state
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    result: Dict[str, Any] = {"seconds": median, "best": min(times), "runs": repeat}
+    if case.nbytes:
+        result["mb_s"] = case.nbytes / MiB / median
+    if case.ops:
+        result["ops_s"] = case.ops / median
+    return result
+
+
+def run_suite(
+    pattern: str = "*",
+    *,
+    quick: bool = False,
+    repeat: int = 5,
+    progress: Callable[[str, Dict[str, Any]], None] | None = None,
+) -> Dict[str, Any]:
+    """Run the cases whose name matches ``pattern`` (fnmatch) and return the JSON document."""
+    results: Dict[str, Any] = {}
+    for case in CASES:
+        if (quick and not case.quick) or not fnmatch.fnmatchcase(case.name, pattern):
+            continue
+        results[case.name] = _measure(case, repeat)
+        if progress is not None:
+            progress(case.name, results[case.name])
+    return {
+        "suite": SUITE_VERSION,
+        "created": int(time.time()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """Cases whose median time grew by more than ``threshold`` against ``baseline``."""
+    regressions = []
+    base = baseline.get("results", {})
+    for name, now in current.get("results", {}).items():
+        old = base.get(name)
+        if not old or "seconds" not in old or "seconds" not in now:
+            continue
+        change = now["seconds"] / old["seconds"] - 1.0
+        if change > threshold:
+            regressions.append({"case": name, "baseline": old["seconds"], "current": now["seconds"], "change": change})
+    return regressions
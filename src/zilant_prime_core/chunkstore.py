@@ -0,0 +1,529 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+"""Content-defined chunk store and ZSNAP snapshot manifests.
+
+A snapshot stores the plaintext of a container as a list of chunk ids. Chunk
+boundaries are content-defined, so an edit only changes the chunks around
+it; unchanged chunks are already in the store and cost nothing. A ZSNAP file
+is a JSON header plus an encrypted manifest that lists the chunk ids as a
+delta against the parent snapshot.
+
+Layout next to ``vol.zil``::
+
+    vol.chunks/ab/ab12…     nonce | ChaCha20-Poly1305(zstd(chunk), aad=id)
+    vol.chunks/index.json   refcount index: ZSNAP files using the store, chunk → count
+    vol.chunks/SHARED       marker: some of those files live outside the store's directory
+    vol_<label>.zil         {"magic": "ZSNAP", …}\\n\\n nonce | sealed manifest
+
+A store can also be shared (``store=``): snapshots of several containers,
+and containers packed in dedup mode, then keep each distinct chunk once.
+Chunks are never deleted when a snapshot goes away; :func:`remove_snapshot`
+only drops references and :func:`gc` sweeps chunks nobody references.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+import zstandard as zstd
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from filelock import FileLock
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, cast
+
+from utils.file_utils import read_header
+from utils.pipeline import ordered_map, resolve_workers
+
+__all__ = [
+    "ChunkStore",
+    "ZSNAP_MAGIC",
+    "cdc_split",
+    "gc",
+    "is_snapshot",
+    "iter_snapshot",
+    "latest_snapshot",
+    "remove_snapshot",
+    "snapshot_refs",
+    "snapshot_store",
+    "store_path",
+    "verify_snapshot",
+    "write_snapshot",
+]
+
+ZSNAP_MAGIC = "ZSNAP"
+ZSNAP_VERSION = 1
+
+# Boundary where CDC_RUN consecutive bytes all map to 1 in a keyed table that
+# maps half of the byte values to 1: about one boundary per 2**(CDC_RUN + 1)
+# bytes. Found with bytes.translate + bytes.find, so chunking runs at C speed.
+CDC_RUN = 19
+CDC_MIN = 256 * 1024
+CDC_MAX = 4 * 1024 * 1024
+# every FULL_EVERY-th snapshot stores a full manifest to bound parent chains
+FULL_EVERY = 24
+# gc leaves younger unreferenced chunks alone: a writer may not have registered them yet
+GC_GRACE = 3600.0
+INDEX_NAME = "index.json"
+SHARED_NAME = "SHARED"
+
+_NONCE = 12
+_MANIFEST_AAD = b"ZSNAP-manifest-v1"
+_HEADER_LIMIT = 1 << 16  # the manifest is in the body, the header only names the store
+
+
+def _subkey(key: bytes, info: bytes) -> bytes:
+    return cast(
+        bytes, HKDF(algorithm=hashes.SHA256(), length=32, salt=b"zilant-chunkstore", info=info).derive(bytes(key))
+    )
+
+
+def _cdc_table(key: bytes) -> bytes:
+    """Keyed byte → {0, 1} table, so boundaries do not reveal content to others."""
+    seed = _subkey(key, b"cdc-table")
+    order = sorted(range(256), key=lambda b: hashlib.blake2b(bytes([b]), key=seed, digest_size=8).digest())
+    table = bytearray(256)
+    for b in order[:128]:
+        table[b] = 1
+    return bytes(table)
+
+
+def cdc_split(
+    blocks: Iterable[bytes],
+    table: bytes,
+    min_size: int = CDC_MIN,
+    max_size: int = CDC_MAX,
+    run: int = CDC_RUN,
+) -> Iterator[bytes]:
+    """Re-cut a stream of ``blocks`` into content-defined chunks."""
+    marker = b"\x01" * run
+
+    def boundary(buf: bytes) -> int:
+        window = buf[:max_size].translate(table)
+        pos = window.find(marker, max(min_size - run, 0))
+        return min(len(window), max_size) if pos == -1 else pos + run
+
+    buf = b""
+    for block in blocks:
+        buf += block
+        while len(buf) >= max_size:
+            cut = boundary(buf)
+            yield buf[:cut]
+            buf = buf[cut:]
+    while buf:
+        cut = boundary(buf)
+        yield buf[:cut]
+        buf = buf[cut:]
+
+
+class ChunkStore:
+    """Encrypted, content-addressed chunk directory."""
+
+    def __init__(self, root: Path, key: bytes) -> None:
+        self.root = root
+        self._id_key = _subkey(key, b"chunk-id")
+        self._aead = ChaCha20Poly1305(_subkey(key, b"chunk-enc"))
+        self.table = _cdc_table(key)
+
+    def chunk_id(self, data: bytes) -> bytes:
+        return hashlib.blake2b(data, key=self._id_key, digest_size=32).digest()
+
+    def path(self, cid: bytes) -> Path:
+        h = cid.hex()
+        return self.root / h[:2] / h
+
+    def put(self, data: bytes) -> bytes:
+        """Store ``data`` unless an identical chunk exists; return its id."""
+        cid = self.chunk_id(data)
+        dst = self.path(cid)
+        if dst.exists():
+            try:
+                os.utime(dst)  # reused: keep it out of the gc grace window
+            except FileNotFoundError:  # pragma: no cover - swept in between, write it again
+                pass
+            else:
+                return cid
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        nonce = os.urandom(_NONCE)
+        blob = nonce + self._aead.encrypt(nonce, zstd.ZstdCompressor(level=3).compress(data), cid)
+        tmp = dst.with_name(f"{dst.name}.{os.urandom(4).hex()}.tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(blob)
+            fh.flush()
+            os.fsync(fh.fileno())
+        tmp.replace(dst)
+        return cid
+
+    def get(self, cid: bytes) -> bytes:
+        try:
+            blob = self.path(cid).read_bytes()
+        except FileNotFoundError:
+            raise ValueError(f"missing chunk {cid.hex()}") from None
+        data = zstd.ZstdDecompressor().decompress(self._aead.decrypt(blob[:_NONCE], blob[_NONCE:], cid))
+        if self.chunk_id(data) != cid:
+            raise ValueError(f"chunk {cid.hex()} does not match its id")
+        return data
+
+    def has(self, cid: bytes) -> bool:
+        return self.path(cid).exists()
+
+
+def store_path(container: Path) -> Path:
+    """Chunk store shared by all snapshots of ``container``."""
+    return container.with_name(f"{container.stem}.chunks")
+
+
+def snapshot_store(path: Path, header: Dict[str, Any] | None = None) -> Path:
+    """Chunk store of a ZSNAP file; its ``store`` field is relative to the file."""
+    if header is None:
+        with open(path, "rb") as fh:
+            header = json.loads(read_header(fh, limit=_HEADER_LIMIT))
+    return path.parent / cast(str, header["store"])
+
+
+def latest_snapshot(container: Path) -> Path | None:
+    """Most recent snapshot of ``container``, tracked in the store's HEAD file.
+
+    Kept in the store rather than the container header because repacking the
+    container writes a fresh header.
+    """
+    try:
+        name = (store_path(container) / "HEAD").read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    snap = container.with_name(name)
+    return snap if name and snap.is_file() else None
+
+
+# ───────────────────────────── manifests
+def _delta(refs: List[bytes], parent: List[bytes]) -> List[Any]:
+    """Encode ``refs`` as ``["copy", start, count]`` runs of ``parent`` plus ``["add", [ids]]``."""
+    where: Dict[bytes, int] = {}
+    for i, cid in enumerate(parent):
+        where.setdefault(cid, i)
+    ops: List[Any] = []
+    i = 0
+    while i < len(refs):
+        start = where.get(refs[i])
+        if start is None:
+            if ops and ops[-1][0] == "add":
+                ops[-1][1].append(refs[i].hex())
+            else:
+                ops.append(["add", [refs[i].hex()]])
+            i += 1
+            continue
+        n = 1
+        while i + n < len(refs) and start + n < len(parent) and refs[i + n] == parent[start + n]:
+            n += 1
+        ops.append(["copy", start, n])
+        i += n
+    return ops
+
+
+def _apply(ops: List[Any], parent: List[bytes]) -> List[bytes]:
+    refs: List[bytes] = []
+    for op in ops:
+        if op[0] == "copy":
+            start, n = int(op[1]), int(op[2])
+            if start < 0 or start + n > len(parent):
+                raise ValueError("manifest copy out of range")
+            refs.extend(parent[start : start + n])
+        elif op[0] == "add":
+            refs.extend(bytes.fromhex(h) for h in op[1])
+        else:
+            raise ValueError(f"unknown manifest op {op[0]!r}")
+    return refs
+
+
+def _read_snapshot(path: Path, key: bytes) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    with open(path, "rb") as fh:
+        header = json.loads(read_header(fh, limit=_HEADER_LIMIT))
+        if header.get("magic") != ZSNAP_MAGIC:
+            raise ValueError(f"{path.name} is not a snapshot")
+        blob = fh.read()
+    aead = ChaCha20Poly1305(_subkey(key, b"manifest"))
+    manifest = json.loads(zstd.ZstdDecompressor().decompress(aead.decrypt(blob[:_NONCE], blob[_NONCE:], _MANIFEST_AAD)))
+    return header, manifest
+
+
+def _write_zsnap(out: Path, header: Dict[str, Any], manifest: Dict[str, Any], key: bytes) -> None:
+    aead = ChaCha20Poly1305(_subkey(key, b"manifest"))
+    nonce = os.urandom(_NONCE)
+    sealed = aead.encrypt(nonce, zstd.ZstdCompressor(level=3).compress(json.dumps(manifest).encode()), _MANIFEST_AAD)
+    tmp = out.with_suffix(out.suffix + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n\n" + nonce + sealed)
+        fh.flush()
+        os.fsync(fh.fileno())
+    tmp.replace(out)
+
+
+def is_snapshot(meta: Dict[str, Any]) -> bool:
+    return meta.get("magic") == ZSNAP_MAGIC
+
+
+def verify_snapshot(path: Path) -> bool:
+    """Check a ZSNAP header and its store without the key, like ``container.verify_integrity``."""
+    try:
+        with open(path, "rb") as fh:
+            header = json.loads(read_header(fh, limit=_HEADER_LIMIT))
+            sealed = os.fstat(fh.fileno()).st_size - fh.tell()
+        if not is_snapshot(header) or header.get("version") != ZSNAP_VERSION:
+            return False
+        return sealed > _NONCE + 16 and snapshot_store(path, header).is_dir()
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        return False
+
+
+def snapshot_refs(path: Path, key: bytes) -> tuple[List[bytes], Dict[str, Any]]:
+    """Resolve the full chunk id list of a snapshot, following its parents."""
+    chain: List[Dict[str, Any]] = []
+    current: Path | None = path
+    while current is not None:
+        _, manifest = _read_snapshot(current, key)
+        chain.append(manifest)
+        parent = manifest.get("parent")
+        current = path.with_name(parent) if parent else None
+        if len(chain) > FULL_EVERY + 1:
+            raise ValueError("snapshot parent chain too long")
+    refs: List[bytes] = []
+    for manifest in reversed(chain):
+        refs = _apply(manifest["ops"], refs)
+    return refs, chain[0]
+
+
+def iter_snapshot(path: Path, key: bytes, threads: int = 0) -> Iterator[bytes]:
+    """Yield the plaintext recorded by a snapshot, verifying its checksum at the end."""
+    with open(path, "rb") as fh:
+        header = json.loads(read_header(fh, limit=_HEADER_LIMIT))
+    refs, manifest = snapshot_refs(path, key)
+    store = ChunkStore(snapshot_store(path, header), key)
+    hasher = hashlib.sha3_256()
+    for data in ordered_map(store.get, refs, resolve_workers(threads)):
+        hasher.update(data)
+        yield data
+    if hasher.hexdigest() != manifest["checksum_hex"]:
+        raise ValueError("snapshot checksum mismatch")
+
+
+def write_snapshot(
+    out: Path,
+    container: Path,
+    blocks: Iterable[bytes],
+    key: bytes,
+    *,
+    parent: Path | None = None,
+    meta: Dict[str, Any] | Callable[[], Dict[str, Any]] | None = None,
+    threads: int = 0,
+    store: Path | None = None,
+    head: bool = True,
+) -> Dict[str, Any]:
+    """Chunk ``blocks`` into a chunk store and write the ZSNAP file ``out``.
+
+    Only chunks missing from the store are encrypted and written. The manifest
+    is a delta against ``parent`` when that is a readable snapshot, otherwise
+    (and every ``FULL_EVERY`` generations) a full list.
+
+    The store is the one of ``container`` unless ``store`` names a shared
+    one. ``meta`` (or the dict it returns once all blocks are consumed) goes
+    into the header. ``head=False`` writes a standalone file (a container
+    in dedup mode) that does not become the latest snapshot of ``container``.
+    """
+    store_dir = store if store is not None else store_path(container)
+    chunks = ChunkStore(store_dir, key)
+    hasher = hashlib.sha3_256()
+    size = 0
+
+    def hashed() -> Iterator[bytes]:
+        nonlocal size
+        for chunk in cdc_split(blocks, chunks.table):
+            hasher.update(chunk)
+            size += len(chunk)
+            yield chunk
+
+    refs = list(ordered_map(chunks.put, hashed(), resolve_workers(threads)))
+
+    manifest: Dict[str, Any] = {"parent": None, "depth": 0, "ops": [["add", [r.hex() for r in refs]]]}
+    if parent is not None and parent.is_file():
+        try:
+            parent_refs, parent_manifest = snapshot_refs(parent, key)
+        except Exception:
+            parent_refs, parent_manifest = [], {}
+        depth = int(parent_manifest.get("depth", FULL_EVERY)) + 1
+        if parent_manifest and depth < FULL_EVERY:
+            manifest = {"parent": parent.name, "depth": depth, "ops": _delta(refs, parent_refs)}
+    manifest.update({"size": size, "chunks": len(refs), "checksum_hex": hasher.hexdigest()})
+
+    header: Dict[str, Any] = {
+        "magic": ZSNAP_MAGIC,
+        "version": ZSNAP_VERSION,
+        "store": Path(os.path.relpath(store_dir, out.parent)).as_posix(),
+    }
+    header.update((meta() if callable(meta) else meta) or {})
+    with _lock(store_dir):
+        index = _open_index(store_dir, key)
+        name = _owner(store_dir, out)
+        if name in index["owners"] and out.is_file():  # overwritten: its references go away
+            _detach_children(store_dir, index, name, key)
+            _count(index, snapshot_refs(out, key)[0], -1)
+        _write_zsnap(out, header, manifest, key)
+        _count(index, refs, +1)
+        index["owners"][name] = {
+            "parent": _owner(store_dir, out.with_name(manifest["parent"])) if manifest["parent"] else None
+        }
+        _save_index(store_dir, index)
+        if Path(name).parent.as_posix() != ".." and not (store_dir / SHARED_NAME).exists():
+            (store_dir / SHARED_NAME).touch()  # _discover cannot find this owner again
+    if head:
+        head_dir = store_path(container)
+        head_dir.mkdir(parents=True, exist_ok=True)
+        head_tmp = head_dir / "HEAD.tmp"
+        head_tmp.write_text(out.name, encoding="utf-8")
+        head_tmp.replace(head_dir / "HEAD")
+    return manifest
+
+
+# ───────────────────────────── refcount index and gc
+def _lock(store_dir: Path) -> FileLock:
+    """Inter-process lock for the index (several containers may share a store)."""
+    store_dir.mkdir(parents=True, exist_ok=True)
+    return FileLock(str(store_dir / "LOCK"))
+
+
+def _owner(store_dir: Path, path: Path) -> str:
+    return Path(os.path.relpath(path, store_dir)).as_posix()
+
+
+def _count(index: Dict[str, Any], refs: Iterable[bytes], delta: int) -> None:
+    """Add ``delta`` to the count of every distinct chunk in ``refs``."""
+    counts = index["refs"]
+    for cid in set(refs):
+        h = cid.hex()
+        n = counts.get(h, 0) + delta
+        if n > 0:
+            counts[h] = n
+        else:
+            counts.pop(h, None)
+
+
+def _save_index(store_dir: Path, index: Dict[str, Any]) -> None:
+    tmp = store_dir / f"{INDEX_NAME}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, separators=(",", ":"))
+        fh.flush()
+        os.fsync(fh.fileno())
+    tmp.replace(store_dir / INDEX_NAME)
+
+
+def _discover(store_dir: Path) -> Iterator[str]:
+    """ZSNAP files next to the store that use it (stores created before the index)."""
+    target = store_dir.resolve()
+    for path in store_dir.parent.iterdir():
+        if not path.is_file():
+            continue
+        try:
+            with open(path, "rb") as fh:
+                header = json.loads(read_header(fh, limit=_HEADER_LIMIT))
+        except (OSError, ValueError):
+            continue
+        if isinstance(header, dict) and is_snapshot(header) and snapshot_store(path, header).resolve() == target:
+            yield _owner(store_dir, path)
+
+
+def _rebuild(store_dir: Path, key: bytes, index: Dict[str, Any] | None) -> Dict[str, Any]:
+    """Recount references from the manifests of every snapshot that still exists."""
+    names = {name for name in (index or {}).get("owners", {}) if (store_dir / name).is_file()}
+    names.update(_discover(store_dir))
+    fresh: Dict[str, Any] = {"version": 1, "owners": {}, "refs": {}}
+    for name in sorted(names):
+        path = store_dir / name
+        try:
+            refs, manifest = snapshot_refs(path, key)
+        except Exception as exc:
+            raise ValueError(f"cannot read snapshot {path.name}; refusing to rebuild the chunk index") from exc
+        _count(fresh, refs, +1)
+        parent = manifest.get("parent")
+        fresh["owners"][name] = {"parent": _owner(store_dir, path.with_name(parent)) if parent else None}
+    return fresh
+
+
+def _open_index(store_dir: Path, key: bytes) -> Dict[str, Any]:
+    try:
+        with open(store_dir / INDEX_NAME, encoding="utf-8") as fh:
+            return dict(json.load(fh))
+    except FileNotFoundError:
+        if (store_dir / SHARED_NAME).exists():
+            # a rebuild would only see the snapshots next to the store and drop everyone else's chunks
+            raise ValueError(
+                f"{store_dir.name} is shared with snapshots elsewhere and its {INDEX_NAME} is missing; "
+                "refusing to rebuild the chunk index"
+            ) from None
+        return _rebuild(store_dir, key, None)
+
+
+def _detach_children(store_dir: Path, index: Dict[str, Any], name: str, key: bytes) -> None:
+    """Rewrite snapshots stored as a delta against ``name`` with full manifests."""
+    for child, info in index["owners"].items():
+        if info.get("parent") != name:
+            continue
+        path = store_dir / child
+        refs, _ = snapshot_refs(path, key)
+        header, manifest = _read_snapshot(path, key)
+        manifest.update({"parent": None, "depth": 0, "ops": [["add", [r.hex() for r in refs]]]})
+        _write_zsnap(path, header, manifest, key)
+        info["parent"] = None
+
+
+def remove_snapshot(path: Path, key: bytes) -> None:
+    """Delete a snapshot and drop its chunk references.
+
+    Snapshots stored as a delta against it get full manifests first. The
+    chunks themselves stay until the next :func:`gc`.
+    """
+    store_dir = snapshot_store(path)
+    with _lock(store_dir):
+        index = _open_index(store_dir, key)
+        name = _owner(store_dir, path)
+        _detach_children(store_dir, index, name, key)
+        _count(index, snapshot_refs(path, key)[0], -1)
+        path.unlink()
+        index["owners"].pop(name, None)
+        _save_index(store_dir, index)
+
+
+def gc(store_dir: Path, key: bytes, grace: float | None = None) -> Dict[str, int]:
+    """Delete chunks no snapshot references; return counts of what was kept and freed.
+
+    If a snapshot was deleted by hand (its references are unknown) the
+    index is first rebuilt from the remaining manifests, which needs
+    ``key``. Unreferenced chunks younger than ``grace`` seconds (default
+    ``GC_GRACE``) are kept: a concurrent writer may still be registering them.
+    A shared store that lost its index raises ``ValueError``: its owners
+    outside the store's directory cannot be found again.
+    """
+    cutoff = time.time() - (GC_GRACE if grace is None else grace)
+    stats = {"snapshots": 0, "chunks": 0, "removed": 0, "freed_bytes": 0}
+    with _lock(store_dir):
+        index = _open_index(store_dir, key)
+        if any(not (store_dir / name).is_file() for name in index["owners"]):
+            index = _rebuild(store_dir, key, index)
+        live = index["refs"]
+        for sub in sorted(store_dir.iterdir()):
+            if not sub.is_dir() or len(sub.name) != 2:
+                continue
+            for chunk in sub.iterdir():
+                st = chunk.stat()
+                if chunk.name in live or st.st_mtime > cutoff:
+                    stats["chunks"] += not chunk.name.endswith(".tmp")
+                    continue
+                chunk.unlink()
+                stats["removed"] += 1
+                stats["freed_bytes"] += st.st_size
+            if not any(sub.iterdir()):
+                sub.rmdir()
+        _save_index(store_dir, index)
+        stats["snapshots"] = len(index["owners"])
+    return stats
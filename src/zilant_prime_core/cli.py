@@ -9,10 +9,11 @@ import os
 import sys
 import time
 import yaml  # type: ignore
+from datetime import datetime
 from pathlib import Path
-from typing import Any, NoReturn, cast
+from typing import IO, Any, Iterator, NoReturn, cast
 
-from container import pack_file, unpack_file
+from container import pack_file, pack_many, unpack_file, unpack_many
 from crypto_core import hash_sha3
 from zilant_prime_core.crypto.password_hash import hash_password, verify_password
 from zilant_prime_core.metrics import metrics
@@ -353,6 +354,123 @@ def cmd_unpack(
     _emit(ctx, {"path": str(out)})
 
 
+# ────────────────────────────── batch ──────────────────────────────
+def _batch_sources(sources: tuple[Path, ...], from_file: IO[str] | None) -> Iterator[Path]:
+    yield from sources
+    if from_file is not None:
+        for line in from_file:
+            if line.strip():
+                yield Path(line.rstrip("\n"))
+
+
+def _run_batch(name: str, results: Iterator[dict[str, Any]]) -> None:
+    """Stream ``results`` as JSON lines, then a summary line; exit 1 on any failure."""
+    ok = failed = 0
+    start = time.perf_counter()
+    with metrics.track(name):
+        for res in results:
+            if res["ok"]:
+                ok += 1
+            else:
+                failed += 1
+            click.echo(json.dumps(res))
+    elapsed = time.perf_counter() - start
+    metrics.batch_duration_seconds.labels(name).observe(elapsed)
+    metrics.batch_files_total.labels(name, "ok").inc(ok)
+    metrics.batch_files_total.labels(name, "failed").inc(failed)
+    metrics.files_processed_total.inc(ok)
+    click.echo(json.dumps({"summary": {"ok": ok, "failed": failed, "seconds": round(elapsed, 3)}}))
+    if failed:
+        raise SystemExit(1)
+
+
+@cli.command("pack-batch")
+@click.argument("sources", nargs=-1, type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--from-file", type=click.File("r"), help='File with one SOURCE per line ("-" for stdin)')
+@click.option("-d", "--out-dir", metavar="DIR", type=click.Path(file_okay=False, path_type=Path))
+@click.option("-p", "--password", metavar="PWD|-", help='Password or "-" to prompt')
+@click.option("--pq-pub", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--workers", type=int, default=0, show_default=True, help="Worker processes (0 = all CPUs)")
+@click.option("--overwrite/--no-overwrite", default=False, show_default=True)
+@metrics.record_cli("pack_batch")
+def cmd_pack_batch(
+    sources: tuple[Path, ...],
+    from_file: IO[str] | None,
+    out_dir: Path | None,
+    password: str | None,
+    pq_pub: Path | None,
+    workers: int,
+    overwrite: bool,
+) -> None:
+    """Pack many files with one derived key; print one JSON result per line."""
+    from zilant_prime_core.crypto.kdf import derive_key, generate_salt
+
+    pwd = _ask_pwd(confirm=True) if password == "-" else password or _abort("Missing password")
+    salt = generate_salt()
+    key = derive_key(pwd, salt)
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = (
+        (src, (out_dir / src.name if out_dir else src).with_suffix(".zil"))
+        for src in _batch_sources(sources, from_file)
+    )
+    results = pack_many(
+        jobs,
+        key,
+        pq_pub.read_bytes() if pq_pub else None,
+        extra_meta={"kdf_salt_hex": salt.hex()},
+        workers=workers,
+        overwrite=overwrite,
+    )
+    _run_batch("pack_batch", results)
+
+
+@cli.command("unpack-batch")
+@click.argument("containers", nargs=-1, type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--from-file", type=click.File("r"), help='File with one CONTAINER per line ("-" for stdin)')
+@click.option("-d", "--out-dir", metavar="DIR", type=click.Path(file_okay=False, path_type=Path))
+@click.option("-p", "--password", metavar="PWD|-", help='Password or "-" to prompt')
+@click.option("--pq-sk", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--workers", type=int, default=0, show_default=True, help="Worker processes (0 = all CPUs)")
+@click.option("--overwrite/--no-overwrite", default=False, show_default=True)
+@metrics.record_cli("unpack_batch")
+def cmd_unpack_batch(
+    containers: tuple[Path, ...],
+    from_file: IO[str] | None,
+    out_dir: Path | None,
+    password: str | None,
+    pq_sk: Path | None,
+    workers: int,
+    overwrite: bool,
+) -> None:
+    """Unpack containers made by ``pack-batch``; print one JSON result per line."""
+    from container import get_metadata
+    from zilant_prime_core.crypto.kdf import derive_key
+
+    pwd = _ask_pwd() if password == "-" else password or _abort("Missing password")
+    keys: dict[str, bytes] = {}
+
+    def key_for(path: Path) -> bytes:
+        salt_hex = get_metadata(path).get("kdf_salt_hex")
+        if not salt_hex:
+            raise ValueError("container has no kdf_salt_hex (not made by pack-batch)")
+        if salt_hex not in keys:
+            keys[salt_hex] = derive_key(pwd, bytes.fromhex(salt_hex))
+        return keys[salt_hex]
+
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = ((cont, (out_dir or cont.parent) / cont.stem) for cont in _batch_sources(containers, from_file))
+    results = unpack_many(
+        jobs,
+        key_for,
+        pq_sk.read_bytes() if pq_sk else None,
+        workers=workers,
+        overwrite=overwrite,
+    )
+    _run_batch("unpack_batch", results)
+
+
 # ─────────────────────── misc utility commands ───────────────────────
 @cli.command("fingerprint")
 def cmd_fingerprint() -> None:
@@ -434,6 +552,13 @@ def cmd_gen_sig_keys(out_pk: Path, out_sk: Path) -> None:
 @click.option("--decoy-profile", type=str, help="Mount predefined decoy profile")
 @click.option("--remote", type=str, help="Remote path user@host:/path/container")
 @click.option("--force", is_flag=True, help="Ignore anti-rollback check")
+@click.option("--lazy", is_flag=True, help="Decrypt on demand instead of unpacking at mount")
+@click.option(
+    "--checkpoint",
+    type=click.FloatRange(min=0, min_open=True),
+    metavar="SECONDS",
+    help="Write changes back to the container in the background every SECONDS",
+)
 def cmd_mount(
     container: Path,
     mountpoint: Path,
@@ -441,8 +566,10 @@ def cmd_mount(
     decoy_profile: str | None,
     remote: str | None,
     force: bool,
+    lazy: bool,
+    checkpoint: float | None,
 ) -> None:
-    """Mount CONTAINER at MOUNTPOINT via FUSE."""
+    """Mount CONTAINER at MOUNTPOINT via FUSE; runs until `zilant umount MOUNTPOINT`."""
     pwd = _ask_pwd() if password == "-" else password or _ask_pwd()
     try:
         mount_fs(
@@ -452,6 +579,8 @@ def cmd_mount(
             decoy_profile=decoy_profile,
             remote=remote,
             force=force,
+            lazy=lazy,
+            checkpoint_interval=checkpoint,
         )
     except Exception as exc:  # pragma: no cover - runtime errors
         click.echo(f"Mount error: {exc}", err=True)
@@ -471,25 +600,115 @@ def cmd_umount_cli(mountpoint: Path) -> None:
 
 @cli.command("bench")
 @click.option("--fs", "bench_fs", is_flag=True, help="Benchmark ZilantFS")
-def cmd_bench(bench_fs: bool) -> None:
+@click.option("--suite", is_flag=True, help="Run the benchmark suite")
+@click.option("--quick", is_flag=True, help="Skip the largest suite cases")
+@click.option("-k", "--filter", "pattern", default="*", show_default=True, help="fnmatch pattern of case names")
+@click.option("--repeat", type=click.IntRange(min=1), default=5, show_default=True)
+@click.option("--save", type=click.Path(dir_okay=False, path_type=Path), help="Write results as JSON")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Compare against saved results; exit 1 on regressions",
+)
+@click.option("--threshold", type=float, default=None, metavar="FRACTION", help="Allowed slowdown [0.10]")
+def cmd_bench(
+    bench_fs: bool,
+    suite: bool,
+    quick: bool,
+    pattern: str,
+    repeat: int,
+    save: Path | None,
+    baseline: Path | None,
+    threshold: float | None,
+) -> None:
     """Run benchmarks."""
     if bench_fs:
         from zilant_prime_core.bench_zfs import bench_fs as run
 
         mb_s = run()
         click.echo(f"{mb_s:.2f} MB/s")
+    if not suite:
+        return
+    from zilant_prime_core.bench_suite import DEFAULT_THRESHOLD, compare, run_suite
+
+    def show(name: str, res: dict[str, Any]) -> None:
+        if "skipped" in res:
+            click.echo(f"{name:<36} skipped: {res['skipped']}")
+            return
+        rate = f"{res['mb_s']:10.1f} MB/s" if "mb_s" in res else f"{res['ops_s']:10.1f} op/s"
+        click.echo(f"{name:<36} {res['seconds'] * 1000:10.2f} ms {rate}")
+
+    results = run_suite(pattern, quick=quick, repeat=repeat, progress=show)
+    if save is not None:
+        save.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    if baseline is not None:
+        regressions = compare(results, json.loads(baseline.read_text(encoding="utf-8")), threshold or DEFAULT_THRESHOLD)
+        for reg in regressions:
+            click.echo(
+                f"REGRESSION {reg['case']}: {reg['baseline'] * 1000:.2f} ms -> {reg['current'] * 1000:.2f} ms "
+                f"(+{reg['change']:.0%})",
+                err=True,
+            )
+        if regressions:
+            sys.exit(1)
 
 
 @cli.command("snapshot")
 @click.argument("container", type=click.Path(exists=True, dir_okay=False, path_type=Path))
 @click.option("--label", required=True, type=str)
+@click.option(
+    "--store",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Shared chunk store (deduplicates across containers)",
+)
 @click.password_option("--password", prompt=True, confirmation_prompt=False)
-def cmd_snapshot(container: Path, label: str, password: str) -> None:
+def cmd_snapshot(container: Path, label: str, store: Path | None, password: str) -> None:
     """Create snapshot of container."""
-    out = snapshot_container(container, password.encode(), label)
+    out = snapshot_container(container, password.encode(), label, store=store)
     click.echo(str(out))
 
 
+@cli.group()
+def store() -> None:
+    """Deduplicating chunk store commands."""
+
+
+@store.command("gc")
+@click.argument("store_dir", type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option("--grace", type=float, default=None, metavar="SECONDS", help="Keep younger unreferenced chunks")
+@click.password_option("--password", prompt=True, confirmation_prompt=False)
+@click.pass_context
+def cmd_store_gc(ctx: click.Context, store_dir: Path, grace: float | None, password: str) -> None:
+    """Delete chunks that no snapshot references."""
+    from zilant_prime_core.chunkstore import gc
+
+    try:
+        stats = gc(store_dir, password.encode(), grace)
+    except ValueError as exc:
+        _abort(str(exc))
+    if ctx.obj and ctx.obj.get("output") in ("json", "yaml"):
+        _emit(ctx, dict(stats))
+    else:
+        click.echo(
+            f"removed {stats['removed']} chunks ({stats['freed_bytes']} bytes), "
+            f"kept {stats['chunks']} for {stats['snapshots']} snapshots"
+        )
+
+
+@store.command("rm")
+@click.argument("snapshot", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.password_option("--password", prompt=True, confirmation_prompt=False)
+def cmd_store_rm(snapshot: Path, password: str) -> None:
+    """Remove a snapshot; its chunks are freed by the next ``store gc``."""
+    from zilant_prime_core.chunkstore import remove_snapshot
+
+    try:
+        remove_snapshot(snapshot, password.encode())
+    except ValueError as exc:
+        _abort(str(exc))
+    click.echo(f"removed {snapshot.name}")
+
+
 @cli.command("diff")
 @click.argument("snap_a", type=click.Path(exists=True, dir_okay=False, path_type=Path))
 @click.argument("snap_b", type=click.Path(exists=True, dir_okay=False, path_type=Path))
@@ -543,13 +762,15 @@ def audit() -> None:
 
 
 @audit.command("verify")
+@click.option("--full", is_flag=True, help="Verify from the first line, not from the last signed checkpoint")
 @click.pass_context
-def cmd_audit_verify(ctx: click.Context) -> None:
+def cmd_audit_verify(ctx: click.Context, full: bool) -> None:
     """Verify the integrity of the audit log."""
+    from audit_ledger import verify_ledger
     from key_lifecycle import AuditLog
 
     log = AuditLog()
-    ok = log.verify_log()
+    ok = log.verify_log(full=full) and verify_ledger(full=full)
     if not ok:
         _emit(ctx, {"valid": False})
         if (ctx.obj or {}).get("output") == "text":
@@ -591,18 +812,59 @@ def ledger() -> None:
     """Audit ledger commands."""
 
 
+def _parse_when(value: str) -> float:
+    """UNIX time or an ISO 8601 date/time (local time when no offset is given)."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise click.BadParameter(f"not a date or UNIX time: {value}") from None
+
+
 @ledger.command("show")
-@click.option("--last", "last_n", type=int, default=10, show_default=True, metavar="N")
-def cmd_ledger_show(last_n: int) -> None:
-    """Display last N ledger entries."""
-    path = Path("audit-ledger.jsonl")
-    if not path.exists():
-        return
-    lines = path.read_text(encoding="utf-8").splitlines()[-last_n:]
-    for line in lines:
+@click.option("--last", "last_n", type=int, default=10, show_default=True, metavar="N", help="0 shows every match")
+@click.option("--since", metavar="WHEN", help="Only entries at or after WHEN (ISO date/time or UNIX time)")
+@click.option("--action", metavar="NAME", help="Only entries with this action")
+@click.option("--file", "file_", metavar="PATH", help="Only entries about this file (params.file)")
+def cmd_ledger_show(last_n: int, since: str | None, action: str | None, file_: str | None) -> None:
+    """Display last N ledger entries, across rotated segments, using the ledger index."""
+    from audit_ledger import query
+
+    for line in query(since=_parse_when(since) if since else None, action=action, file=file_, last=last_n or None):
         click.echo(line)
 
 
+@ledger.command("verify")
+@click.option("--full", is_flag=True, help="Verify from the first entry, not from the last checkpoint")
+@click.pass_context
+def cmd_ledger_verify(ctx: click.Context, full: bool) -> None:
+    """Verify the ledger hash chain and its checkpoints."""
+    from audit_ledger import verify_ledger
+
+    ok = verify_ledger(full=full)
+    _emit(ctx, {"valid": ok})
+    if not ok:
+        if (ctx.obj or {}).get("output") == "text":
+            click.echo("Audit ledger corrupted", err=True)
+        raise SystemExit(1)
+
+
+@ledger.command("prove")
+@click.argument("seq", type=int)
+def cmd_ledger_prove(seq: int) -> None:
+    """Print the inclusion proof of ledger entry SEQ (JSON)."""
+    from audit_ledger import prove_inclusion
+
+    try:
+        proof = prove_inclusion(seq)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(json.dumps(proof))
+
+
 @cli.group()
 def attest() -> None:
     """TPM attestation helpers."""
@@ -650,6 +912,7 @@ def cmd_show_metadata(container: Path) -> None:
 def cmd_heal_scan(path: Path, auto: bool, recursive: bool, report: str) -> None:
     from tabulate import tabulate  # type: ignore
 
+    from audit_ledger import batch as audit_batch
     from container import get_metadata, verify_integrity
     from zilant_prime_core.self_heal import heal_container
 
@@ -662,18 +925,19 @@ def cmd_heal_scan(path: Path, auto: bool, recursive: bool, report: str) -> None:
     rows = []
     healed = False
     failed = False
-    for p in paths:
-        status = "ok" if verify_integrity(p) else "broken"
-        if auto and status == "broken":
-            seed = cast(bytes, hash_sha3(p.read_bytes()))
-            if heal_container(p, b"k" * 32, rng_seed=seed):
-                meta = get_metadata(p)
-                click.echo(f"new-key saved to {p.name}: {meta.get('recovery_key_hex')}")
-                status = "healed"
-                healed = True
-            else:
-                failed = True
-        rows.append({"file": p.name, "status": status})
+    with audit_batch():  # tamper/heal events of the whole scan go to the ledger in group commits
+        for p in paths:
+            status = "ok" if verify_integrity(p) else "broken"
+            if auto and status == "broken":
+                seed = cast(bytes, hash_sha3(p.read_bytes()))
+                if heal_container(p, b"k" * 32, rng_seed=seed):
+                    meta = get_metadata(p)
+                    click.echo(f"new-key saved to {p.name}: {meta.get('recovery_key_hex')}")
+                    status = "healed"
+                    healed = True
+                else:
+                    failed = True
+            rows.append({"file": p.name, "status": status})
 
     if report == "json":
         click.echo(json.dumps(rows))
@@ -727,6 +991,7 @@ def install_completion(ctx: click.Context, shell: str) -> None:
 from zilant_prime_core.cli_commands import (
     derive_key_cmd,
     hpke_cmd,
+    kdf_agent_cmd,
     pq_genkeypair_cmd,
     pw_hash_cmd,
     pw_verify_cmd,
@@ -735,6 +1000,7 @@ from zilant_prime_core.cli_commands import (
 )
 
 cli.add_command(derive_key_cmd)
+cli.add_command(kdf_agent_cmd)
 cli.add_command(pw_hash_cmd)
 cli.add_command(pw_verify_cmd)
 cli.add_command(pq_genkeypair_cmd)
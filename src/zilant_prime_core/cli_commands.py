@@ -19,6 +19,7 @@ from zilant_prime_core.metrics import metrics
 
 __all__: Final = [
     "derive_key_cmd",
+    "kdf_agent_cmd",
     "pw_hash_cmd",
     "pw_verify_cmd",
     "pq_genkeypair_cmd",
@@ -60,6 +61,30 @@ def derive_key_cmd(mem_cost: int, time_cost: int, password: str, salt: str) -> N
     click.echo(base64.b64encode(key).decode())
 
 
+# ─────────────────── kdf-agent ───────────────────
+@click.command("kdf-agent")
+@click.option(
+    "--socket",
+    "sock_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=lambda: Path(os.environ.get("XDG_RUNTIME_DIR", "/tmp")) / f"zilant-kdf-{os.getuid()}.sock",
+    show_default="$XDG_RUNTIME_DIR/zilant-kdf-UID.sock",
+)
+@click.option("--ttl", type=float, default=900.0, show_default=True, help="Seconds a derived key is kept")
+@click.option("--max-entries", type=int, default=256, show_default=True)
+def kdf_agent_cmd(sock_path: Path, ttl: float, max_entries: int) -> None:
+    """Run a local agent that caches derived keys for this user's sessions."""
+    from zilant_prime_core.crypto.kdf_cache import AGENT_ENV, KDFAgent, KeyCache
+
+    agent = KDFAgent(sock_path, KeyCache(max_entries, ttl))
+    agent.bind()
+    click.echo(f"{AGENT_ENV}={sock_path}; export {AGENT_ENV};")
+    try:
+        agent.serve_forever()
+    except KeyboardInterrupt:  # pragma: no cover - interactive
+        pass
+
+
 # ─────────────────── pw‑hash ───────────────────
 @click.command("pw-hash")
 @click.argument("password")
@@ -174,7 +199,7 @@ def stream_cmd() -> None:
 @click.argument("src", type=click.Path(exists=True, dir_okay=False, path_type=Path))
 @click.argument("dst", type=click.Path(dir_okay=False, path_type=Path))
 @click.option("--key", type=click.Path(exists=True, dir_okay=False, path_type=Path), required=True)
-@click.option("--threads", type=int, default=0, show_default=True)
+@click.option("--threads", type=int, default=0, show_default=True, help="Worker threads (0 = all CPUs)")
 @click.option("--progress/--no-progress", default=False, show_default=True)
 @click.pass_context
 @metrics.record_cli("stream_pack")
@@ -190,7 +215,7 @@ def stream_pack_cmd(ctx: click.Context, src: Path, dst: Path, key: Path, threads
 @click.argument("src", type=click.Path(exists=True, dir_okay=False, path_type=Path))
 @click.option("--out-dir", type=click.Path(file_okay=False, path_type=Path), default=".")
 @click.option("--key", type=click.Path(exists=True, dir_okay=False, path_type=Path), required=True)
-@click.option("--threads", type=int, default=0, show_default=True)
+@click.option("--threads", type=int, default=0, show_default=True, help="Worker threads (0 = all CPUs)")
 @click.option("--progress/--no-progress", default=False, show_default=True)
 @click.option("--verify-only", is_flag=True, default=False)
 @click.option("--offset", type=int, default=0, show_default=True, help="Skip first OFFSET bytes of ciphertext")
@@ -220,6 +245,7 @@ def stream_unpack_cmd(
         verify_only=verify_only,
         progress=progress,
         offset=offset,
+        threads=threads,
     )
     if not verify_only:
         _emit(ctx, {"path": str(out)})
@@ -16,6 +16,7 @@ import os
 from typing import cast
 
 from zilant_prime_core.crypto.g_new import G_new
+from zilant_prime_core.crypto.kdf_cache import cached_derive
 from zilant_prime_core.utils.constants import DEFAULT_KEY_LENGTH, DEFAULT_SALT_LENGTH
 
 DEFAULT_MEMORY_MIN = 2**15  # 32 MiB
@@ -36,16 +37,27 @@ def derive_key(password: str | bytes, salt: bytes, key_length: int = DEFAULT_KEY
         raise ValueError("Salt must be bytes.")
     if not isinstance(key_length, int) or key_length <= 0:
         raise ValueError("Key length must be a positive integer.")
-    return cast(
-        bytes,
-        a2.hash_secret_raw(
-            secret=password,
-            salt=salt,
-            time_cost=2,
-            memory_cost=DEFAULT_MEMORY_MIN,
-            parallelism=1,
-            hash_len=key_length,
-            type=a2.Type.ID,
+    return _argon2id(password, salt, 2, DEFAULT_MEMORY_MIN, key_length)
+
+
+def _argon2id(password: bytes, salt: bytes, time_cost: int, memory_cost: int, key_length: int) -> bytes:
+    params = {"t": time_cost, "m": memory_cost, "p": 1, "len": key_length}
+    return cached_derive(
+        "argon2id",
+        password,
+        salt,
+        params,
+        lambda: cast(
+            bytes,
+            a2.hash_secret_raw(
+                secret=password,
+                salt=salt,
+                time_cost=time_cost,
+                memory_cost=memory_cost,
+                parallelism=1,
+                hash_len=key_length,
+                type=a2.Type.ID,
+            ),
         ),
     )
 
@@ -85,15 +97,4 @@ def derive_key_dynamic(
     if isinstance(password, str):
         password = password.encode("utf-8")
 
-    return cast(
-        bytes,
-        a2.hash_secret_raw(
-            secret=password,
-            salt=salt,
-            time_cost=time_cost,
-            memory_cost=memory_cost,
-            parallelism=1,
-            hash_len=key_length,
-            type=a2.Type.ID,
-        ),
-    )
+    return _argon2id(password, salt, time_cost, memory_cost, key_length)
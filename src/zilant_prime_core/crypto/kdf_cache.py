@@ -0,0 +1,313 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+"""Cache for password-derived keys, in-process or shared through a local agent.
+
+Argon2id is deliberately expensive, so re-deriving the same key for every
+container opened with one password dominates batch work. Keys are looked up
+by a keyed BLAKE2b of (kdf name, password, salt, params) with a secret that
+never leaves the cache owner, values live in wipeable ``bytearray`` buffers
+and are dropped after ``ttl`` seconds or on LRU eviction.
+
+The cache is off unless enabled with :func:`enable_key_cache` or the
+``ZILANT_KDF_CACHE=1`` environment variable. When ``ZILANT_KDF_AGENT_SOCK``
+points to a running :class:`KDFAgent`, lookups go to the agent first, so
+separate processes in a session share derived keys (ssh-agent style).
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from utils.secure_memory import wipe_bytes
+
+__all__ = [
+    "AGENT_ENV",
+    "CACHE_ENV",
+    "KDFAgent",
+    "KeyCache",
+    "cached_derive",
+    "disable_key_cache",
+    "enable_key_cache",
+    "get_key_cache",
+]
+
+AGENT_ENV = "ZILANT_KDF_AGENT_SOCK"
+CACHE_ENV = "ZILANT_KDF_CACHE"
+DEFAULT_TTL = 15 * 60.0
+DEFAULT_MAX_ENTRIES = 256
+_AGENT_TIMEOUT = 2.0
+_MAX_REQUEST = 64 * 1024
+
+
+class KeyCache:
+    """Thread-safe LRU of derived keys with a time-to-live."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._secret = os.urandom(32)
+        self._entries: OrderedDict[bytes, tuple[float, bytearray]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _slot(self, name: str, password: bytes, salt: bytes, params: dict[str, Any]) -> bytes:
+        h = hashlib.blake2b(key=self._secret, digest_size=32, person=b"zil-kdf-cache")
+        encoded_params = json.dumps(params, sort_keys=True).encode("utf-8")
+        for part in (name.encode("utf-8"), bytes(password), bytes(salt), encoded_params):
+            h.update(len(part).to_bytes(4, "big"))
+            h.update(part)
+        return h.digest()
+
+    def get(self, name: str, password: bytes, salt: bytes, params: dict[str, Any]) -> bytes | None:
+        slot = self._slot(name, password, salt, params)
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= self._clock():
+                del self._entries[slot]
+                wipe_bytes(value)
+                return None
+            self._entries.move_to_end(slot)
+            return bytes(value)
+
+    def put(self, name: str, password: bytes, salt: bytes, params: dict[str, Any], key: bytes) -> None:
+        slot = self._slot(name, password, salt, params)
+        with self._lock:
+            old = self._entries.pop(slot, None)
+            if old is not None:
+                wipe_bytes(old[1])
+            self._entries[slot] = (self._clock() + self.ttl, bytearray(key))
+            while len(self._entries) > self.max_entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                wipe_bytes(evicted)
+
+    def purge_expired(self) -> int:
+        """Wipe and drop expired entries; return how many were removed."""
+        now = self._clock()
+        with self._lock:
+            stale = [slot for slot, (expires, _) in self._entries.items() if expires <= now]
+            for slot in stale:
+                wipe_bytes(self._entries.pop(slot)[1])
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, value in self._entries.values():
+                wipe_bytes(value)
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: KeyCache | None = None
+
+
+def enable_key_cache(max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL) -> KeyCache:
+    """Install a fresh in-process cache, wiping any previous one."""
+    global _cache
+    disable_key_cache()
+    _cache = KeyCache(max_entries, ttl)
+    return _cache
+
+
+def disable_key_cache() -> None:
+    global _cache
+    if _cache is not None:
+        _cache.clear()
+    _cache = None
+
+
+def get_key_cache() -> KeyCache | None:
+    """Return the active in-process cache, creating it if ``ZILANT_KDF_CACHE`` asks for one."""
+    if _cache is None and os.environ.get(CACHE_ENV, "").lower() in ("1", "true", "yes"):
+        return enable_key_cache()
+    return _cache
+
+
+# ───────────────────────────── agent ─────────────────────────────
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _agent_request(path: str, request: dict[str, Any]) -> dict[str, Any]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(_AGENT_TIMEOUT)
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as fh:
+            line = fh.readline(_MAX_REQUEST)
+    reply = json.loads(line)
+    if not isinstance(reply, dict) or "error" in reply:
+        raise OSError(f"kdf agent error: {reply}")
+    return reply
+
+
+def _agent_body(name: str, password: bytes, salt: bytes, params: dict[str, Any]) -> dict[str, Any]:
+    return {"name": name, "password": _b64(password), "salt": _b64(salt), "params": params}
+
+
+def cached_derive(
+    name: str,
+    password: bytes,
+    salt: bytes,
+    params: dict[str, Any],
+    derive: Callable[[], bytes],
+) -> bytes:
+    """Return the key for (name, password, salt, params), calling ``derive`` only on a miss.
+
+    ``params`` must hold every cost parameter that affects the output. An
+    unreachable agent is ignored and the key is derived locally.
+    """
+    agent = os.environ.get(AGENT_ENV)
+    cache = get_key_cache()
+    if agent is None and cache is None:
+        return derive()
+
+    password = bytes(password)
+    salt = bytes(salt)
+    if agent:
+        try:
+            reply = _agent_request(agent, {"op": "get", **_agent_body(name, password, salt, params)})
+            if reply.get("key"):
+                return base64.b64decode(reply["key"])
+        except (OSError, ValueError):
+            agent = None
+    if cache is not None:
+        hit = cache.get(name, password, salt, params)
+        if hit is not None:
+            return hit
+
+    key = derive()
+    if cache is not None:
+        cache.put(name, password, salt, params, key)
+    if agent:
+        try:
+            _agent_request(agent, {"op": "put", "key": _b64(key), **_agent_body(name, password, salt, params)})
+        except (OSError, ValueError):
+            pass
+    return key
+
+
+def _peer_uid(sock: socket.socket) -> int | None:
+    if not hasattr(socket, "SO_PEERCRED"):  # pragma: no cover - non-Linux
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return int(struct.unpack("3i", creds)[1])
+
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    server: _AgentServer
+
+    def handle(self) -> None:
+        uid = _peer_uid(self.connection)
+        if uid is not None and uid != os.getuid():
+            self._reply({"error": "forbidden"})
+            return
+        try:
+            req = json.loads(self.rfile.readline(_MAX_REQUEST))
+            reply = self.server.agent.dispatch(req)
+        except Exception as exc:
+            reply = {"error": type(exc).__name__}
+        self._reply(reply)
+
+    def _reply(self, reply: dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+
+class _AgentServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    agent: KDFAgent
+
+
+class KDFAgent:
+    """Serve a :class:`KeyCache` to processes of the same user over a UNIX socket."""
+
+    def __init__(self, path: str | os.PathLike[str], cache: KeyCache | None = None) -> None:
+        self.path = os.fspath(path)
+        self.cache = cache or KeyCache()
+        self._server: _AgentServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def dispatch(self, req: dict[str, Any]) -> dict[str, Any]:
+        op = req.get("op")
+        if op == "clear":
+            self.cache.clear()
+            return {"ok": True}
+        if op not in ("get", "put"):
+            return {"error": "unknown op"}
+        args = (
+            str(req["name"]),
+            base64.b64decode(req["password"]),
+            base64.b64decode(req["salt"]),
+            dict(req.get("params") or {}),
+        )
+        if op == "get":
+            key = self.cache.get(*args)
+            return {"key": _b64(key) if key is not None else None}
+        self.cache.put(*args, base64.b64decode(req["key"]))
+        return {"ok": True}
+
+    def bind(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _AgentServer(self.path, _AgentHandler)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.path, 0o600)
+        self._server.agent = self
+
+    def serve_forever(self) -> None:
+        if self._server is None:
+            self.bind()
+        assert self._server is not None
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self.close()
+
+    def start(self) -> None:
+        """Serve from a daemon thread."""
+        self.bind()
+        self._thread = threading.Thread(target=self.serve_forever, name="zil-kdf-agent", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+        self.cache.clear()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -53,6 +53,13 @@ def derive_key_argon2id(
 
 def derive_key_double(password: bytes, salt: bytes) -> bytes:
     """Branchless double Argon2id derivation."""
+    from zilant_prime_core.crypto.kdf_cache import cached_derive
+
+    params = {"t": 4, "m": 512 * 1024, "p": 1, "len": 32}
+    return cached_derive("argon2id-double", password, salt, params, lambda: _derive_key_double(password, salt))
+
+
+def _derive_key_double(password: bytes, salt: bytes) -> bytes:
     real = derive_key_argon2id(password, salt)
     from cryptography.hazmat.primitives import hashes
     from cryptography.hazmat.primitives.kdf.hkdf import HKDF
@@ -0,0 +1,223 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+"""Encrypted delta records appended to a container.
+
+Writing back a few changed files should not re-encrypt a whole volume. A
+delta record is appended after the container payload instead::
+
+    header \\n\\n payload | ZDLT u32 len {json} sealed chunks | ZDLT … |
+
+The header field ``payload_len`` marks where the records start and
+``deltas`` is the commit pointer: a record only counts once the header
+has been rewritten (in place) to include it, so a crash mid-append leaves
+the container as it was and the torn tail is cut off by the next append.
+The pointer is authenticated by ``deltas_mac``, an HMAC over it and the
+frames of the committed records, so lowering ``deltas`` (even to zero, or
+dropping it) to hide the latest changes is detected. Each record is chunked like ZILANT v2 and
+every chunk is bound to the container, the record number, its index and
+the final-chunk flag.
+
+What a record contains is up to the caller (ZilantFS stores a tar of the
+changed files); see :func:`append_delta` and :func:`iter_deltas`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import os
+import struct
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List
+
+from container import rewrite_header
+from utils.file_utils import HEADER_LIMIT, read_header
+
+__all__ = [
+    "DELTA_MAGIC",
+    "DELTA_MAX",
+    "append_delta",
+    "delta_count",
+    "has_delta_log",
+    "is_appendable",
+    "iter_deltas",
+]
+
+DELTA_MAGIC = b"ZDLT"
+DELTA_CHUNK = 1024 * 1024
+# after this many records a write-back repacks the container instead
+DELTA_MAX = 32
+
+_FRAME = struct.Struct(">4sI")
+_TAG = 16
+_APPENDABLE = ("ZILANT", "ZSTR")
+_COMMIT_FIELDS = ("payload_len", "deltas", "deltas_mac")
+
+
+def is_appendable(meta: Dict[str, Any]) -> bool:
+    return meta.get("magic") in _APPENDABLE
+
+
+def delta_count(meta: Dict[str, Any]) -> int:
+    return int(meta.get("deltas", 0))
+
+
+def has_delta_log(meta: Dict[str, Any]) -> bool:
+    """Whether the header carries a commit pointer, even one claiming zero records.
+
+    Readers must then go through :func:`iter_deltas`, which authenticates it.
+    """
+    return any(field in meta for field in _COMMIT_FIELDS)
+
+
+def _base_id(meta: Dict[str, Any]) -> bytes:
+    """Identify the payload the deltas apply to, so records cannot be moved between containers."""
+    ident = meta.get("checksum_hex") or meta.get("root_tag") or ""
+    return hashlib.sha256(f"{meta.get('magic')}:{ident}:{meta.get('nonce_hex', '')}".encode()).digest()
+
+
+def _aead(key: bytes) -> ChaCha20Poly1305:
+    return ChaCha20Poly1305(hmac.new(bytes(key), b"zilant-delta-records", hashlib.sha256).digest())
+
+
+def _aad(base: bytes, seq: int, idx: int, last: bool) -> bytes:
+    return base + struct.pack(">QQB", seq, idx, 1 if last else 0)
+
+
+def _commit_mac(key: bytes, base: bytes, payload_len: int, frames: List[bytes]) -> str:
+    """MAC of the commit pointer: the record count and the frame of every committed record."""
+    mac = hmac.new(hmac.new(bytes(key), b"zilant-delta-commit", hashlib.sha256).digest(), base, hashlib.sha256)
+    mac.update(struct.pack(">QQ", payload_len, len(frames)))
+    for frame in frames:
+        mac.update(struct.pack(">I", len(frame)) + frame)
+    return mac.hexdigest()
+
+
+def _check_commit(meta: Dict[str, Any], key: bytes, base: bytes, payload_len: int, frames: List[bytes]) -> None:
+    want = _commit_mac(key, base, payload_len, frames)
+    if not hmac.compare_digest(str(meta.get("deltas_mac", "")), want):
+        raise ValueError("delta records do not match the authenticated commit pointer")
+
+
+def _open_container(container: Path) -> tuple[Dict[str, Any], int]:
+    with open(container, "rb") as fh:
+        meta = json.loads(read_header(fh, limit=HEADER_LIMIT).decode("utf-8"))
+        return meta, fh.tell()
+
+
+def append_delta(
+    container: Path,
+    key: bytes,
+    src: IO[bytes],
+    size: int,
+    header_updates: Dict[str, Any] | None = None,
+) -> int:
+    """Seal ``size`` bytes from ``src`` as a new delta record and commit it.
+
+    ``header_updates`` are merged into the header in the same rewrite that
+    commits the record. Returns the new number of records.
+    """
+    meta, body_start = _open_container(container)
+    if not is_appendable(meta):
+        raise ValueError(f"{container.name} does not support delta records")
+    seq = delta_count(meta)
+    aead = _aead(key)
+    base = _base_id(meta)
+    prefix = os.urandom(8)
+    count = max(1, -(-size // DELTA_CHUNK))
+    header = json.dumps({"seq": seq, "orig_size": size, "chunk_size": DELTA_CHUNK, "nonce_hex": prefix.hex()})
+
+    with open(container, "r+b") as fh:
+        payload_len = meta.get("payload_len")
+        if payload_len is None:  # first record: everything after the header is payload
+            payload_len = os.fstat(fh.fileno()).st_size - body_start
+        fh.seek(body_start + int(payload_len))
+        frames = [_skip_record(fh) for _ in range(seq)]  # skip committed records, drop a torn tail
+        if has_delta_log(meta):  # never re-sign a pointer someone lowered: the records after it would be lost
+            _check_commit(meta, key, base, int(payload_len), frames)
+        fh.truncate()
+        fh.write(_FRAME.pack(DELTA_MAGIC, len(header)) + header.encode("utf-8"))
+        for idx in range(count):
+            chunk = src.read(min(DELTA_CHUNK, size - idx * DELTA_CHUNK))
+            if len(chunk) != min(DELTA_CHUNK, size - idx * DELTA_CHUNK):
+                raise ValueError("delta source is shorter than announced")
+            nonce = prefix + struct.pack(">I", idx)
+            fh.write(aead.encrypt(nonce, chunk, _aad(base, seq, idx, idx == count - 1)))
+        fh.flush()
+        os.fsync(fh.fileno())
+
+    frames.append(header.encode("utf-8"))
+    updates = dict(header_updates or {})
+    updates.update(
+        {
+            "payload_len": int(payload_len),
+            "deltas": seq + 1,
+            "deltas_mac": _commit_mac(key, base, int(payload_len), frames),
+        }
+    )
+    rewrite_header(container, updates, allow=_COMMIT_FIELDS)
+    return seq + 1
+
+
+def _read_frame(fh: IO[bytes]) -> tuple[Dict[str, Any], bytes]:
+    frame = fh.read(_FRAME.size)
+    if len(frame) != _FRAME.size:
+        raise ValueError("truncated delta record")
+    magic, hlen = _FRAME.unpack(frame)
+    if magic != DELTA_MAGIC:
+        raise ValueError("bad delta record magic")
+    raw = fh.read(hlen)
+    if len(raw) != hlen:
+        raise ValueError("truncated delta record")
+    return dict(json.loads(raw.decode("utf-8"))), raw
+
+
+def _sealed_len(rec: Dict[str, Any]) -> int:
+    size, chunk = int(rec["orig_size"]), int(rec["chunk_size"])
+    return size + max(1, -(-size // chunk)) * _TAG
+
+
+def _skip_record(fh: IO[bytes]) -> bytes:
+    rec, raw = _read_frame(fh)
+    fh.seek(_sealed_len(rec), os.SEEK_CUR)
+    return raw
+
+
+def iter_deltas(container: Path, key: bytes) -> Iterator[Iterator[bytes]]:
+    """Yield each committed record as an iterator over its decrypted chunks.
+
+    The commit pointer is checked against ``deltas_mac`` before the first
+    record is yielded. Consume every record before advancing to the next one.
+    """
+    meta, body_start = _open_container(container)
+    total = delta_count(meta)
+    if not has_delta_log(meta):
+        return
+    if "payload_len" not in meta:
+        raise ValueError("delta commit pointer without payload_len")
+    payload_len = int(meta["payload_len"])
+    aead = _aead(key)
+    base = _base_id(meta)
+    with open(container, "rb") as fh:
+        fh.seek(body_start + payload_len)
+        _check_commit(meta, key, base, payload_len, [_skip_record(fh) for _ in range(total)])
+        fh.seek(body_start + payload_len)
+        for seq in range(total):
+            rec, _ = _read_frame(fh)
+            if int(rec["seq"]) != seq:
+                raise ValueError("delta records out of order")
+            yield _iter_record(fh, aead, base, rec)
+
+
+def _iter_record(fh: IO[bytes], aead: ChaCha20Poly1305, base: bytes, rec: Dict[str, Any]) -> Iterator[bytes]:
+    seq, size, chunk_size = int(rec["seq"]), int(rec["orig_size"]), int(rec["chunk_size"])
+    prefix = bytes.fromhex(rec["nonce_hex"])
+    count = max(1, -(-size // chunk_size))
+    for idx in range(count):
+        clen = min(chunk_size, size - idx * chunk_size) + _TAG
+        ct = fh.read(clen)
+        if len(ct) != clen:
+            raise ValueError("truncated delta record")
+        yield aead.decrypt(prefix + struct.pack(">I", idx), ct, _aad(base, seq, idx, idx == count - 1))
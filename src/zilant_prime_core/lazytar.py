@@ -0,0 +1,246 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+"""Read a tar archive inside an encrypted container without unpacking it.
+
+:class:`LazyTar` walks the tar headers once to build a member index, then
+serves ``stat``/``listdir``/``read`` from it. Reads go through a bounded LRU
+of decrypted chunks, so only the chunks that hold the requested bytes (and
+the tar headers) are ever decrypted. Used by the lazy mode of
+:class:`~zilant_prime_core.zilfs.ZilantFS`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import stat
+import tarfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Protocol, Set, Tuple, cast
+
+from container import PlaintextChunks
+from streaming_aead import StreamChunks
+from utils.file_utils import HEADER_LIMIT, read_header
+from zilant_prime_core.metrics import metrics
+
+__all__ = ["LAZY_CACHE_BYTES", "LazyTar", "open_lazy"]
+
+# upper bound on decrypted plaintext kept in memory per mounted container
+LAZY_CACHE_BYTES = 64 * 1024 * 1024
+_READ_BLOCK = 1024 * 1024
+_CACHE_HIT = metrics.fs_cache_lookups_total.labels("hit")
+_CACHE_MISS = metrics.fs_cache_lookups_total.labels("miss")
+
+
+class ChunkSource(Protocol):
+    size: int
+    chunk_size: int
+    count: int
+
+    def chunk(self, idx: int) -> bytes: ...
+
+    def close(self) -> None: ...
+
+
+class _View:
+    """Seekable read-only file object over :meth:`LazyTar.pread` for ``tarfile``."""
+
+    def __init__(self, owner: LazyTar) -> None:
+        self._owner = owner
+        self._pos = 0
+
+    def read(self, n: int = -1) -> bytes:
+        if n < 0:
+            n = self._owner.size - self._pos
+        data = self._owner.pread(n, self._pos)
+        self._pos += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: self._owner.size}[whence]
+        self._pos = max(base + offset, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+class LazyTar:
+    """Member index and on-demand reads for the tar stored in a chunk source."""
+
+    def __init__(self, source: ChunkSource, cache_bytes: int = LAZY_CACHE_BYTES) -> None:
+        self._source = source
+        self.size = source.size
+        self.max_chunks = max(1, cache_bytes // max(source.chunk_size, 1))
+        self._cache: OrderedDict[int, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.members: Dict[str, tarfile.TarInfo] = {}
+        self._children: Dict[str, Set[str]] = {".": set()}
+        try:
+            self._build_index()
+        except BaseException:
+            source.close()
+            raise
+
+    # ─────────────── plaintext access
+    def _chunk(self, idx: int) -> bytes:
+        with self._lock:
+            data = self._cache.get(idx)
+            if data is not None:
+                self._cache.move_to_end(idx)
+                self.hits += 1
+                _CACHE_HIT.inc()
+                return data
+            self.misses += 1
+        _CACHE_MISS.inc()
+        data = self._source.chunk(idx)
+        with self._lock:
+            self._cache[idx] = data
+            while len(self._cache) > self.max_chunks:
+                self._cache.popitem(last=False)
+        return data
+
+    def pread(self, size: int, offset: int) -> bytes:
+        """Return up to ``size`` plaintext bytes at ``offset``.
+
+        Cached chunks are sliced through memoryviews, so the result is the
+        only copy made, however many chunks the range spans.
+        """
+        end = min(offset + size, self.size)
+        if offset >= end:
+            return b""
+        step = self._source.chunk_size
+        parts: List[memoryview] = []
+        pos = offset
+        while pos < end:
+            idx = pos // step
+            lo = pos - idx * step
+            piece = memoryview(self._chunk(idx))[lo : lo + (end - pos)]
+            if not piece:  # pragma: no cover - source shorter than its header claims
+                break
+            parts.append(piece)
+            pos += len(piece)
+        return bytes(parts[0]) if len(parts) == 1 else b"".join(parts)
+
+    # ─────────────── index
+    def _add_parents(self, name: str) -> None:
+        child = name
+        parent = os.path.dirname(name) or "."
+        while True:
+            siblings = self._children.setdefault(parent, set())
+            siblings.add(os.path.basename(child))
+            if parent == "." or parent in self.members:
+                return
+            implicit = tarfile.TarInfo(parent)
+            implicit.type = tarfile.DIRTYPE
+            implicit.mode = 0o755
+            self.members[parent] = implicit
+            child, parent = parent, os.path.dirname(parent) or "."
+
+    def _build_index(self) -> None:
+        with tarfile.open(fileobj=_View(self), mode="r:") as tar:  # type: ignore[call-overload]
+            for member in tar:
+                name = os.path.normpath(member.name)
+                if os.path.isabs(name) or name == ".." or name.startswith(".." + os.sep):
+                    continue
+                if member.isdir():
+                    self._children.setdefault(name, set())
+                if name == ".":
+                    continue
+                self.members[name] = member
+                self._add_parents(name)
+
+    def lookup(self, name: str) -> tarfile.TarInfo | None:
+        if name == ".":
+            root = tarfile.TarInfo(".")
+            root.type = tarfile.DIRTYPE
+            root.mode = 0o755
+            return root
+        return self.members.get(name)
+
+    def listdir(self, name: str) -> List[str]:
+        return sorted(self._children.get(name, ()))
+
+    def _target(self, member: tarfile.TarInfo) -> tarfile.TarInfo:
+        if member.islnk():
+            target = self.members.get(os.path.normpath(member.linkname))
+            if target is None:
+                raise FileNotFoundError(member.linkname)
+            return target
+        return member
+
+    def file_size(self, member: tarfile.TarInfo) -> int:
+        member = self._target(member)
+        return int(member.pax_headers.get("ZIL_SPARSE_SIZE", member.size))
+
+    def stat(self, member: tarfile.TarInfo) -> Dict[str, Any]:
+        kind = stat.S_IFDIR if member.isdir() else stat.S_IFLNK if member.issym() else stat.S_IFREG
+        size = len(member.linkname) if member.issym() else 0 if member.isdir() else self.file_size(member)
+        return {
+            "st_mode": kind | (member.mode & 0o7777),
+            "st_size": size,
+            "st_atime": member.mtime,
+            "st_mtime": member.mtime,
+            "st_ctime": member.mtime,
+            "st_uid": member.uid,
+            "st_gid": member.gid,
+            "st_nlink": 2 if member.isdir() else 1,
+        }
+
+    def read(self, name: str, size: int, offset: int) -> bytes:
+        """Read a regular member; holes of a sparse member read as zeros."""
+        member = self.members.get(name)
+        if member is None:
+            raise FileNotFoundError(name)
+        member = self._target(member)
+        end = min(offset + size, self.file_size(member))
+        if offset >= end:
+            return b""
+        if member.sparse is not None:
+            return self._read_sparse(member, offset, end)
+        stored = min(end, member.size)
+        data = self.pread(stored - offset, member.offset_data + offset) if offset < stored else b""
+        pad = end - offset - len(data)
+        return data + bytes(pad) if pad else data
+
+    def _read_sparse(self, member: tarfile.TarInfo, offset: int, end: int) -> bytes:
+        """GNU sparse member: only the data extents are stored, back to back."""
+        out = bytearray(end - offset)
+        stored = member.offset_data
+        # typeshed declares TarInfo.sparse as bytes; tarfile fills it with (offset, size) pairs
+        extents = cast(List[Tuple[int, int]], member.sparse or [])
+        for ext_off, ext_len in extents:
+            lo, hi = max(offset, ext_off), min(end, ext_off + ext_len)
+            if lo < hi:
+                out[lo - offset : hi - offset] = self.pread(hi - lo, stored + lo - ext_off)
+            stored += ext_len
+        return bytes(out)
+
+    def iter_file(self, name: str) -> Iterator[bytes]:
+        pos = 0
+        while block := self.read(name, _READ_BLOCK, pos):
+            yield block
+            pos += len(block)
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+        self._source.close()
+
+
+def open_lazy(container: Path, key: bytes, cache_bytes: int = LAZY_CACHE_BYTES) -> LazyTar | None:
+    """Index the tar in ``container``; ``None`` if its format has no random access."""
+    with open(container, "rb") as fh:
+        meta = json.loads(read_header(fh, limit=HEADER_LIMIT).decode("utf-8"))
+    source: ChunkSource
+    if meta.get("magic") == "ZSTR" and meta.get("version", 1) >= 2:
+        source = StreamChunks(container, key)
+    elif meta.get("magic") == "ZILANT":
+        source = PlaintextChunks(container, key)
+    else:
+        return None
+    return LazyTar(source, cache_bytes)
@@ -3,13 +3,16 @@
 
 from __future__ import annotations
 
+import time
 from contextlib import contextmanager
 from functools import wraps
 from prometheus_client import Counter, Gauge, Histogram, generate_latest
-from typing import Any, Callable, Iterator, cast
+from typing import Any, Callable, Iterator, TypeVar, cast
 
 __all__ = ["metrics", "Metrics"]
 
+_F = TypeVar("_F", bound=Callable[..., Any])
+
 
 class Metrics:
     def __init__(self) -> None:
@@ -34,6 +37,33 @@ class Metrics:
             "Time spent encrypting/decrypting",
         )
         self.inflight_requests: Gauge = Gauge("inflight_requests", "In-flight requests", ["name"])
+        self.batch_files_total: Counter = Counter(
+            "batch_files_total",
+            "Files handled by batch commands",
+            ["name", "status"],
+        )
+        self.batch_duration_seconds: Histogram = Histogram(
+            "batch_duration_seconds",
+            "Batch command duration in seconds",
+            ["name"],
+            buckets=[1, 10, 60, 300, 1800, 3600],
+        )
+        self.fs_op_duration_seconds: Histogram = Histogram(
+            "zilfs_op_duration_seconds",
+            "ZilantFS operation latency in seconds",
+            ["op"],
+            buckets=[0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30],
+        )
+        self.fs_bytes_total: Counter = Counter(
+            "zilfs_bytes_total",
+            "Bytes read from and written to mounted ZilantFS volumes",
+            ["direction"],
+        )
+        self.fs_cache_lookups_total: Counter = Counter(
+            "zilfs_cache_lookups_total",
+            "Decrypted-chunk cache lookups of lazy ZilantFS mounts",
+            ["result"],
+        )
 
     @contextmanager
     def track(self, name: str) -> Iterator[None]:
@@ -56,6 +86,27 @@ class Metrics:
 
         return decorator
 
+    def record_fs(self, op: str) -> Callable[[_F], _F]:
+        """Decorator observing the latency of a ZilantFS operation.
+
+        The labelled histogram is resolved once, so a call only costs two
+        ``perf_counter`` reads and one ``observe``.
+        """
+        child = self.fs_op_duration_seconds.labels(op)
+
+        def decorator(func: _F) -> _F:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - start)
+
+            return cast(_F, wrapper)
+
+        return decorator
+
     def export(self) -> bytes:
         return cast(bytes, generate_latest())
 
@@ -48,6 +48,11 @@ def heal_container(path: Path, key: bytes, *, rng_seed: bytes) -> bool:
         os.unlink(lock_path)
         return False
 
+    # ZSNAP-снимок — манифест над хранилищем чанков: переупаковка его уничтожит
+    if meta.get("magic") == "ZSNAP":
+        os.unlink(lock_path)
+        return False
+
     level = int(meta.get("heal_level", 0))
     if level >= 3:
         os.unlink(lock_path)
@@ -12,6 +12,7 @@ import time
 from pathlib import Path
 from typing import Dict, List, Set
 
+from audit_ledger import batch as ledger_batch
 from audit_ledger import record_decoy_purged, record_decoy_removed_early
 from container import get_metadata, pack_file
 
@@ -92,19 +93,20 @@ def sweep_expired_decoys(directory: Path) -> int:
     """
     now = time.time()
     removed = 0
-    for p, expiry in list(_DECOY_EXPIRY.items()):
-        if p.parent == directory and expiry <= now:
-            try:
-                p.unlink()
-                record_decoy_purged(str(p))
-            except FileNotFoundError:  # pragma: no cover
-                record_decoy_removed_early(str(p))  # pragma: no cover
-            except Exception:  # pragma: no cover
-                record_decoy_removed_early(str(p))  # pragma: no cover
-            finally:
-                _DECOY_EXPIRY.pop(p, None)
-                _DECOY_SET.discard(p)
-                removed += 1
+    with ledger_batch():  # записи о тысячах приманок — групповым коммитом
+        for p, expiry in list(_DECOY_EXPIRY.items()):
+            if p.parent == directory and expiry <= now:
+                try:
+                    p.unlink()
+                    record_decoy_purged(str(p))
+                except FileNotFoundError:  # pragma: no cover
+                    record_decoy_removed_early(str(p))  # pragma: no cover
+                except Exception:  # pragma: no cover
+                    record_decoy_removed_early(str(p))  # pragma: no cover
+                finally:
+                    _DECOY_EXPIRY.pop(p, None)
+                    _DECOY_SET.discard(p)
+                    removed += 1
     return removed
 
 
@@ -5,7 +5,11 @@
 from __future__ import annotations
 
 import abc
-from typing import Tuple, cast
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Tuple, cast
 
 try:
     import oqs
@@ -22,7 +26,16 @@ except Exception:  # pragma: no cover - optional dependency
         kyber768 = None
         dilithium2 = None
 
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
 from kdf import derive_key
+from utils.secure_memory import wipe_bytes
+
+# Names stored in the ``pq_kdf`` container header field. Containers without
+# the field predate it and use the Argon2id derivation.
+PQ_KDF_HKDF = "hkdf-sha256"
+PQ_KDF_LEGACY = "argon2id"
 
 
 class KEM(abc.ABC):
@@ -253,10 +266,123 @@ class HybridKEM(KEM):
 
 
 def derive_key_pq(shared_secret: bytes, length: int = 32) -> bytes:
-    """Derive a symmetric key from a KEM shared secret."""
+    """Derive a symmetric key from a KEM shared secret with HKDF-SHA256.
+
+    A KEM shared secret is already uniformly random, so no password
+    stretching is needed here.
+    """
+
+    if not isinstance(shared_secret, (bytes, bytearray)):
+        raise TypeError("shared_secret must be bytes or bytearray")
+
+    hkdf = HKDF(
+        algorithm=hashes.SHA256(),
+        length=length,
+        salt=b"zilant-pq-kem",
+        info=b"zilant container key",
+    )
+    key: bytes = hkdf.derive(bytes(shared_secret))
+    return key
+
+
+def derive_key_pq_legacy(shared_secret: bytes, length: int = 32) -> bytes:
+    """Argon2id derivation used by containers written before ``pq_kdf`` existed."""
 
     if not isinstance(shared_secret, (bytes, bytearray)):
         raise TypeError("shared_secret must be bytes or bytearray")
 
     key: bytes = derive_key(bytes(shared_secret), b"pq_salt!")
     return key[:length]
+
+
+def _pq_kdf(name: str) -> Callable[[bytes], bytes]:
+    if name == PQ_KDF_HKDF:
+        return derive_key_pq
+    if name == PQ_KDF_LEGACY:
+        return derive_key_pq_legacy
+    raise ValueError(f"Unknown pq_kdf: {name!r}")
+
+
+class PQKeyCache:
+    """Bounded LRU of symmetric keys derived from KEM ciphertexts.
+
+    Entries are looked up by a keyed BLAKE2b of (kdf, private key, kem_ct)
+    with a per-instance secret, so neither keys nor ciphertexts are held as
+    dictionary keys. Evicted values are wiped.
+    """
+
+    def __init__(self, max_entries: int = 64) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self._secret = os.urandom(32)
+        self._entries: OrderedDict[bytes, bytearray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _slot(self, kdf: str, private_key: bytes, kem_ct: bytes) -> bytes:
+        h = hashlib.blake2b(key=self._secret, digest_size=32, person=b"zil-pq-cache")
+        for part in (kdf.encode("ascii"), bytes(private_key), bytes(kem_ct)):
+            h.update(len(part).to_bytes(4, "big"))
+            h.update(part)
+        return h.digest()
+
+    def get(self, kdf: str, private_key: bytes, kem_ct: bytes) -> bytes | None:
+        slot = self._slot(kdf, private_key, kem_ct)
+        with self._lock:
+            value = self._entries.get(slot)
+            if value is None:
+                return None
+            self._entries.move_to_end(slot)
+            return bytes(value)
+
+    def put(self, kdf: str, private_key: bytes, kem_ct: bytes, key: bytes) -> None:
+        slot = self._slot(kdf, private_key, kem_ct)
+        with self._lock:
+            old = self._entries.pop(slot, None)
+            if old is not None:
+                wipe_bytes(old)
+            self._entries[slot] = bytearray(key)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                wipe_bytes(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            for value in self._entries.values():
+                wipe_bytes(value)
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_key_cache: PQKeyCache | None = None
+
+
+def enable_pq_key_cache(max_entries: int = 64) -> PQKeyCache:
+    """Turn on caching of derived keys for repeated opens of the same container."""
+    global _key_cache
+    disable_pq_key_cache()
+    _key_cache = PQKeyCache(max_entries)
+    return _key_cache
+
+
+def disable_pq_key_cache() -> None:
+    global _key_cache
+    if _key_cache is not None:
+        _key_cache.clear()
+    _key_cache = None
+
+
+def open_kem_key(private_key: bytes, kem_ct: bytes, kdf: str = PQ_KDF_HKDF) -> bytes:
+    """Decapsulate ``kem_ct`` and derive the container key, using the cache if enabled."""
+    derive = _pq_kdf(kdf)
+    cache = _key_cache
+    if cache is not None:
+        hit = cache.get(kdf, private_key, kem_ct)
+        if hit is not None:
+            return hit
+    key = derive(Kyber768KEM().decapsulate(private_key, kem_ct))
+    if cache is not None:
+        cache.put(kdf, private_key, kem_ct, key)
+    return key
@@ -4,12 +4,19 @@
 
 from __future__ import annotations
 
+import atexit
 import base64
 import json
+import mmap
 import os
 import secrets
+import struct
+import threading
+import time
+import weakref
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from typing import Any, Optional, Tuple, Union
+from typing import Any, Iterator, List, Optional, Tuple, Union
 
 __all__ = ["SecureLogger", "get_secure_logger", "get_decryption_attempts"]
 
@@ -19,11 +26,41 @@ DEFAULT_LOG_PATH = "logs/zilant.log"
 # global statistic of decryption attempts
 DECRYPTION_ATTEMPTS = 0
 
+# Формат файла — последовательность кадров:
+#   MAGIC | u32 BE длина (nonce + ct) | nonce(12) | AES-GCM(записи), AAD = первые 8 байт;
+# открытый текст кадра — записи ``u32 BE длина | компактный JSON``.
+# Старые строки ``b64(nonce)|b64(ct)\n`` по-прежнему читаются: байта 0xff
+# в base64 не бывает, поэтому сигнатура кадра однозначно отделяет форматы.
+MAGIC = b"\xffZL\x01"
+_HEADER = struct.Struct(">4sI")
+_LEN = struct.Struct(">I")
+_NONCE = 12
+
+# логгеры с недописанными записями: держим их, пока буфер не ушёл на диск,
+# иначе брошенный без close() логгер молча терял бы хвост
+_pending: "set[SecureLogger]" = set()
+
 
 class SecureLogger:
-    """Логгер с AES-GCM и компактным JSON."""
+    """Логгер с AES-GCM и компактным JSON.
+
+    Записи копятся в памяти и пишутся одним зашифрованным кадром, когда
+    набралось ``max_records`` записей, при :meth:`flush`/:meth:`close`/
+    чтении, при выходе из процесса, а также фоновым потоком раз в
+    ``flush_interval`` секунд (``0`` — каждая запись сразу, ``None`` — без
+    потока). ``fsync`` делается не чаще раза в ``fsync_interval`` секунд
+    (``0`` — после каждого кадра, ``None`` — никогда).
+    """
 
-    def __init__(self, key: Optional[bytes] = None, log_path: str = DEFAULT_LOG_PATH) -> None:
+    def __init__(
+        self,
+        key: Optional[bytes] = None,
+        log_path: str = DEFAULT_LOG_PATH,
+        *,
+        max_records: int = 256,
+        flush_interval: Optional[float] = 0.5,
+        fsync_interval: Optional[float] = 5.0,
+    ) -> None:
         raw: Optional[bytes] = key or os.environ.get("ZILANT_LOG_KEY")  # type: ignore[assignment]
         if isinstance(raw, str):
             raw = base64.urlsafe_b64decode(raw.encode())
@@ -32,47 +69,167 @@ class SecureLogger:
 
         self._aesgcm = AESGCM(raw)
         self.log_path = log_path
+        self.max_records = max_records
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._buf: List[bytes] = []
+        self._fd: Optional[int] = None
+        self._synced = time.monotonic()
+        self._unsynced = False
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._closer: Optional[weakref.finalize] = None
         os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
 
     def _sanitize(self, msg: str) -> str:
+        if msg.isascii() and msg.isprintable():  # обычный случай: чистить нечего
+            return msg
         return "".join(ch for ch in msg.replace("\n", "\\n").replace("\r", "\\r") if 32 <= ord(ch) < 127)
 
-    def log(self, msg: str, level: str = "INFO", **fields: Any) -> None:  # pragma: no cover
+    def log(self, msg: str, level: str = "INFO", **fields: Any) -> None:
         d: dict[str, Any] = {"msg": self._sanitize(msg), "level": level}
         for k, v in fields.items():
             d[k] = v if isinstance(v, (str, int, float, bool)) or v is None else str(v)
-        data = json.dumps(d, separators=(",", ":")).encode()
-        nonce = secrets.token_bytes(12)
-        ct = self._aesgcm.encrypt(nonce, data, None)
-        with open(self.log_path, "ab") as f:
-            f.write(base64.b64encode(nonce) + b"|" + base64.b64encode(ct) + b"\n")
-        if os.path.getsize(self.log_path) == len(base64.b64encode(nonce)) + len(base64.b64encode(ct)) + 2:
+        rec = json.dumps(d, separators=(",", ":")).encode()
+        with self._lock:
+            if self._fd is None:
+                self._open_locked()  # файл (0o600) появляется сразу, данные — с первым кадром
+            self._buf.append(rec)
+            _pending.add(self)
+            if len(self._buf) >= self.max_records or self.flush_interval == 0:
+                self._flush_locked()
+            elif self._flusher is None and self.flush_interval is not None:
+                self._stop.clear()
+                self._flusher = threading.Thread(
+                    target=_flush_loop,
+                    args=(weakref.ref(self), self._stop, self.flush_interval),
+                    name="zil-securelog",
+                    daemon=True,
+                )
+                self._flusher.start()
+
+    def _seal(self, records: List[bytes]) -> bytes:
+        body = b"".join(_LEN.pack(len(r)) + r for r in records)
+        nonce = secrets.token_bytes(_NONCE)
+        header = _HEADER.pack(MAGIC, _NONCE + len(body) + 16)  # 16 — тег GCM
+        ct: bytes = self._aesgcm.encrypt(nonce, body, header)
+        return header + nonce + ct
+
+    def _open_locked(self) -> int:
+        fd = self._fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        # дескриптор закроется и у логгера, брошенного без close(); при выходе
+        # его закрывает ОС — уже после того, как _flush_all допишет буферы
+        self._closer = weakref.finalize(self, os.close, fd)
+        self._closer.atexit = False
+        return fd
+
+    def _flush_locked(self, sync: bool = False) -> None:
+        if self._buf:
+            fd = self._fd if self._fd is not None else self._open_locked()
+            view = memoryview(self._seal(self._buf))
+            self._buf = []
+            _pending.discard(self)
+            while view:
+                view = view[os.write(fd, view) :]
+            self._unsynced = True
+        if self._unsynced and self._fd is not None and self.fsync_interval is not None:
+            now = time.monotonic()
+            if sync or now - self._synced >= self.fsync_interval:
+                os.fsync(self._fd)
+                self._synced, self._unsynced = now, False
+
+    def flush(self, sync: bool = False) -> None:
+        """Записать накопленные записи одним кадром; ``sync`` — сразу ``fsync``."""
+        with self._lock:
+            self._flush_locked(sync)
+
+    def close(self) -> None:
+        """Остановить фоновый поток, дописать буфер и закрыть файл."""
+        self._stop.set()
+        with self._lock:
+            self._flusher = None
             try:
-                os.chmod(self.log_path, 0o600)
-            except Exception:
-                pass
+                self._flush_locked(sync=True)
+            finally:
+                if self._closer is not None:
+                    self._closer()
+                self._fd = self._closer = None
 
-    def read_logs(self) -> list[Union[Tuple[str, str], Tuple[str, str, dict[str, Any]]]]:  # pragma: no cover
+    def __enter__(self) -> "SecureLogger":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def iter_logs(self) -> Iterator[dict[str, Any]]:
+        """Потоково расшифровать журнал: по одному словарю на запись.
+
+        Битый кадр пропускается до следующей сигнатуры, битая старая строка —
+        до конца строки.
+        """
+        self.flush()
+        try:
+            f = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                for pt in self._scan(buf):
+                    try:
+                        rec = json.loads(pt)
+                    except ValueError:
+                        continue
+                    if isinstance(rec, dict):
+                        yield rec
+
+    def _scan(self, buf: mmap.mmap) -> Iterator[bytes]:
+        global DECRYPTION_ATTEMPTS
+        pos, end = 0, len(buf)
+        while pos < end:
+            if buf[pos : pos + 4] == MAGIC:
+                body = pos + _HEADER.size
+                n = _LEN.unpack_from(buf, pos + 4)[0] if body <= end else 0
+                if n > _NONCE and body + n <= end:
+                    DECRYPTION_ATTEMPTS += 1
+                    try:
+                        pt = self._aesgcm.decrypt(
+                            buf[body : body + _NONCE], buf[body + _NONCE : body + n], buf[pos:body]
+                        )
+                    except InvalidTag:
+                        pass
+                    else:
+                        yield from _records(pt)
+                        pos = body + n
+                        continue
+                nxt = buf.find(MAGIC, pos + 1)
+                pos = end if nxt < 0 else nxt
+                continue
+            # старый формат: одна base64-строка на запись
+            stop = buf.find(b"\n", pos)
+            stop = end if stop < 0 else stop
+            frame = buf.find(MAGIC, pos, stop)
+            line, pos = buf[pos : stop if frame < 0 else frame], stop + 1 if frame < 0 else frame
+            DECRYPTION_ATTEMPTS += 1
+            try:
+                nonce_b64, ct_b64 = line.rstrip(b"\r").split(b"|")
+                yield self._aesgcm.decrypt(base64.b64decode(nonce_b64), base64.b64decode(ct_b64), None)
+            except (ValueError, InvalidTag):
+                continue
+
+    def read_logs(self) -> list[Union[Tuple[str, str], Tuple[str, str, dict[str, Any]]]]:
         out: list[Union[Tuple[str, str], Tuple[str, str, dict[str, Any]]]] = []
-        if not os.path.exists(self.log_path):
-            return out
-        with open(self.log_path, "rb") as f:
-            for line in f:
-                global DECRYPTION_ATTEMPTS
-                DECRYPTION_ATTEMPTS += 1
-                try:
-                    nonce_b64, ct_b64 = line.rstrip(b"\n").split(b"|")
-                    pt = self._aesgcm.decrypt(base64.b64decode(nonce_b64), base64.b64decode(ct_b64), None)
-                    payload = json.loads(pt.decode())
-                except Exception:
-                    continue
-                lvl, msg = payload.pop("level", ""), payload.pop("msg", "")
-                out.append((lvl, msg))
-                if payload:
-                    out.append((lvl, msg, payload))
+        for payload in self.iter_logs():
+            lvl, msg = payload.pop("level", ""), payload.pop("msg", "")
+            out.append((lvl, msg))
+            if payload:
+                out.append((lvl, msg, payload))
         return out
 
     def zeroize(self) -> None:
+        self.close()
         if not os.path.exists(self.log_path):
             return
         with open(self.log_path, "rb") as f:
@@ -82,6 +239,36 @@ class SecureLogger:
         with open(self.log_path + ".enc", "wb") as f:
             f.write(base64.b64encode(nonce) + b"|" + base64.b64encode(ct))
         os.remove(self.log_path)
+
+
+def _records(pt: bytes) -> Iterator[bytes]:
+    pos = 0
+    while pos + _LEN.size <= len(pt):
+        n = _LEN.unpack_from(pt, pos)[0]
+        pos += _LEN.size
+        yield pt[pos : pos + n]
+        pos += n
+
+
+def _flush_loop(ref: "weakref.ref[SecureLogger]", stop: threading.Event, interval: float) -> None:
+    while not stop.wait(interval):
+        slog = ref()
+        if slog is None:
+            return
+        try:
+            slog.flush()
+        except OSError:
+            pass
+        del slog
+
+
+@atexit.register
+def _flush_all() -> None:
+    for slog in list(_pending):
+        try:
+            slog.flush(sync=True)
+        except OSError:
+            pass
 
 
 _default: Optional[SecureLogger] = None
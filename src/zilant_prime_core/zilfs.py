@@ -1,25 +1,41 @@
 # SPDX-License-Identifier: MIT
 # SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
 """
-Упрощённая in-memory-FS поверх .zil-контейнеров (используется только в CI-тестах).
-
-• FUSE не требуется — монтирование происходит в tmp-каталог.
-• На Windows реализована защита от «WinError 112» при shutil.copy*.
-• Поддерживает sparse-упаковку больших файлов, чтобы не кушать диск в CI.
+ZilantFS: каталог, упакованный в .zil-контейнер, смонтированный через FUSE.
+
+• :func:`mount_fs` монтирует :class:`ZilantFS` через fusepy (многопоточно),
+  :func:`umount_fs` размонтирует; без fusepy класс работает как обычный объект
+  с FUSE-операциями (так его используют тесты).
+• Обычный режим расшифровывает контейнер во временный каталог; ``lazy=True``
+  отвечает по индексу tar и расшифровывает только читаемые чанки, а
+  изменения пишет в верхний слой (copy-up, whiteout-ы).
+• Write-back: изменённые пути дописываются в контейнер дельта-записями
+  (:mod:`zilant_prime_core.deltalog`) — фоновыми checkpoint-ами и при
+  размонтировании; полная перепаковка — только при сжатии журнала.
+• sparse-файлы упаковываются без дыр; на Windows — защита от «WinError 112»
+  при shutil.copy*.
 """
 
 from __future__ import annotations
 
+import base64
 import errno
+import functools
+import hmac
+import itertools
 import json
 import os
+import shutil
 import subprocess
+import sys
 import tarfile
+import threading
 import time
+import zstandard as zstd
 from hashlib import sha256
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Any, Dict, List, Tuple, cast
+from typing import IO, Any, Callable, Dict, Iterator, List, Set, Tuple, TypeVar, cast
 
 
 # ───────────────────────────── fusepy (опционально)
@@ -40,12 +56,28 @@ except ImportError:  # pragma: no cover
 
 # ───────────────────────────── project-local импорты
 from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
 
-from container import get_metadata, pack_file, unpack_file
+from container import STREAM_CHUNK, get_metadata, iter_plaintext, pack_file, rewrite_header, unpack_file
 from streaming_aead import pack_stream, unpack_stream
+from utils.file_utils import HEADER_LIMIT, read_header
 from utils.logging import get_logger
+from zilant_prime_core.chunkstore import is_snapshot, iter_snapshot, latest_snapshot, snapshot_store, write_snapshot
+from zilant_prime_core.deltalog import (
+    DELTA_MAX,
+    append_delta,
+    delta_count,
+    has_delta_log,
+    is_appendable,
+    iter_deltas,
+)
+from zilant_prime_core.lazytar import LAZY_CACHE_BYTES, LazyTar, open_lazy
+from zilant_prime_core.metrics import metrics
+from zilant_prime_core.tarstream import TarStream, data_extents, sparse_blocks, sparse_headers, sparse_map
+from zilant_prime_core.utils.rate_limiter import RateLimiter
 
 logger = get_logger("zilfs")
+_F = TypeVar("_F", bound=Callable[..., Any])
 
 # ───────────────────────────── service-константы
 _DECOY_PROFILES: Dict[str, Dict[str, str]] = {
@@ -60,6 +92,22 @@ _DECOY_PROFILES: Dict[str, Dict[str, str]] = {
     },
 }
 ACTIVE_FS: List["ZilantFS"] = []
+# lazy-режим: дескрипторы файлов нижнего слоя не пересекаются с fd ОС
+_VIRTUAL_FH_BASE = 1 << 30
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_TRUNC
+# дельта-записи: PAX-пометка удалённого пути
+_DELETE_PAX = "ZIL_DELETE"
+# фоновые checkpoint-ы: досрочная запись после стольких байт, лимит скорости дозаписи
+CHECKPOINT_DIRTY_BYTES = 64 * 1024 * 1024
+CHECKPOINT_MB_S = 32.0
+_THROTTLE_SLEEP = 0.05
+# read/write одним системным вызовом, без общего смещения дескриптора
+_HAS_PREAD = hasattr(os, "pread") and hasattr(os, "pwrite")
+_BYTES_READ = metrics.fs_bytes_total.labels("read")
+_BYTES_WRITTEN = metrics.fs_bytes_total.labels("write")
+# поле заголовка с зашифрованным пофайловым манифестом: {путь: [size, mtime, sha256]}
+MANIFEST_FIELD = "files_manifest"
+_MANIFEST_AAD = b"zilfs-files-manifest-v1"
 
 
 # ───────────────────────────── helpers (низкоуровневые)
@@ -187,70 +235,261 @@ except ImportError:
     pass
 
 
+# ───────────────────────────── пофайловый манифест
+def _manifest_aead(key: bytes) -> ChaCha20Poly1305:
+    return ChaCha20Poly1305(hmac.new(bytes(key), b"zilfs-files-manifest", sha256).digest())
+
+
+def _seal_manifest(files: Dict[str, List[Any]], key: bytes) -> str:
+    """Зашифровать манифест для поля заголовка ``MANIFEST_FIELD``."""
+    nonce = os.urandom(12)
+    raw = zstd.ZstdCompressor(level=3).compress(json.dumps(files, separators=(",", ":")).encode("utf-8"))
+    return base64.b64encode(nonce + _manifest_aead(key).encrypt(nonce, raw, _MANIFEST_AAD)).decode("ascii")
+
+
+def _open_manifest(meta: Dict[str, Any], key: bytes) -> Dict[str, List[Any]] | None:
+    """Расшифровать манифест из заголовка; ``None`` — контейнер записан без манифеста."""
+    sealed = meta.get(MANIFEST_FIELD)
+    if not sealed:
+        return None
+    blob = base64.b64decode(sealed)
+    try:
+        raw = _manifest_aead(key).decrypt(blob[:12], blob[12:], _MANIFEST_AAD)
+    except InvalidTag as exc:
+        raise ValueError("bad key or corrupted container") from exc
+    return cast(Dict[str, List[Any]], json.loads(zstd.ZstdDecompressor().decompress(raw)))
+
+
+class _HashingReader:
+    """Обёртка над файлом: считает sha256 того, что прочитал tarfile."""
+
+    def __init__(self, fh: IO[bytes]) -> None:
+        self._fh = fh
+        self.hash = sha256()
+
+    def read(self, n: int = -1) -> bytes:
+        data = self._fh.read(n)
+        self.hash.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self.hash.hexdigest()
+
+
+def _tar_add(
+    tar: tarfile.TarFile,
+    path: Path,
+    name: str,
+    files: Dict[str, List[Any]],
+    recursive: bool = True,
+) -> None:
+    """Аналог ``tar.add(path, name)``; записи манифеста для файлов кладёт в ``files``."""
+    info = tar.gettarinfo(str(path), name)
+    if info is None:  # pragma: no cover - сокеты и прочее, tar.add их тоже пропускает
+        return
+    key = os.path.normpath(name)
+    if info.isreg():
+        size = info.size
+        with path.open("rb") as fh:
+            extents = data_extents(fh.fileno(), size) if tar.format == tarfile.PAX_FORMAT else None
+            reader: _HashingReader | _SparseReader
+            if extents is None:
+                reader = _HashingReader(fh)
+            else:
+                reader = _SparseReader(fh, extents, size)
+                info.pax_headers = {**info.pax_headers, **sparse_headers(info.name, size)}
+                info.size = reader.stored_size
+            tar.addfile(info, cast(IO[bytes], reader))
+        files[key] = [size, int(info.mtime), reader.hexdigest()]
+        return
+    tar.addfile(info)
+    if info.islnk() and os.path.normpath(info.linkname) in files:
+        files[key] = files[os.path.normpath(info.linkname)]
+    elif info.isdir() and recursive:
+        for child in sorted(os.listdir(path)):
+            _tar_add(tar, path / child, os.path.join(name, child), files)
+
+
+def _tar_tree(tar: tarfile.TarFile, src: Path, arcname: str = ".") -> Dict[str, List[Any]]:
+    """Аналог ``tar.add(src, arcname)``, заодно собирающий манифест за тот же проход чтения."""
+    files: Dict[str, List[Any]] = {}
+    _tar_add(tar, src, arcname, files)
+    return files
+
+
+# ───────────────────────────── дельта-записи (инкрементальная запись изменений)
+def _delta_tar(root: Path, changed: Set[str], deleted: Set[str], tar_path: Path) -> Dict[str, List[Any]]:
+    """tar изменений: сначала пометки удаления (PAX ``ZIL_DELETE``), затем новые версии путей."""
+    files: Dict[str, List[Any]] = {}
+    with tarfile.open(tar_path, "w", format=tarfile.PAX_FORMAT) as tar:
+        for rel in sorted(deleted):
+            info = tarfile.TarInfo(rel)
+            info.pax_headers = {_DELETE_PAX: "1"}
+            tar.addfile(info)
+        for rel in sorted(changed):
+            path = root / rel
+            if os.path.lexists(path):
+                _tar_add(tar, path, rel, files, recursive=False)
+    return files
+
+
+def _under(rel: str, paths: Set[str]) -> bool:
+    """``rel`` или один из его предков входит в ``paths``."""
+    while rel not in (".", ""):
+        if rel in paths:
+            return True
+        rel = os.path.dirname(rel)
+    return False
+
+
+def _remove_path(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        path.unlink()
+
+
+def _apply_deltas(container: Path, key: bytes, dest: Path, on_delete: Callable[[str], None] | None = None) -> None:
+    """Применить дельта-записи контейнера поверх уже распакованного ``dest``."""
+    dest_abs = os.path.abspath(dest)
+    for record in iter_deltas(container, key):
+        with TemporaryDirectory() as tmp:
+            tar_path = Path(tmp) / "delta.tar"
+            with tar_path.open("wb") as fh:
+                for block in record:
+                    fh.write(block)
+            with tarfile.open(tar_path) as tar:
+                for member in tar.getmembers():
+                    abs_path = os.path.abspath(os.path.join(dest_abs, member.name))
+                    if not abs_path.startswith(dest_abs):
+                        raise ValueError(f"Attempted Path Traversal in TAR file: {member.name}")
+                    if member.pax_headers.get(_DELETE_PAX):
+                        if on_delete is not None:
+                            on_delete(os.path.normpath(member.name))
+                        else:
+                            _remove_path(Path(abs_path))
+                        continue
+                    tar.extract(member, path=dest)  # nosec
+
+
+class _Throttled:
+    """file-like: каждое чтение (до ``DELTA_CHUNK``) ждёт токен :class:`RateLimiter`."""
+
+    def __init__(self, fh: IO[bytes], limiter: RateLimiter) -> None:
+        self._fh = fh
+        self._limiter = limiter
+
+    def read(self, n: int = -1) -> bytes:
+        while not self._limiter.allow():
+            time.sleep(_THROTTLE_SLEEP)
+        return self._fh.read(n)
+
+
+def _locked(fn: _F) -> _F:
+    """Изменяющая операция FS: не пересекается со снимком изменений для checkpoint-а."""
+
+    @functools.wraps(fn)
+    def wrapper(self: ZilantFS, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            return fn(self, *args, **kwargs)
+
+    return cast(_F, wrapper)
+
+
+class _BlockReader:
+    """file-like поверх итератора блоков — для потокового ``tarfile`` (mode ``r|``)."""
+
+    def __init__(self, blocks: Iterator[bytes]) -> None:
+        self._blocks = blocks
+        self._buf = b""
+        self._pos = 0
+
+    def read(self, n: int = -1) -> bytes:
+        while n < 0 or len(self._buf) - self._pos < n:
+            block = next(self._blocks, None)
+            if block is None:
+                break
+            self._buf = self._buf[self._pos :] + block
+            self._pos = 0
+        end = len(self._buf) if n < 0 else self._pos + n
+        out = self._buf[self._pos : end]
+        self._pos = min(end, len(self._buf))
+        return out
+
+
+class _SparseReader(_BlockReader):
+    """Данные sparse-члена tar (формат GNU 1.0): карта экстентов, затем только экстенты с данными.
+
+    ``hash`` — sha256 всего содержимого файла, дыры хэшируются как нули.
+    """
+
+    def __init__(self, fh: IO[bytes], extents: List[Tuple[int, int]], size: int) -> None:
+        head = sparse_map(extents)
+        self.stored_size = len(head) + sum(n for _, n in extents)
+        self.hash = sha256()
+        super().__init__(itertools.chain([head], sparse_blocks(fh.fileno(), extents, size, self.hash)))
+
+    def hexdigest(self) -> str:
+        """sha256 файла; хвостовую дыру tarfile не дочитывает — досчитываем здесь."""
+        for _ in self._blocks:
+            pass
+        return self.hash.hexdigest()
+
+
 # ───────────────────────────── служебные tar-функции
 def _read_meta(container: Path) -> Dict[str, Any]:
     """Прочитать JSON-заголовок контейнера (до двойного LF)."""
-    header = bytearray()
-    with container.open("rb") as fh:
-        while not header.endswith(b"\n\n") and len(header) < 4096:
-            chunk = fh.read(1)
-            if not chunk:
-                break
-            header.extend(chunk)
     try:
-        return cast(Dict[str, Any], json.loads(header[:-2].decode()))
+        with container.open("rb") as fh:
+            return cast(Dict[str, Any], json.loads(read_header(fh, limit=HEADER_LIMIT).decode()))
     except Exception:  # pragma: no cover
         return {}
 
 
-def pack_dir(src: Path, dest: Path, key: bytes) -> None:
+def pack_dir(src: Path, dest: Path, key: bytes, store: Path | None = None) -> None:
+    """tar каталога → контейнер ZILANT.
+
+    С ``store`` — dedup-режим: ``dest`` становится ZSNAP-файлом, а данные
+    ложатся CDC-чанками в общее хранилище, где одинаковые чанки разных
+    контейнеров и снимков хранятся один раз.
+    """
     if not src.exists():
         raise FileNotFoundError(src)
+    if store is not None:
+        with TarStream(src) as stream:
+            write_snapshot(
+                dest,
+                dest,
+                iter(functools.partial(stream.read, STREAM_CHUNK), b""),
+                key,
+                store=store,
+                head=False,
+                meta=lambda: {MANIFEST_FIELD: _seal_manifest(stream.files, key)},
+            )
+        return
     with TemporaryDirectory() as tmp:
         tar_path = Path(tmp) / "data.tar"
         with tarfile.open(tar_path, "w") as tar:
-            tar.add(src, arcname=".")
-        pack_file(tar_path, dest, key)
+            files = _tar_tree(tar, src)
+        pack_file(tar_path, dest, key, extra_meta={MANIFEST_FIELD: _seal_manifest(files, key)})
 
 
-def pack_dir_stream(src: Path, dest: Path, key: bytes) -> None:
-    """
-    • POSIX: tar → FIFO → pack_stream
-    • Windows: «sparse-tar», большие файлы заменяем нулями.
+def pack_dir_stream(src: Path, dest: Path, key: bytes, threads: int = 0) -> None:
     """
-    with TemporaryDirectory() as tmp:
-        fifo = os.path.join(tmp, "pipe_or_tar")
-
-        if os.name != "nt" and hasattr(os, "mkfifo"):  # pragma: no cover
-            os.mkfifo(fifo)  # type: ignore[arg-type]
-            proc = subprocess.Popen(
-                ["tar", "-C", str(src), "-cf", fifo, "."],
-                stderr=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL,
-            )
-            pack_stream(Path(fifo), dest, key)
-            proc.wait()
-            return
-
-        with tarfile.open(fifo, "w") as tar:
-            for f in sorted(src.rglob("*")):
-                rel = f.relative_to(src)
-                if f.is_dir():
-                    tar.add(f, arcname=str(rel))
-                    continue
-                st = f.stat()
-                if st.st_size <= 1 * 1024 * 1024:
-                    tar.add(f, arcname=str(rel))
-                    continue
-                info = tarfile.TarInfo(str(rel))
-                info.size = 0
-                info.mtime = int(st.st_mtime)
-                info.mode = st.st_mode
-                info.pax_headers = {"ZIL_SPARSE_SIZE": str(st.st_size)}
-                tar.addfile(info, fileobj=_ZeroFile(0))
+    tar каталога → pack_stream, одним проходом и без временного tar.
 
-        _mark_sparse(Path(fifo))
-        pack_stream(Path(fifo), dest, key)
+    Архив собирает :class:`TarStream` прямо в этом процессе (без внешнего
+    ``tar`` и FIFO): мелкие файлы читаются ``threads`` потоками, ошибка
+    чтения прерывает упаковку, манифест считается за тот же проход.
+    """
+    with TarStream(src, threads) as stream:
+        pack_stream(
+            stream,
+            dest,
+            key,
+            threads=threads,
+            extra_meta=lambda: {MANIFEST_FIELD: _seal_manifest(stream.files, key)},
+        )
 
 
 def unpack_dir(container: Path, dest: Path, key: bytes) -> None:
@@ -263,6 +502,10 @@ def unpack_dir(container: Path, dest: Path, key: bytes) -> None:
         try:
             if meta.get("magic") == "ZSTR":
                 unpack_stream(container, tar_path, key)
+            elif is_snapshot(meta):
+                with open(tar_path, "wb") as fh:
+                    for block in iter_snapshot(container, key):
+                        fh.write(block)
             else:
                 unpack_file(container, tar_path, key)
         except InvalidTag as exc:  # pragma: no cover
@@ -283,31 +526,76 @@ def unpack_dir(container: Path, dest: Path, key: bytes) -> None:
                 if sp_size_str:
                     _truncate_file(dest / member.name, int(sp_size_str))
 
+    if has_delta_log(meta):
+        _apply_deltas(container, key, dest)
+
 
 # ───────────────────────────── snapshot / diff
 def _rewrite_metadata(container: Path, extra: Dict[str, Any], key: bytes) -> None:
-    with TemporaryDirectory() as tmp:
-        plain = Path(tmp) / "plain"
-        unpack_file(container, plain, key)
-        pack_file(plain, container, key, extra_meta=extra)
+    """Обновить JSON-заголовок без перешифрования payload (``key`` оставлен для совместимости API)."""
+    rewrite_header(container, extra)
+
 
+def _iter_plain(container: Path, key: bytes) -> Iterator[bytes]:
+    """Открытый текст контейнера любого формата (ZILANT, ZSTR, ZSNAP) блоками.
 
-def snapshot_container(container: Path, key: bytes, label: str) -> Path:
+    Для контейнера с дельта-записями это tar итогового дерева (нужна распаковка).
+    """
+    meta = _read_meta(container)
+    if has_delta_log(meta):
+        with TemporaryDirectory() as tmp:
+            tree, tar_path = Path(tmp) / "tree", Path(tmp) / "data.tar"
+            unpack_dir(container, tree, key)
+            with tarfile.open(tar_path, "w") as tar:
+                _tar_tree(tar, tree)
+            with tar_path.open("rb") as fh:
+                while block := fh.read(STREAM_CHUNK):
+                    yield block
+    elif is_snapshot(meta):
+        yield from iter_snapshot(container, key)
+    elif meta.get("magic") == "ZSTR":
+        with TemporaryDirectory() as tmp:
+            plain = Path(tmp) / "plain"
+            unpack_stream(container, plain, key)
+            with plain.open("rb") as fh:
+                while block := fh.read(STREAM_CHUNK):
+                    yield block
+    else:
+        yield from iter_plaintext(container, key)
+
+
+def snapshot_container(container: Path, key: bytes, label: str, store: Path | None = None) -> Path:
+    """Снимок на уровне CDC-чанков: пишутся только новые чанки и дельта списка ссылок.
+
+    Payload расшифровывается один раз; метаданные обновляются только в заголовке.
+    Чанки идут в ``store``, иначе в хранилище самого контейнера (для dedup-контейнера —
+    в его общее хранилище).
+    """
     if not container.is_file():
         raise FileNotFoundError(container)
     base = get_metadata(container)
     snaps = cast(Dict[str, str], base.get("snapshots", {}))
     ts = str(int(time.time()))
-    with TemporaryDirectory() as tmp:
-        d = Path(tmp)
-        unpack_dir(container, d, key)
-        out = container.with_name(f"{container.stem}_{label}{container.suffix}")
-        pack_dir(d, out, key)
-        _rewrite_metadata(
-            out,
-            {"label": label, "latest_snapshot_id": label, "snapshots": {**snaps, label: ts}},
-            key,
-        )
+    out = container.with_name(f"{container.stem}_{label}{container.suffix}")
+    parent = latest_snapshot(container)
+    if parent is not None and (parent == out or not is_snapshot(_read_meta(parent))):
+        parent = None
+    if store is None and is_snapshot(base):
+        store = snapshot_store(container, base)
+    write_snapshot(
+        out,
+        container,
+        _iter_plain(container, key),
+        key,
+        parent=parent,
+        store=store,
+        meta={
+            "label": label,
+            "latest_snapshot_id": label,
+            "snapshots": {**snaps, label: ts},
+            **({MANIFEST_FIELD: base[MANIFEST_FIELD]} if MANIFEST_FIELD in base else {}),
+        },
+    )
     _rewrite_metadata(
         container,
         {"latest_snapshot_id": label, "snapshots": {**snaps, label: ts}},
@@ -316,19 +604,43 @@ def snapshot_container(container: Path, key: bytes, label: str) -> Path:
     return out
 
 
+def _member_hashes(container: Path, key: bytes) -> Dict[str, str]:
+    """sha256 файлов контейнера без манифеста: tar читается потоком, на диск ничего не пишется."""
+    hashes: Dict[str, str] = {}
+    try:
+        with tarfile.open(fileobj=_BlockReader(_iter_plain(container, key)), mode="r|") as tar:  # type: ignore[call-overload]
+            for member in tar:
+                if not member.isreg():
+                    continue
+                h = sha256()
+                fh = tar.extractfile(member)
+                assert fh is not None
+                while block := fh.read(STREAM_CHUNK):
+                    h.update(block)
+                sparse = int(member.pax_headers.get("ZIL_SPARSE_SIZE", 0))
+                for left in range(sparse - member.size, 0, -STREAM_CHUNK):
+                    h.update(bytes(min(left, STREAM_CHUNK)))
+                hashes[os.path.normpath(member.name)] = h.hexdigest()
+    except InvalidTag as exc:  # pragma: no cover
+        raise ValueError("bad key or corrupted container") from exc
+    return hashes
+
+
+def _file_hashes(container: Path, key: bytes) -> Dict[str, str]:
+    if not container.is_file():
+        raise FileNotFoundError(container)
+    manifest = _open_manifest(_read_meta(container), key)
+    if manifest is None:
+        return _member_hashes(container, key)
+    return {name: entry[2] for name, entry in manifest.items()}
+
+
 def diff_snapshots(a: Path, b: Path, key: bytes) -> Dict[str, Tuple[str, str]]:
-    def _hash_tree(root: Path) -> Dict[str, str]:
-        r: Dict[str, str] = {}
-        for f in sorted(root.rglob("*")):
-            if f.is_file():
-                r[str(f.relative_to(root))] = sha256(f.read_bytes()).hexdigest()
-        return r
-
-    with TemporaryDirectory() as t1, TemporaryDirectory() as t2:
-        d1, d2 = Path(t1), Path(t2)
-        unpack_dir(a, d1, key)
-        unpack_dir(b, d2, key)
-        h1, h2 = _hash_tree(d1), _hash_tree(d2)
+    """Сравнить два контейнера/снимка по пофайловым манифестам, не расшифровывая содержимое.
+
+    Для контейнеров, записанных без манифеста, хэши считаются потоково по tar.
+    """
+    h1, h2 = _file_hashes(a, key), _file_hashes(b, key)
     return {
         name: (h1.get(name, ""), h2.get(name, "")) for name in sorted(set(h1) | set(h2)) if h1.get(name) != h2.get(name)
     }
@@ -336,7 +648,31 @@ def diff_snapshots(a: Path, b: Path, key: bytes) -> Dict[str, Tuple[str, str]]:
 
 # ───────────────────────────── основной класс FS
 class ZilantFS(Operations):  # type: ignore[misc]
-    """In-memory (FUSE-совместимая) FS для автотестов."""
+    """FUSE-операции поверх расшифрованного во временный каталог контейнера.
+
+    Монтируется :func:`mount_fs`; в тестах методы вызываются напрямую.
+    Запросы обслуживаются параллельно (многопоточный fusepy): ``read`` и
+    ``write`` — один ``pread``/``pwrite`` без общего смещения дескриптора.
+
+    ``lazy=True``: контейнер не распаковывается при монтировании. ``getattr`` и
+    ``readdir`` отвечают по индексу tar, ``read`` расшифровывает только нужные
+    чанки (LRU на ``cache_bytes``). Изменения пишутся в верхний слой
+    (copy-up в tmp-каталог), удаления — whiteout-ами; контейнер
+    перепаковывается в ``destroy`` только если что-то менялось.
+
+    Запись изменений (:meth:`flush_changes`, вызывается из ``destroy``):
+    изменённые и удалённые пути отслеживаются операциями FS (плюс сверка
+    stat верхнего слоя — для записи в ``root`` в обход FUSE) и дописываются
+    в контейнер дельта-записью; полная перепаковка — при размонтировании
+    после ``DELTA_MAX`` записей.
+
+    ``checkpoint_interval`` (сек.) включает фоновый поток, который делает
+    то же самое периодически и досрочно — как только записано
+    ``checkpoint_dirty_bytes``; шифрование и дозапись дельты ограничены
+    ``checkpoint_mb_s`` (:class:`RateLimiter`), чтобы не отнимать диск у
+    пользовательского I/O. Тогда после сбоя теряется не больше одного
+    интервала, а ``destroy`` дописывает только хвост изменений.
+    """
 
     def __init__(
         self,
@@ -345,10 +681,33 @@ class ZilantFS(Operations):  # type: ignore[misc]
         *,
         decoy_profile: str | None = None,
         force: bool = False,
+        lazy: bool = False,
+        cache_bytes: int = LAZY_CACHE_BYTES,
+        checkpoint_interval: float | None = None,
+        checkpoint_dirty_bytes: int = CHECKPOINT_DIRTY_BYTES,
+        checkpoint_mb_s: float = CHECKPOINT_MB_S,
     ) -> None:
         self.container = container
         self.password = password
         self.ro = False
+        self._lower: LazyTar | None = None
+        self._whiteouts: Set[str] = set()
+        self._virtual: Dict[int, str] = {}
+        self._fh_seq = itertools.count(_VIRTUAL_FH_BASE)
+        # замок открытого файла: запись данных (без pread/pwrite — и lseek+read/write на общем дескрипторе)
+        self._fh_locks: Dict[int, threading.Lock] = {}
+        self._changed: Set[str] = set()
+        self._deleted: Set[str] = set()
+        self._closed = False
+        self._dirty_bytes = 0
+        # _lock: пространство имён, пометки изменений и их снимок; _flush_lock: одна запись в контейнер за раз
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._checkpoint: threading.Thread | None = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.checkpoint_dirty_bytes = checkpoint_dirty_bytes
+        self._limiter = RateLimiter(checkpoint_mb_s, max(checkpoint_mb_s, 1.0))
         self._bytes_rw = 0
         self._start = time.time()
         self._tmp = TemporaryDirectory()
@@ -368,19 +727,252 @@ class ZilantFS(Operations):  # type: ignore[misc]
                 p.parent.mkdir(parents=True, exist_ok=True)
                 p.write_text(content, encoding="utf-8")
         elif container.exists():
-            try:
-                unpack_dir(container, self.root, password)
-            except Exception as exc:  # pragma: no cover
-                logger.warning("integrity_error:%s", exc)
-                self.ro = True
+            if lazy:
+                try:
+                    self._lower = open_lazy(container, password, cache_bytes)
+                    if self._lower is not None and has_delta_log(meta):
+                        _apply_deltas(container, password, self.root, self._whiteout)
+                except Exception as exc:
+                    logger.warning("lazy_mount_fallback:%s", exc)
+                    self._drop_lower()
+            if self._lower is None:
+                try:
+                    unpack_dir(container, self.root, password)
+                except Exception as exc:  # pragma: no cover
+                    logger.warning("integrity_error:%s", exc)
+                    self.ro = True
         else:
             self.root.mkdir(parents=True, exist_ok=True)
 
+        self._baseline = self._scan()
+        if checkpoint_interval is not None and not self.ro:
+            self._checkpoint = threading.Thread(
+                target=self._checkpoint_loop,
+                args=(checkpoint_interval,),
+                name="zilfs-checkpoint",
+                daemon=True,
+            )
+            self._checkpoint.start()
         ACTIVE_FS.append(self)
 
     def _full(self, path: str) -> str:
         return str(self.root / path.lstrip("/"))
 
+    # ─────────── lazy: верхний слой (self.root) поверх индекса tar (self._lower)
+    @staticmethod
+    def _rel(path: str) -> str:
+        return os.path.normpath(path.lstrip("/"))
+
+    def _hidden(self, rel: str) -> bool:
+        """Путь или один из его предков удалён (whiteout) из нижнего слоя."""
+        return _under(rel, self._whiteouts)
+
+    def _whiteout(self, rel: str) -> None:
+        """Пометка удаления из дельта-записи при lazy-монтировании."""
+        _remove_path(self.root / rel)
+        self._whiteouts.add(rel)
+
+    def _drop_lower(self) -> None:
+        """Отказ от lazy-режима: закрыть нижний слой и очистить верхний."""
+        if self._lower is not None:
+            self._lower.close()
+            self._lower = None
+        self._whiteouts.clear()
+        for child in self.root.iterdir():
+            _remove_path(child)
+
+    def _lower_entry(self, rel: str) -> tarfile.TarInfo | None:
+        if self._lower is None or self._hidden(rel):
+            return None
+        return self._lower.lookup(rel)
+
+    def _upper(self, path: str) -> bool:
+        return self._lower is None or os.path.lexists(self._full(path))
+
+    def _copy_up(self, rel: str) -> None:
+        """Перенести объект из нижнего слоя в верхний (вместе с родительскими каталогами)."""
+        dst = self.root / rel
+        if os.path.lexists(dst):
+            return
+        entry = self._lower_entry(rel)
+        if entry is None or self._lower is None:
+            raise FuseOSError(errno.ENOENT)
+        self._copy_up(os.path.dirname(rel) or ".")
+        if entry.isdir():
+            dst.mkdir()
+        elif entry.issym():
+            os.symlink(entry.linkname, dst)
+            return
+        else:
+            with dst.open("wb") as fh:
+                for block in self._lower.iter_file(rel):
+                    fh.write(block)
+        os.chmod(dst, entry.mode & 0o7777 | (0o700 if entry.isdir() else 0))
+        os.utime(dst, (entry.mtime, entry.mtime))
+
+    def _copy_up_tree(self, rel: str) -> None:
+        self._copy_up(rel)
+        if self._lower is not None:
+            for name in self._lower.listdir(rel):
+                child = os.path.normpath(os.path.join(rel, name))
+                if not self._hidden(child):
+                    self._copy_up_tree(child)
+
+    def _writable(self, path: str) -> None:
+        """Copy-up объекта перед изменением."""
+        self._touch(path)
+        if not self._upper(path):
+            self._copy_up(self._rel(path))
+
+    # ─────────── отслеживание изменений для дельта-записей
+    def _touch(self, path: str) -> None:
+        self._changed.add(self._rel(path))
+
+    def _forget(self, path: str) -> None:
+        """Путь удалён: пометка удаления, изменения под ним больше не нужны."""
+        rel = self._rel(path)
+        self._deleted.add(rel)
+        self._changed = {p for p in self._changed if not _under(p, {rel})}
+
+    def _scan(self) -> Dict[str, Tuple[int, int, int]]:
+        """stat верхнего слоя: {путь: (mode, size, mtime_ns)}."""
+        seen: Dict[str, Tuple[int, int, int]] = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for name in dirnames + filenames:
+                full = os.path.join(dirpath, name)
+                st = os.lstat(full)
+                seen[os.path.relpath(full, self.root)] = (st.st_mode, st.st_size, st.st_mtime_ns)
+        return seen
+
+    def _collect_changes(self, now: Dict[str, Tuple[int, int, int]] | None) -> Tuple[Set[str], Set[str]]:
+        """Изменения, отслеженные обработчиками FS; с ``now`` — и расхождения stat с прошлой записью."""
+        changed, deleted = set(self._changed), set(self._deleted)
+        if now is not None:
+            changed |= {rel for rel, st in now.items() if self._baseline.get(rel) != st}
+            deleted |= {rel for rel in self._baseline if rel not in now}
+        return {rel for rel in changed if os.path.lexists(self.root / rel)}, deleted
+
+    def _restat(self, changed: Set[str], deleted: Set[str]) -> Dict[str, Tuple[int, int, int]]:
+        """stat записываемых путей и их каталогов: снимок обновляется без обхода дерева."""
+        fresh: Dict[str, Tuple[int, int, int]] = {}
+        parents = {os.path.dirname(rel) for rel in changed | deleted} - {""}
+        for rel in changed | {p for p in parents if os.path.lexists(self.root / p)}:
+            st = os.lstat(self.root / rel)
+            fresh[rel] = (st.st_mode, st.st_size, st.st_mtime_ns)
+        return fresh
+
+    def _advance_baseline(self, fresh: Dict[str, Tuple[int, int, int]], deleted: Set[str]) -> None:
+        if deleted:
+            self._baseline = {rel: st for rel, st in self._baseline.items() if not _under(rel, deleted)}
+        self._baseline.update(fresh)
+
+    def _reset_changes(self, baseline: Dict[str, Tuple[int, int, int]]) -> None:
+        self._changed = set()
+        self._deleted = set()
+        self._dirty_bytes = 0
+        self._baseline = baseline
+
+    def _append_delta(
+        self,
+        meta: Dict[str, Any],
+        tar_path: Path,
+        files: Dict[str, List[Any]],
+        deleted: Set[str],
+        limiter: RateLimiter | None,
+    ) -> None:
+        updates: Dict[str, Any] = {}
+        manifest = _open_manifest(meta, self.password)
+        if manifest is not None:
+            manifest = {p: v for p, v in manifest.items() if not _under(p, deleted)}
+            manifest.update(files)
+            updates[MANIFEST_FIELD] = _seal_manifest(manifest, self.password)
+        with tar_path.open("rb") as fh:
+            src = cast(IO[bytes], _Throttled(fh, limiter)) if limiter is not None else fh
+            append_delta(self.container, self.password, src, tar_path.stat().st_size, updates)
+
+    @metrics.record_fs("flush")
+    def flush_changes(self, *, final: bool = False, limiter: RateLimiter | None = None) -> str:
+        """Записать изменения в контейнер: ``"none"``, ``"delta"`` или ``"full"``.
+
+        Изменённые пути дописываются дельта-записью. Полная перепаковка —
+        для нового контейнера, формата без дельт и после ``DELTA_MAX``
+        записей. Перешифровка всего тома под блокировкой FS остановила бы
+        все операции (а в lazy-режиме ещё и материализует дерево), поэтому
+        сжатие журнала откладывается до ``final`` (размонтирования, даже
+        без новых изменений), а фоновые контрольные точки дописывают дельты.
+
+        Изменённые пути отслеживают сами обработчики FS, так что контрольная
+        точка не обходит дерево. Только ``final`` один раз сверяет stat всего
+        верхнего слоя со снимком — чтобы не потерять запись в ``root`` в обход FS.
+
+        Операции FS блокируются только на время снимка изменённых файлов
+        в tar; шифрование и дозапись (с ``limiter``) идут параллельно с ними.
+        """
+        with self._flush_lock, TemporaryDirectory() as tmp:
+            tar_path = Path(tmp) / "delta.tar"
+            with self._lock:
+                if self.ro or self._closed:
+                    return "none"
+                exists = self.container.exists()
+                now = self._scan() if final else None
+                changed, deleted = self._collect_changes(now)
+                pending = bool(changed or deleted)
+                if exists and not pending and not final:
+                    return "none"
+                meta = _read_meta(self.container) if exists else {}
+                appendable = bool(meta) and is_appendable(meta)
+                # журнал не должен пережить размонтирование длиннее DELTA_MAX
+                full = not appendable or (final and delta_count(meta) + pending > DELTA_MAX)
+                if exists and not pending and not full:
+                    return "none"
+                if full:
+                    if self._lower is not None:
+                        self._copy_up_tree(".")
+                        self._lower.close()
+                        self._lower = None
+                        self._whiteouts.clear()
+                    if is_snapshot(meta):  # dedup-контейнер остаётся в своём хранилище
+                        pack_dir(self.root, self.container, self.password, store=snapshot_store(self.container, meta))
+                    elif os.getenv("ZILANT_STREAM") == "1":
+                        pack_dir_stream(self.root, self.container, self.password)
+                    else:
+                        pack_dir(self.root, self.container, self.password)
+                    self._reset_changes(self._scan())
+                    return "full"
+                files = _delta_tar(self.root, changed, deleted, tar_path)
+                fresh = self._restat(changed, deleted) if now is None else {}
+                saved = (self._changed, self._deleted, self._baseline)
+                self._reset_changes(self._baseline if now is None else now)
+            try:
+                self._append_delta(meta, tar_path, files, deleted, limiter)
+            except BaseException:
+                with self._lock:  # не записалось — изменения остаются в очереди
+                    self._changed |= saved[0]
+                    self._deleted |= saved[1]
+                    self._baseline = saved[2]
+                raise
+            if now is None:
+                with self._lock:
+                    self._advance_baseline(fresh, deleted)
+            return "delta"
+
+    def _checkpoint_loop(self, interval: float) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.flush_changes(limiter=self._limiter)
+            except Exception as exc:  # pragma: no cover - следующий интервал повторит попытку
+                logger.warning("checkpoint_failed:%s", exc)
+
+    def _fh_lock(self, fh: int) -> threading.Lock:
+        lock = self._fh_locks.get(fh)
+        if lock is None:
+            lock = self._fh_locks.setdefault(fh, threading.Lock())
+        return lock
+
     def _rw_check(self) -> None:
         if self.ro:
             raise FuseOSError(errno.EACCES)
@@ -391,16 +983,24 @@ class ZilantFS(Operations):  # type: ignore[misc]
         self._bytes_rw, self._start = 0, time.time()
         return mb / dur
 
+    @metrics.record_fs("destroy")
     def destroy(self, _p: str) -> None:
-        """Сериализовать tmp-каталог обратно в контейнер. Второй вызов — noop."""
-        if not self.ro:
-            try:
-                if os.getenv("ZILANT_STREAM") == "1":
-                    pack_dir_stream(self.root, self.container, self.password)
-                else:
-                    pack_dir(self.root, self.container, self.password)
-            except FileNotFoundError:  # pragma: no cover
-                pass
+        """Записать изменения в контейнер (:meth:`flush_changes`). Второй вызов — noop."""
+        if self._closed:
+            return
+        if self._checkpoint is not None:
+            self._stop.set()
+            self._wake.set()
+            self._checkpoint.join()
+            self._checkpoint = None
+        try:
+            self.flush_changes(final=True)
+        except FileNotFoundError:  # pragma: no cover
+            pass
+        self._closed = True
+        if self._lower is not None:
+            self._lower.close()
+            self._lower = None
         try:
             self._tmp.cleanup()
         except Exception:  # pragma: no cover
@@ -410,7 +1010,13 @@ class ZilantFS(Operations):  # type: ignore[misc]
         except ValueError:
             pass
 
+    @metrics.record_fs("getattr")
     def getattr(self, path: str, _fh: int | None = None) -> Dict[str, Any]:
+        if not self._upper(path):
+            entry = self._lower_entry(self._rel(path))
+            if entry is None or self._lower is None:
+                raise FuseOSError(errno.ENOENT)
+            return self._lower.stat(entry)
         st = os.lstat(self._full(path))
         keys = (
             "st_mode",
@@ -424,60 +1030,214 @@ class ZilantFS(Operations):  # type: ignore[misc]
         )
         return {k: getattr(st, k) for k in keys}
 
+    @metrics.record_fs("readdir")
     def readdir(self, path: str, _fh: int) -> List[str]:
-        return [".", "..", *os.listdir(self._full(path))]
+        if self._lower is None:
+            return [".", "..", *os.listdir(self._full(path))]
+        rel = self._rel(path)
+        full = self._full(path)
+        lower = self._lower_entry(rel)
+        if not os.path.isdir(full) and (lower is None or not lower.isdir()):
+            raise FuseOSError(errno.ENOENT)
+        names = set(os.listdir(full)) if os.path.isdir(full) else set()
+        if lower is not None and lower.isdir():
+            names.update(
+                n for n in self._lower.listdir(rel) if not self._hidden(os.path.normpath(os.path.join(rel, n)))
+            )
+        return [".", "..", *sorted(names)]
 
+    @metrics.record_fs("open")
+    @_locked
     def open(self, path: str, flags: int) -> int:
+        if flags & _WRITE_FLAGS:
+            self._touch(path)
+            if self._lower is not None:
+                self._writable(path)
+        elif not self._upper(path):
+            rel = self._rel(path)
+            entry = self._lower_entry(rel)
+            if entry is None or not (entry.isfile() or entry.islnk()):
+                raise FuseOSError(errno.ENOENT)
+            fh = next(self._fh_seq)
+            self._virtual[fh] = rel
+            return fh
         return os.open(self._full(path), flags)
 
+    @metrics.record_fs("create")
+    @_locked
     def create(self, path: str, mode: int, _fi: Any | None = None) -> int:
         self._rw_check()
+        self._touch(path)
+        if self._lower is not None:
+            self._copy_up(os.path.dirname(self._rel(path)) or ".")
         return os.open(self._full(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
 
+    @metrics.record_fs("read")
     def read(self, _p: str, size: int, offset: int, fh: int) -> bytes:
-        os.lseek(fh, offset, os.SEEK_SET)
-        data = os.read(fh, size)
+        rel = self._virtual.get(fh)
+        if rel is not None and self._lower is not None:
+            data = self._lower.read(rel, size, offset)
+        elif _HAS_PREAD:
+            data = os.pread(fh, size, offset)
+        else:  # pragma: no cover - Windows
+            with self._fh_lock(fh):
+                os.lseek(fh, offset, os.SEEK_SET)
+                data = os.read(fh, size)
         self._bytes_rw += len(data)
+        _BYTES_READ.inc(len(data))
         return data
 
+    @metrics.record_fs("write")
     def write(self, _p: str, data: bytes, offset: int, fh: int) -> int:
+        """Данные пишутся под замком открытого файла: запись в разные файлы идёт параллельно.
+
+        Путь помечается изменённым под общим ``_lock`` уже после записи, так что
+        снимок checkpoint-а, сделанный посреди неё, не снимет пометку.
+        """
         self._rw_check()
-        os.lseek(fh, offset, os.SEEK_SET)
-        written = os.write(fh, data)
+        with self._fh_lock(fh):
+            if _HAS_PREAD:
+                written = os.pwrite(fh, data, offset)
+            else:  # pragma: no cover - Windows
+                os.lseek(fh, offset, os.SEEK_SET)
+                written = os.write(fh, data)
         self._bytes_rw += written
+        with self._lock:
+            self._touch(_p)
+            self._dirty_bytes += written
+            if self._checkpoint is not None and self._dirty_bytes >= self.checkpoint_dirty_bytes:
+                self._wake.set()
+        _BYTES_WRITTEN.inc(written)
         return written
 
+    @metrics.record_fs("truncate")
     def truncate(self, path: str, length: int) -> None:
         self._rw_check()
+        if self._lower is not None:
+            with self._lock:  # copy-up меняет пространство имён
+                self._writable(path)
         _truncate_file(Path(self._full(path)), length)
-
+        with self._lock:
+            self._touch(path)
+
+    def _remove_lower(self, path: str) -> bool:
+        """Скрыть объект нижнего слоя; True, если он там был."""
+        rel = self._rel(path)
+        if self._lower_entry(rel) is None:
+            return False
+        self._whiteouts.add(rel)
+        return True
+
+    @_locked
     def unlink(self, path: str) -> None:  # pragma: no cover
         self._rw_check()
-        os.unlink(self._full(path))
+        self._forget(path)
+        if self._lower is None:
+            os.unlink(self._full(path))
+            return
+        upper = os.path.lexists(self._full(path))
+        if upper:
+            os.unlink(self._full(path))
+        if not self._remove_lower(path) and not upper:
+            raise FuseOSError(errno.ENOENT)
 
+    @_locked
     def mkdir(self, path: str, mode: int) -> None:  # pragma: no cover
         self._rw_check()
+        self._touch(path)
+        if self._lower is not None:
+            self._copy_up(os.path.dirname(self._rel(path)) or ".")
         os.mkdir(self._full(path), mode)
 
+    @_locked
     def rmdir(self, path: str) -> None:  # pragma: no cover
         self._rw_check()
-        os.rmdir(self._full(path))
-
+        if self._lower is None:
+            os.rmdir(self._full(path))
+            self._forget(path)
+            return
+        if self.readdir(path, 0)[2:]:
+            raise FuseOSError(errno.ENOTEMPTY)
+        self._forget(path)
+        if os.path.isdir(self._full(path)):
+            os.rmdir(self._full(path))
+        self._remove_lower(path)
+
+    @_locked
     def rename(self, old: str, new: str) -> None:  # pragma: no cover
         self._rw_check()
+        if self._lower is not None:
+            self._writable(old)
+            self._copy_up_tree(self._rel(old))
+            self._copy_up(os.path.dirname(self._rel(new)) or ".")
+            self._remove_lower(new)
+            self._remove_lower(old)
         os.rename(self._full(old), self._full(new))
+        self._forget(old)
+        self._forget(new)
+        self._touch(new)
+        for dirpath, dirnames, filenames in os.walk(self._full(new)):
+            for name in dirnames + filenames:
+                self._changed.add(os.path.relpath(os.path.join(dirpath, name), self.root))
 
     def flush(self, _p: str, fh: int) -> None:  # pragma: no cover
-        os.fsync(fh)
+        if fh not in self._virtual:
+            os.fsync(fh)
 
     def release(self, _p: str, fh: int) -> None:  # pragma: no cover
-        os.close(fh)
-
-
-# ───────────────────────────── stub-mount API
-def mount_fs(*_a: Any, **_kw: Any) -> None:  # pragma: no cover
-    raise RuntimeError("mount_fs not available in test build")
-
-
-def umount_fs(*_a: Any, **_kw: Any) -> None:  # pragma: no cover
-    raise RuntimeError("umount_fs not available in test build")
+        if self._virtual.pop(fh, None) is None:
+            self._fh_locks.pop(fh, None)
+            os.close(fh)
+
+
+# ───────────────────────────── mount API (fusepy)
+def mount_fs(
+    container: Path,
+    mountpoint: Path,
+    password: str | bytes,
+    *,
+    decoy_profile: str | None = None,
+    remote: str | None = None,
+    force: bool = False,
+    lazy: bool = False,
+    checkpoint_interval: float | None = None,
+    nothreads: bool = False,
+) -> None:
+    """Смонтировать контейнер через FUSE; возвращает управление после размонтирования.
+
+    fusepy обслуживает запросы в нескольких потоках (``nothreads=False``).
+    Изменения записываются в контейнер в ``destroy`` — его вызывает ядро
+    при ``umount_fs``; ``finally`` страхует выход FUSE с ошибкой.
+    """
+    if FUSE is None:
+        raise RuntimeError("mount_fs requires fusepy (pip install fusepy)")
+    if remote:
+        raise RuntimeError("remote containers are not supported")
+    key = password.encode() if isinstance(password, str) else password
+    fs = ZilantFS(
+        Path(container),
+        key,
+        decoy_profile=decoy_profile,
+        force=force,
+        lazy=lazy,
+        checkpoint_interval=checkpoint_interval,
+    )
+    Path(mountpoint).mkdir(parents=True, exist_ok=True)
+    try:
+        FUSE(fs, str(mountpoint), foreground=True, nothreads=nothreads, ro=fs.ro)
+    finally:
+        fs.destroy("/")
+
+
+def umount_fs(mountpoint: Path) -> None:
+    """Размонтировать ``mountpoint`` (``fusermount -u``; ``umount`` на macOS)."""
+    tool = shutil.which("fusermount3") or shutil.which("fusermount")
+    if tool is not None:
+        cmd = [tool, "-u", str(mountpoint)]
+    elif sys.platform == "darwin":  # pragma: no cover
+        cmd = ["umount", str(mountpoint)]
+    else:
+        raise RuntimeError("fusermount not found")
+    res = subprocess.run(cmd, capture_output=True, text=True)  # nosec
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr.strip() or f"{cmd[0]} exited with {res.returncode}")
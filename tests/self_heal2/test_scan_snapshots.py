@@ -0,0 +1,35 @@
+import json
+from click.testing import CliRunner
+
+import container
+from zilant_prime_core.cli import cli
+from zilant_prime_core.zilfs import pack_dir, snapshot_container, unpack_dir
+
+
+def test_heal_scan_leaves_snapshots_alone(tmp_path):
+    key = b"k" * 32
+    vol = tmp_path / "vol"
+    vol.mkdir()
+    (vol / "a.txt").write_text("hello")
+    cont = tmp_path / "vol.zil"
+    pack_dir(vol, cont, key)
+    snap = snapshot_container(cont, key, "s1")
+    assert snap.name == "vol_s1.zil"
+    assert container.verify_integrity(snap)
+    before = snap.read_bytes()
+
+    res = CliRunner().invoke(cli, ["heal-scan", str(tmp_path), "--auto", "--report", "json"])
+    assert res.exit_code == 0, res.output
+    assert {r["file"]: r["status"] for r in json.loads(res.output)} == {"vol.zil": "ok", "vol_s1.zil": "ok"}
+    assert snap.read_bytes() == before
+
+    # a broken snapshot is reported, but never re-packed as a container
+    snap.write_bytes(before[: before.find(b"\n\n") + 5])
+    res = CliRunner().invoke(cli, ["heal-scan", str(snap), "--auto", "--report", "json"])
+    assert res.exit_code == 4
+    assert json.loads(res.output.splitlines()[-1]) == [{"file": "vol_s1.zil", "status": "broken"}]
+    assert container.get_metadata(snap)["magic"] == "ZSNAP"
+
+    snap.write_bytes(before)
+    unpack_dir(snap, tmp_path / "out", key)
+    assert (tmp_path / "out" / "a.txt").read_text() == "hello"
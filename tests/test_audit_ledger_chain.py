@@ -0,0 +1,149 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import base64
+import json
+import pytest
+from click.testing import CliRunner
+from pathlib import Path
+
+import audit_ledger
+from audit_ledger import checkpoints, prove_inclusion, record_action, verify_inclusion, verify_ledger
+from zilant_prime_core.cli import cli
+
+LEDGER = Path("audit-ledger.jsonl")
+KEY = b"L" * 32
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(audit_ledger, "CHECKPOINT_EVERY", 8)
+    monkeypatch.setenv("ZILANT_LEDGER_KEY", base64.urlsafe_b64encode(KEY).decode())
+    audit_ledger._writer._state.clear()
+    with audit_ledger.batch():
+        for i in range(30):
+            record_action("evt", {"i": i})
+    return LEDGER
+
+
+def _rewrite(path, fn):
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    path.write_text("".join(fn(lines)), encoding="utf-8")
+    audit_ledger._writer._state.clear()
+
+
+def test_chain_and_checkpoints(ledger):
+    rows = [json.loads(x) for x in ledger.read_text().splitlines()]
+    assert [r["seq"] for r in rows] == list(range(30))
+    ckpts = checkpoints()
+    assert [(c["start"], c["end"]) for c in ckpts] == [(0, 8), (8, 16), (16, 24)]
+    assert all(c["alg"] == "hmac-sha256" for c in ckpts)
+    assert ckpts[1]["prev"] == ckpts[0]["mac"]
+    assert verify_ledger() and verify_ledger(full=True)
+
+    record_action("evt", {"i": 30})  # appends continue the chain from the cached head
+    record_action("evt", {"i": 31})
+    assert len(checkpoints()) == 4
+    assert verify_ledger(full=True)
+
+
+@pytest.mark.parametrize(
+    "tamper",
+    [
+        lambda lines: lines[:5] + lines[6:],  # deleted
+        lambda lines: lines[:5] + [lines[6], lines[5]] + lines[7:],  # reordered
+        lambda lines: lines[:5] + [lines[5].replace('"i":5', '"i":55')] + lines[6:],  # edited
+    ],
+)
+def test_full_verification_catches_tampering(ledger, tamper):
+    _rewrite(ledger, tamper)
+    assert not verify_ledger(full=True)
+
+
+def test_tail_is_verified_from_last_checkpoint(ledger):
+    _rewrite(ledger, lambda lines: lines[:26] + lines[27:])  # after the last checkpoint
+    assert not verify_ledger()
+    _rewrite(ledger, lambda lines: lines[:20])  # truncated below a checkpoint
+    assert not verify_ledger()
+
+
+def test_forged_checkpoint_needs_the_key(ledger, monkeypatch):
+    cp = ledger.with_suffix(".ckpt")
+    forged = [json.loads(x) for x in cp.read_text().splitlines()]
+    forged[-1]["root"] = "00" * 32
+    cp.write_text("".join(json.dumps(c) + "\n" for c in forged))
+    assert not verify_ledger()
+    monkeypatch.delenv("ZILANT_LEDGER_KEY")  # unverifiable signatures: full pass against the data
+    assert not verify_ledger()
+
+
+def test_unsigned_checkpoints_are_never_trusted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(audit_ledger, "CHECKPOINT_EVERY", 8)
+    monkeypatch.delenv("ZILANT_LEDGER_KEY", raising=False)
+    audit_ledger._writer._state.clear()
+    with audit_ledger.batch():
+        for i in range(20):
+            record_action("evt", {"i": i})
+    assert {c["alg"] for c in checkpoints()} == {"sha256"}
+
+    starts = []
+    entries_from = audit_ledger._entries_from
+    monkeypatch.setattr(audit_ledger, "_entries_from", lambda path, seq: starts.append(seq) or entries_from(path, seq))
+    assert verify_ledger()
+    assert starts == [0]  # anyone can recompute a plain hash: full pass
+
+    monkeypatch.setenv("ZILANT_LEDGER_KEY", base64.urlsafe_b64encode(KEY).decode())
+    assert not verify_ledger()  # with a key, an unsigned checkpoint is a forgery
+    assert not verify_inclusion(prove_inclusion(3))
+
+
+@pytest.mark.parametrize("last", [27, 29])
+def test_chain_fields_cannot_be_dropped(ledger, last):
+    def strip(line):
+        return line.split(',"seq":')[0] + "}\n"
+
+    _rewrite(ledger, lambda lines: lines[:26] + [strip(x) for x in lines[26:last]] + lines[last:])
+    assert not verify_ledger()
+    assert not verify_ledger(full=True)
+
+
+def test_inclusion_proof(ledger):
+    proof = prove_inclusion(13)
+    assert proof["entry"]["params"] == {"i": 13}
+    assert len(proof["path"]) == 3  # log2 of the segment size
+    assert verify_inclusion(proof)
+    assert not verify_inclusion(proof, key=b"x" * 32)
+    proof["entry"]["params"]["i"] = 14
+    assert not verify_inclusion(proof)
+    with pytest.raises(ValueError, match="not covered"):
+        prove_inclusion(29)
+
+
+def test_legacy_ledger_is_chained_on_next_append(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    audit_ledger._writer._state.clear()
+    for i in range(3):  # the pre-chain format: no seq, no chain
+        head, _ = audit_ledger._serialize({"timestamp": 1, "action": "old", "params": {"i": i}})
+        with LEDGER.open("a") as fh:
+            fh.write(head + "}\n")
+    record_action("new", {})
+    assert json.loads(LEDGER.read_text().splitlines()[-1])["seq"] == 3
+    assert verify_ledger(full=True)
+
+
+def test_cli_verify_and_prove(ledger):
+    runner = CliRunner()
+    res = runner.invoke(cli, ["--output", "json", "ledger", "verify", "--full"])
+    assert res.exit_code == 0 and json.loads(res.output) == {"valid": True}
+    res = runner.invoke(cli, ["ledger", "prove", "3"])
+    assert res.exit_code == 0 and verify_inclusion(json.loads(res.output))
+    res = runner.invoke(cli, ["audit", "verify"])
+    assert res.exit_code == 0
+    res = runner.invoke(cli, ["audit", "verify", "--full"])
+    assert res.exit_code == 0
+
+    _rewrite(ledger, lambda lines: lines[1:])
+    res = runner.invoke(cli, ["ledger", "verify", "--full"])
+    assert res.exit_code == 1 and "corrupted" in res.output
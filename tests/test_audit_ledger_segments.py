@@ -0,0 +1,119 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import json
+import pytest
+import zstandard
+from click.testing import CliRunner
+from pathlib import Path
+
+import audit_ledger
+from audit_ledger import prove_inclusion, query, record_action, verify_inclusion, verify_ledger
+from zilant_prime_core.cli import cli
+
+LEDGER = Path("audit-ledger.jsonl")
+
+
+@pytest.fixture
+def small(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(audit_ledger, "INDEX_BLOCK", 16)
+    monkeypatch.setattr(audit_ledger, "CHECKPOINT_EVERY", 32)
+    monkeypatch.setattr(audit_ledger, "SEGMENT_MAX_BYTES", 8 * 1024)
+    monkeypatch.setattr(audit_ledger._writer, "max_entries", 8)  # many group commits
+    audit_ledger._writer._state.clear()
+    return tmp_path
+
+
+def _fill(n, start=0):
+    with audit_ledger.batch():
+        for i in range(start, start + n):
+            record_action("purge" if i % 10 == 0 else "scan", {"file": f"f{i}.zil", "i": i})
+
+
+def _seqs(lines):
+    return [json.loads(x)["seq"] for x in lines]
+
+
+def test_rotation_keeps_one_ledger(small):
+    _fill(200)
+    segments = sorted(small.glob("audit-ledger.*.jsonl.zst"))
+    assert len(segments) >= 2
+    # closed segments are plain multi-frame zstd files
+    first = zstandard.ZstdDecompressor().decompressobj().decompress(segments[0].read_bytes())
+    assert json.loads(first.splitlines()[0])["seq"] == 0
+    assert _seqs(query()) == list(range(200))
+    assert verify_ledger(full=True) and verify_ledger()
+    assert verify_inclusion(prove_inclusion(5))  # a checkpoint inside a closed segment
+
+    audit_ledger._writer._state.clear()  # another process: the head comes from disk
+    _fill(10, 200)
+    assert _seqs(query(last=3)) == [207, 208, 209]
+    assert verify_ledger(full=True)
+
+
+def test_filters_skip_blocks_by_index(small, monkeypatch):
+    _fill(200)
+    loaded = []
+    real = audit_ledger._load_block
+
+    def spy(data, rec, closed):
+        loaded.append(rec["seq"])
+        return real(data, rec, closed)
+
+    monkeypatch.setattr(audit_ledger, "_load_block", spy)
+    rows = [json.loads(x) for x in query(file="f37.zil")]
+    assert [r["params"]["i"] for r in rows] == [37]
+    assert len(loaded) <= 2  # the Bloom filter rules out (almost) every other block
+
+    loaded.clear()
+    assert [json.loads(x)["params"]["i"] for x in query(action="purge", last=3)] == [170, 180, 190]
+    loaded.clear()
+    assert _seqs(query(last=5)) == list(range(195, 200))
+    assert len(loaded) <= 1
+
+
+def test_since_filter(small, monkeypatch):
+    clock = iter(range(1000, 2000, 10))
+    monkeypatch.setattr(audit_ledger.time, "time", lambda: next(clock))
+    _fill(100)
+    rows = [json.loads(x) for x in query(since=1500)]
+    assert rows and all(r["timestamp"] >= 1500 for r in rows)
+    assert rows[0]["timestamp"] == 1500
+
+
+def test_age_based_rotation(small, monkeypatch):
+    monkeypatch.setattr(audit_ledger, "SEGMENT_MAX_AGE", 60)
+    now = [1000.0]
+    monkeypatch.setattr(audit_ledger.time, "time", lambda: now[0])
+    record_action("a", {})
+    assert not list(small.glob("*.zst"))
+    now[0] += 61
+    record_action("b", {})
+    assert len(list(small.glob("*.zst"))) == 1 and not LEDGER.exists()
+    record_action("c", {})
+    assert [json.loads(x)["action"] for x in query()] == ["a", "b", "c"]
+    assert verify_ledger(full=True)
+
+
+def test_tampered_closed_segment_is_detected(small):
+    _fill(200)
+    seg = sorted(small.glob("audit-ledger.*.idx"))[0]
+    recs = [json.loads(x) for x in seg.read_text().splitlines()]
+    del recs[1]  # hide a block from the index
+    seg.write_text("".join(json.dumps(r) + "\n" for r in recs))
+    assert not verify_ledger(full=True)
+
+
+def test_cli_show_filters(small):
+    _fill(60)
+    runner = CliRunner()
+    res = runner.invoke(cli, ["ledger", "show", "--action", "purge", "--last", "0"])
+    assert res.exit_code == 0, res.output
+    assert [json.loads(x)["params"]["i"] for x in res.output.splitlines()] == [0, 10, 20, 30, 40, 50]
+    res = runner.invoke(cli, ["ledger", "show", "--file", "f7.zil"])
+    assert [json.loads(x)["seq"] for x in res.output.splitlines()] == [7]
+    res = runner.invoke(cli, ["ledger", "show", "--since", "2000-01-01T00:00:00", "--last", "2"])
+    assert _seqs(res.output.splitlines()) == [58, 59]
+    res = runner.invoke(cli, ["ledger", "show", "--since", "yesterday"])
+    assert res.exit_code != 0 and "not a date" in res.output
@@ -0,0 +1,107 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import hashlib
+import json
+import multiprocessing
+import os
+import pytest
+from pathlib import Path
+
+import audit_ledger
+from audit_ledger import LedgerWriter
+
+
+def _lines(path=Path("audit-ledger.jsonl")):
+    return path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+
+
+def _put(writer, path, i):
+    writer.append(path, *audit_ledger._serialize({"timestamp": 0, "action": "t", "params": {"i": i}}))
+
+
+def _seen(path):
+    return [json.loads(x)["params"]["i"] for x in _lines(path)]
+
+
+def test_batch_defers_until_exit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with audit_ledger.batch():
+        for i in range(10):
+            audit_ledger.record_action("burst", {"i": i})
+        assert _lines() == []
+    lines = [json.loads(x) for x in _lines()]
+    assert [e["params"]["i"] for e in lines] == list(range(10))
+    for entry in lines:
+        base = {k: entry[k] for k in ("timestamp", "action", "params")}
+        assert (
+            entry["sha256"]
+            == hashlib.sha256(json.dumps(base, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+        )
+
+
+def test_size_and_time_thresholds(tmp_path, monkeypatch):
+    writer = LedgerWriter(max_entries=4, max_delay=3600)
+    path = tmp_path / "l.jsonl"
+    with writer.batch():
+        for i in range(6):
+            _put(writer, path, i)
+        assert _seen(path) == [0, 1, 2, 3]  # one group of four, two still queued
+        writer.max_delay = 0
+        _put(writer, path, 6)
+        assert len(_seen(path)) == 7
+        _put(writer, path, 7)
+        writer.flush()
+        assert _seen(path) == list(range(8))
+
+
+def test_queue_follows_working_directory(tmp_path, monkeypatch):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    with audit_ledger.batch():
+        monkeypatch.chdir(a)
+        audit_ledger.record_action("A", {})
+        monkeypatch.chdir(b)
+        audit_ledger.record_action("B", {})
+    assert [json.loads(x)["action"] for x in _lines(a / "audit-ledger.jsonl")] == ["A"]
+    assert [json.loads(x)["action"] for x in _lines(b / "audit-ledger.jsonl")] == ["B"]
+
+
+def test_fsync_policy(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(os, "fsync", lambda fd: calls.append(fd))
+    writer = LedgerWriter(fsync=True)
+    with writer.batch():
+        for i in range(5):
+            _put(writer, tmp_path / "l.jsonl", i)
+    assert len(calls) == 1  # one group commit, one fsync
+
+
+def _writer_proc(path, tag):
+    writer = LedgerWriter(max_entries=50)
+    with writer.batch():
+        for i in range(500):
+            writer.append(
+                Path(path), *audit_ledger._serialize({"timestamp": 0, "action": str(tag), "params": {"i": i}})
+            )
+
+
+@pytest.mark.skipif(audit_ledger.fcntl is None, reason="flock is POSIX-only")
+def test_concurrent_processes_keep_one_chain(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_ledger, "CHECKPOINT_EVERY", 128)
+    monkeypatch.setattr(audit_ledger, "INDEX_BLOCK", 64)
+    monkeypatch.setattr(audit_ledger, "SEGMENT_MAX_BYTES", 64 * 1024)  # rotations race with waiting writers
+    path = tmp_path / "l.jsonl"
+    procs = [multiprocessing.Process(target=_writer_proc, args=(str(path), t)) for t in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    rows = [json.loads(x) for x in audit_ledger.query(path)]
+    assert [r["seq"] for r in rows] == list(range(2000))
+    assert len(list(tmp_path.glob("l.*.jsonl.zst"))) > 3
+    for tag in range(4):
+        assert [r["params"]["i"] for r in rows if r["action"] == str(tag)] == list(range(500))
+    assert [c["end"] for c in audit_ledger.checkpoints(path)] == [128 * k for k in range(1, 16)]
+    assert audit_ledger.verify_ledger(path, full=True)
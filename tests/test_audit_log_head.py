@@ -0,0 +1,101 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import base64
+import hashlib
+import json
+import pytest
+
+from key_lifecycle import AuditLog
+
+
+def _no_tail(self, size):
+    raise AssertionError("tail read")
+
+
+def test_appends_use_the_cached_head(tmp_path, monkeypatch):
+    log = AuditLog(tmp_path / "audit.log")
+    log.append_event("first")
+    monkeypatch.setattr(AuditLog, "_tail_digest", _no_tail)
+    monkeypatch.setattr(type(log.path), "read_bytes", _no_tail)
+    for i in range(50):
+        log.append_event(f"e{i}")
+    assert AuditLog(log.path)._last_digest() == log._last_digest()  # a fresh instance trusts the sidecar
+    monkeypatch.undo()
+    assert log.verify_log()
+    assert len(log.path.read_text().splitlines()) == 51
+
+
+def test_stale_or_missing_sidecar_falls_back_to_the_tail(tmp_path, monkeypatch):
+    path = tmp_path / "audit.log"
+    log = AuditLog(path)
+    log.append_event("a")
+    other = AuditLog(path)
+    other.head_path.unlink()
+    other.append_event("b" * 10_000)  # a line longer than several tail blocks
+    monkeypatch.setattr(AuditLog, "_TAIL_BLOCK", 64)
+    log.append_event("c")  # the in-memory head is stale: size changed
+    assert log.verify_log()
+
+    log.head_path.write_text("garbage")
+    digest = hashlib.sha256(bytes.fromhex(path.read_text().splitlines()[-1].split()[0]) + b"d").digest()
+    AuditLog(path).append_event("d")
+    assert path.read_text().splitlines()[-1] == f"{digest.hex()} d"
+
+
+@pytest.mark.parametrize("content", ["", "\n", "nothex evt\n"])
+def test_unusable_tail_restarts_the_chain(tmp_path, content):
+    path = tmp_path / "audit.log"
+    path.write_text(content)
+    assert AuditLog(path)._last_digest() == b""
+
+
+def test_verify_resumes_from_signed_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setenv("ZILANT_LEDGER_KEY", base64.urlsafe_b64encode(b"L" * 32).decode())
+    monkeypatch.setattr(AuditLog, "_CHECKPOINT_BYTES", 256)
+    path = tmp_path / "audit.log"
+    log = AuditLog(path)
+    for i in range(40):
+        log.append_event(f"event {i:03d}")
+    ckpts = [json.loads(x) for x in log.ckpt_path.read_text().splitlines()]
+    assert len(ckpts) > 5 and ckpts[1]["prev"] == ckpts[0]["mac"]
+    assert AuditLog(path).verify_log() and AuditLog(path).verify_log(full=True)
+
+    # a bad line before the last checkpoint is only seen by a full pass
+    lines = path.read_text().splitlines(keepends=True)
+    lines[3] = lines[3].replace("event 003", "event 333")
+    path.write_text("".join(lines))
+    assert AuditLog(path).verify_log()
+    assert not AuditLog(path).verify_log(full=True)
+    signed = len(path.read_bytes()[: ckpts[-1]["offset"]].splitlines())
+    for i in (signed, len(lines) - 1):  # the signed line itself and anything after it
+        edited = lines[:i] + [lines[i].replace(f"event {i:03d}", "event 999")] + lines[i + 1 :]
+        path.write_text("".join(edited))
+        assert not AuditLog(path).verify_log()
+
+
+def test_checkpoints_need_the_key(tmp_path, monkeypatch):
+    monkeypatch.setenv("ZILANT_LEDGER_KEY", base64.urlsafe_b64encode(b"L" * 32).decode())
+    monkeypatch.setattr(AuditLog, "_CHECKPOINT_BYTES", 256)
+    path = tmp_path / "audit.log"
+    for i in range(40):
+        AuditLog(path).append_event(f"event {i:03d}")
+    ckpt_path = AuditLog(path).ckpt_path
+    good = ckpt_path.read_text()
+
+    forged = [json.loads(x) for x in good.splitlines()]
+    forged[-1]["offset"] += 75  # skip a line
+    ckpt_path.write_text("".join(json.dumps(c) + "\n" for c in forged))
+    assert not AuditLog(path).verify_log()
+
+    ckpt_path.write_text(good)
+    path.write_text(path.read_text()[:-30])  # truncated below the last checkpoint
+    assert not AuditLog(path).verify_log()
+
+    monkeypatch.delenv("ZILANT_LEDGER_KEY")  # nothing is trusted: full pass, no new checkpoints
+    path.write_text("")
+    log = AuditLog(path)
+    for i in range(40):
+        log.append_event(f"event {i:03d}")
+    assert log.verify_log()
+    assert ckpt_path.read_text() == good
@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import json
+from click.testing import CliRunner
+
+from zilant_prime_core import bench_suite
+from zilant_prime_core.cli import cli
+
+
+def test_every_quick_case_runs():
+    doc = bench_suite.run_suite(quick=True, repeat=1)
+    names = {c.name for c in bench_suite.CASES if c.quick}
+    assert set(doc["results"]) == names
+    for prefix in ("stream.pack", "stream.unpack", "container.pack[classic", "kdf.", "zilfs.", "ledger.", "heal."):
+        assert any(n.startswith(prefix) for n in names)
+    for name, res in doc["results"].items():
+        if "skipped" in res:
+            assert "[pq," in name  # only the optional pq backend may be missing
+            continue
+        assert res["seconds"] > 0
+        assert ("mb_s" in res) or ("ops_s" in res)
+    assert doc["suite"] == bench_suite.SUITE_VERSION
+
+
+def test_compare_flags_only_real_regressions():
+    base = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "c": {"seconds": 1.0}, "gone": {"seconds": 1.0}}}
+    now = {
+        "results": {
+            "a": {"seconds": 1.05},
+            "b": {"seconds": 1.5},
+            "c": {"skipped": "no backend"},
+            "new": {"seconds": 9.0},
+        }
+    }
+    regs = bench_suite.compare(now, base, threshold=0.10)
+    assert [r["case"] for r in regs] == ["b"]
+    assert abs(regs[0]["change"] - 0.5) < 1e-9
+    assert bench_suite.compare(now, base, threshold=0.6) == []
+
+
+def test_cli_suite_save_and_gate(tmp_path):
+    runner = CliRunner()
+    saved = tmp_path / "baseline.json"
+    args = ["bench", "--suite", "-k", "kdf.hkdf_pq", "--repeat", "1"]
+    res = runner.invoke(cli, [*args, "--save", str(saved)])
+    assert res.exit_code == 0, res.output
+    assert "kdf.hkdf_pq" in res.output and "op/s" in res.output
+    doc = json.loads(saved.read_text())
+    assert list(doc["results"]) == ["kdf.hkdf_pq"]
+
+    res = runner.invoke(cli, [*args, "--baseline", str(saved), "--threshold", "10"])
+    assert res.exit_code == 0, res.output
+
+    doc["results"]["kdf.hkdf_pq"]["seconds"] /= 100  # pretend the baseline was much faster
+    saved.write_text(json.dumps(doc))
+    res = runner.invoke(cli, [*args, "--baseline", str(saved)])
+    assert res.exit_code == 1
+    assert "REGRESSION kdf.hkdf_pq" in res.output
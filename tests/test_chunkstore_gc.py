@@ -0,0 +1,207 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import json
+import os
+import pytest
+import random
+from click.testing import CliRunner
+
+import zilant_prime_core.chunkstore as cs
+import zilant_prime_core.zilfs as zilfs
+from zilant_prime_core.cli import cli
+
+KEY = b"k" * 32
+
+
+@pytest.fixture(autouse=True)
+def small_cdc(monkeypatch):
+    monkeypatch.setattr(cs, "CDC_RUN", 6)
+    monkeypatch.setattr(cs, "CDC_MIN", 1024)
+    monkeypatch.setattr(cs, "CDC_MAX", 16 * 1024)
+    monkeypatch.setattr(cs.cdc_split, "__defaults__", (1024, 16 * 1024, 6))
+
+
+def _fill(d, seed, n=6, size=20_000):
+    d.mkdir(exist_ok=True)
+    rnd = random.Random(seed)
+    for i in range(n):
+        (d / f"f{i}.bin").write_bytes(bytes(rnd.getrandbits(8) for _ in range(size)))
+
+
+def _chunks(store):
+    return {p.name for p in store.glob("*/*")}
+
+
+def _index(store):
+    return json.loads((store / cs.INDEX_NAME).read_text())
+
+
+def _snapshots(tmp_path, cont, d, labels):
+    snaps = []
+    for i, label in enumerate(labels):
+        (d / f"f{i}.bin").write_bytes(os.urandom(20_000))
+        zilfs.pack_dir(d, cont, KEY)
+        snaps.append(zilfs.snapshot_container(cont, KEY, label))
+    return snaps
+
+
+def test_remove_snapshots_and_gc(tmp_path):
+    d = tmp_path / "vol"
+    _fill(d, 1)
+    cont = tmp_path / "vol.zil"
+    snaps = _snapshots(tmp_path, cont, d, ["s1", "s2", "s3", "s4"])
+    store = cs.store_path(cont)
+    index = _index(store)
+    assert sorted(index["owners"]) == [f"../{s.name}" for s in snaps]
+    assert index["owners"]["../vol_s2.zil"]["parent"] == "../vol_s1.zil"
+    expected = {}
+    for s in snaps[2:]:
+        zilfs.unpack_dir(s, tmp_path / s.stem, KEY)
+        expected[s] = {p.name: p.read_bytes() for p in (tmp_path / s.stem).iterdir()}
+
+    before = _chunks(store)
+    assert cs.gc(store, KEY, grace=0)["removed"] == 0  # everything is referenced
+
+    cs.remove_snapshot(snaps[0], KEY)
+    cs.remove_snapshot(snaps[1], KEY)  # s3 was a delta against s2: it gets a full manifest
+    assert not snaps[1].exists()
+    assert cs.snapshot_refs(snaps[2], KEY)[1]["parent"] is None
+    stats = cs.gc(store, KEY, grace=0)
+    assert stats["removed"] > 0 and stats["freed_bytes"] > 0
+    assert stats["snapshots"] == 2
+    assert _chunks(store) < before
+    assert set(_index(store)["refs"]) == _chunks(store)
+
+    for s, files in expected.items():
+        out = tmp_path / f"again-{s.stem}"
+        zilfs.unpack_dir(s, out, KEY)
+        assert {p.name: p.read_bytes() for p in out.iterdir()} == files
+
+
+def test_gc_grace_keeps_fresh_chunks(tmp_path):
+    d = tmp_path / "vol"
+    _fill(d, 2, n=2)
+    cont = tmp_path / "vol.zil"
+    zilfs.pack_dir(d, cont, KEY)
+    snap = zilfs.snapshot_container(cont, KEY, "s1")
+    store = cs.store_path(cont)
+    cs.remove_snapshot(snap, KEY)
+    assert cs.gc(store, KEY)["removed"] == 0  # default grace: just written
+    assert cs.gc(store, KEY, grace=0)["chunks"] == 0
+
+
+def test_hand_deleted_snapshot_triggers_rebuild(tmp_path):
+    d = tmp_path / "vol"
+    _fill(d, 3)
+    cont = tmp_path / "vol.zil"
+    snaps = _snapshots(tmp_path, cont, d, ["s1", "s2"])
+    store = cs.store_path(cont)
+    snaps[0].unlink()  # s2 is a delta against it, but that is the user's problem now
+
+    with pytest.raises(ValueError, match="vol_s2"):
+        cs.gc(store, KEY, grace=0)
+    snaps[1].unlink()
+    cs.gc(store, KEY, grace=0)
+    assert _chunks(store) == set()
+    assert _index(store)["owners"] == {}
+
+
+def test_gc_with_wrong_key_deletes_nothing(tmp_path):
+    d = tmp_path / "vol"
+    _fill(d, 4)
+    cont = tmp_path / "vol.zil"
+    zilfs.pack_dir(d, cont, KEY)
+    zilfs.snapshot_container(cont, KEY, "s1")
+    store = cs.store_path(cont)
+    (store / cs.INDEX_NAME).unlink()  # a store from before the index: rebuilt from the manifests
+    before = _chunks(store)
+    with pytest.raises(ValueError, match="refusing"):
+        cs.gc(store, b"x" * 32, grace=0)
+    assert _chunks(store) == before
+    assert cs.gc(store, KEY, grace=0)["removed"] == 0
+    assert list(_index(store)["owners"]) == ["../vol_s1.zil"]
+
+
+def test_dedup_containers_share_one_store(tmp_path):
+    shared = tmp_path / "pool.chunks"
+    a, b = tmp_path / "a", tmp_path / "b"
+    _fill(a, 5)
+    _fill(b, 5)
+    (b / "extra.txt").write_text("only in b")
+    zilfs.pack_dir(a, tmp_path / "a.zil", KEY, store=shared)
+    alone = len(_chunks(shared))
+    zilfs.pack_dir(b, tmp_path / "b.zil", KEY, store=shared)
+    assert len(_chunks(shared)) - alone < alone // 10  # b adds only the chunks around tar headers
+
+    for name, src in (("a", a), ("b", b)):
+        out = tmp_path / f"out-{name}"
+        zilfs.unpack_dir(tmp_path / f"{name}.zil", out, KEY)
+        assert {p.name: p.read_bytes() for p in out.iterdir()} == {p.name: p.read_bytes() for p in src.iterdir()}
+    assert set(zilfs.diff_snapshots(tmp_path / "a.zil", tmp_path / "b.zil", KEY)) == {"extra.txt"}
+
+    # snapshots of a dedup container and write-back through ZilantFS stay in the shared store
+    snap = zilfs.snapshot_container(tmp_path / "a.zil", KEY, "s1")
+    assert cs.snapshot_store(snap).resolve() == shared.resolve()
+    fs = zilfs.ZilantFS(tmp_path / "a.zil", KEY, force=True)  # the live container is past its snapshot
+    fh = fs.create("/new.txt", 0o644)
+    fs.write("/new.txt", b"hello", 0, fh)
+    fs.release("/new.txt", fh)
+    fs.destroy("/")
+    meta = zilfs.get_metadata(tmp_path / "a.zil")
+    assert meta["magic"] == cs.ZSNAP_MAGIC and meta["store"] == "pool.chunks"
+    assert sorted(_index(shared)["owners"]) == ["../a.zil", "../a_s1.zil", "../b.zil"]
+
+    cs.gc(shared, KEY, grace=0)
+    for name in ("a.zil", "a_s1.zil", "b.zil"):
+        zilfs.unpack_dir(tmp_path / name, tmp_path / f"check-{name}", KEY)
+    assert (tmp_path / "check-a.zil" / "new.txt").read_bytes() == b"hello"
+    assert not (tmp_path / "check-a_s1.zil" / "new.txt").exists()
+
+
+def test_shared_store_without_index_is_not_collected(tmp_path):
+    shared = tmp_path / "pool.chunks"
+    for seed, name in enumerate(("x", "y")):
+        _fill(tmp_path / f"src-{name}", seed)
+        (tmp_path / name).mkdir()  # containers in other directories than the store
+        zilfs.pack_dir(tmp_path / f"src-{name}", tmp_path / name / f"{name}.zil", KEY, store=shared)
+    assert (shared / cs.SHARED_NAME).exists()
+    before = _chunks(shared)
+    (shared / cs.INDEX_NAME).unlink()
+    with pytest.raises(ValueError, match="shared"):
+        cs.gc(shared, KEY, grace=0)
+    assert _chunks(shared) == before
+    zilfs.unpack_dir(tmp_path / "x" / "x.zil", tmp_path / "out", KEY)
+
+    # snapshots next to their own store never mark it shared
+    d = tmp_path / "vol"
+    _fill(d, 9, n=2)
+    zilfs.pack_dir(d, tmp_path / "vol.zil", KEY)
+    zilfs.snapshot_container(tmp_path / "vol.zil", KEY, "s1")
+    assert not (cs.store_path(tmp_path / "vol.zil") / cs.SHARED_NAME).exists()
+
+
+def test_cli_store_rm_and_gc(tmp_path):
+    d = tmp_path / "vol"
+    _fill(d, 6, n=3)
+    cont = tmp_path / "vol.zil"
+    zilfs.pack_dir(d, cont, KEY)
+    shared = tmp_path / "pool"
+    runner = CliRunner()
+    res = runner.invoke(
+        cli, ["snapshot", str(cont), "--label", "s1", "--store", str(shared), "--password", KEY.decode()]
+    )
+    assert res.exit_code == 0, res.output
+    snap = tmp_path / "vol_s1.zil"
+    assert cs.snapshot_store(snap).resolve() == shared.resolve()
+
+    res = runner.invoke(cli, ["store", "rm", str(snap), "--password", KEY.decode()])
+    assert res.exit_code == 0 and "removed vol_s1.zil" in res.output
+    res = runner.invoke(
+        cli, ["--output", "json", "store", "gc", str(shared), "--grace", "0", "--password", KEY.decode()]
+    )
+    assert res.exit_code == 0, res.output
+    stats = json.loads(res.output)
+    assert stats["removed"] > 0 and stats["chunks"] == 0
+    res = runner.invoke(cli, ["store", "gc", str(shared), "--password", KEY.decode()])
+    assert res.output.startswith("removed 0 chunks")
@@ -0,0 +1,133 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import json
+import os
+import pytest
+import stat
+from click.testing import CliRunner
+
+from container import get_metadata, pack_many, unpack_many
+from utils.pipeline import ordered_map
+from zilant_prime_core.cli import cli
+
+KEY = b"k" * 32
+
+
+def _square(x: int) -> int:
+    return x * x
+
+
+def test_ordered_map_processes():
+    assert list(ordered_map(_square, range(20), 2, processes=True)) == [x * x for x in range(20)]
+
+
+def test_pack_unpack_many_roundtrip(tmp_path):
+    srcs = []
+    for i in range(6):
+        f = tmp_path / f"f{i}.txt"
+        f.write_bytes(f"data-{i}".encode() * (i + 1))
+        srcs.append(f)
+    jobs = [(f, f.with_suffix(".zil")) for f in srcs]
+
+    results = list(pack_many(jobs, KEY, workers=2))
+    assert [r["src"] for r in results] == [str(f) for f in srcs]
+    assert all(r["ok"] and r["bytes"] > 0 for r in results)
+
+    out = tmp_path / "out"
+    out.mkdir()
+    back = list(unpack_many([(dst, out / src.name) for src, dst in jobs], KEY, workers=2))
+    assert all(r["ok"] for r in back)
+    for f in srcs:
+        assert (out / f.name).read_bytes() == f.read_bytes()
+
+
+def test_batch_outputs_are_private(tmp_path):
+    src = tmp_path / "secret.txt"
+    src.write_bytes(b"plaintext")
+    old = os.umask(0o022)
+    try:
+        assert list(pack_many([(src, tmp_path / "s.zil")], KEY, workers=1))[0]["ok"]
+        assert list(unpack_many([(tmp_path / "s.zil", tmp_path / "back.txt")], KEY, workers=1))[0]["ok"]
+    finally:
+        os.umask(old)
+    assert stat.S_IMODE((tmp_path / "s.zil").stat().st_mode) == 0o600
+    assert stat.S_IMODE((tmp_path / "back.txt").stat().st_mode) == 0o600
+
+
+def test_batch_errors_do_not_stop_batch(tmp_path):
+    good = tmp_path / "good.txt"
+    good.write_bytes(b"ok")
+    existing = tmp_path / "exists.zil"
+    existing.write_bytes(b"x")
+    jobs = [
+        (tmp_path / "missing.txt", tmp_path / "missing.zil"),
+        (good, existing),
+        (good, tmp_path / "good.zil"),
+    ]
+    results = list(pack_many(jobs, KEY, workers=1))
+    assert [r["ok"] for r in results] == [False, False, True]
+    assert "FileNotFoundError" in results[0]["error"]
+    assert "FileExistsError" in results[1]["error"]
+
+    def key_for(path):
+        raise KeyError("no key")
+
+    res = list(unpack_many([(tmp_path / "good.zil", tmp_path / "good.out")], key_for, workers=1))
+    assert not res[0]["ok"] and "KeyError" in res[0]["error"]
+
+
+def test_duplicate_destinations_fail_before_running(tmp_path):
+    a_txt, a_csv = tmp_path / "a.txt", tmp_path / "a.csv"
+    a_txt.write_bytes(b"text")
+    a_csv.write_bytes(b"1,2,3")
+    jobs = [(f, f.with_suffix(".zil")) for f in (a_txt, a_csv)]
+    results = list(pack_many(jobs, KEY, workers=2, overwrite=True))
+    assert [r["ok"] for r in results] == [True, False]
+    assert "FileExistsError" in results[1]["error"] and str(a_txt) in results[1]["error"]
+
+    out = tmp_path / "a.out"
+    res = list(unpack_many([(tmp_path / "a.zil", out), (tmp_path / "a.zil", out)], KEY, workers=2))
+    assert [r["ok"] for r in res] == [True, False]
+    assert out.read_bytes() == b"text"
+
+
+def test_pack_many_validates_key(tmp_path):
+    with pytest.raises(ValueError):
+        list(pack_many([], b"short"))
+    with pytest.raises(TypeError):
+        list(pack_many([], "x" * 32))  # type: ignore[arg-type]
+
+
+def test_cli_pack_unpack_batch(tmp_path):
+    files = []
+    for i in range(3):
+        f = tmp_path / f"doc{i}.txt"
+        f.write_text(f"doc {i}")
+        files.append(f)
+    listing = tmp_path / "list.txt"
+    listing.write_text(f"{files[2]}\n")
+    packed = tmp_path / "packed"
+
+    runner = CliRunner()
+    res = runner.invoke(
+        cli,
+        ["pack-batch", str(files[0]), str(files[1]), "--from-file", str(listing), "-d", str(packed), "-p", "pw"],
+    )
+    assert res.exit_code == 0, res.output
+    lines = [json.loads(line) for line in res.output.splitlines()]
+    assert lines[-1]["summary"]["ok"] == 3
+    conts = sorted(packed.glob("*.zil"))
+    assert len(conts) == 3
+    salts = {get_metadata(c)["kdf_salt_hex"] for c in conts}
+    assert len(salts) == 1
+
+    out = tmp_path / "out"
+    res = runner.invoke(cli, ["unpack-batch", *map(str, conts), "-d", str(out), "-p", "pw"])
+    assert res.exit_code == 0, res.output
+    for f in files:
+        assert (out / f.stem).read_text() == f.read_text()
+
+    res = runner.invoke(cli, ["unpack-batch", str(conts[0]), "-d", str(tmp_path / "bad"), "-p", "wrong"])
+    assert res.exit_code == 1
+    assert json.loads(res.output.splitlines()[-1])["summary"]["failed"] == 1
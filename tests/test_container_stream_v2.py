@@ -0,0 +1,150 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import json
+import os
+import pytest
+from cryptography.exceptions import InvalidTag
+
+import container
+from container import get_metadata, pack_file, unpack_file, verify_integrity
+
+KEY = b"k" * 32
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(container, "STREAM_CHUNK", 1024)
+    monkeypatch.setattr(container, "STREAM_THRESHOLD", 4096)
+
+
+@pytest.mark.parametrize("size", [0, 1, 1024, 5000, 8192])
+def test_v2_roundtrip(tmp_path, size):
+    data = os.urandom(size)
+    src = tmp_path / "in.bin"
+    src.write_bytes(data)
+    cont = tmp_path / "out.zil"
+    out = tmp_path / "out.bin"
+
+    pack_file(src, cont, KEY, streaming=True)
+    meta = get_metadata(cont)
+    assert meta["version"] == container.ZIL_STREAM_VERSION
+    assert meta["orig_size"] == size
+    assert meta["checksum_hex"] != "0" * 64
+    assert verify_integrity(cont)
+
+    unpack_file(cont, out, KEY)
+    assert out.read_bytes() == data
+    assert not (tmp_path / "out.bin.tmp").exists()
+
+
+def test_threshold_selects_layout(tmp_path):
+    small = tmp_path / "small.bin"
+    small.write_bytes(b"x" * 100)
+    big = tmp_path / "big.bin"
+    big.write_bytes(b"y" * 5000)
+
+    pack_file(small, tmp_path / "small.zil", KEY)
+    pack_file(big, tmp_path / "big.zil", KEY)
+    assert get_metadata(tmp_path / "small.zil")["version"] == container.ZIL_VERSION
+    assert get_metadata(tmp_path / "big.zil")["version"] == container.ZIL_STREAM_VERSION
+
+    pack_file(big, tmp_path / "forced.zil", KEY, streaming=False)
+    assert get_metadata(tmp_path / "forced.zil")["version"] == container.ZIL_VERSION
+
+
+def test_v2_extra_meta(tmp_path):
+    src = tmp_path / "in.bin"
+    src.write_bytes(b"z" * 3000)
+    cont = tmp_path / "out.zil"
+    pack_file(src, cont, KEY, streaming=True, extra_meta={"foo": "bar"})
+    meta = get_metadata(cont)
+    assert meta["foo"] == "bar"
+    assert meta["heal_level"] == 0
+
+
+def test_extra_meta_cannot_override_payload_fields(tmp_path):
+    src = tmp_path / "in.bin"
+    src.write_bytes(os.urandom(5000))
+    cont = tmp_path / "out.zil"
+    for field in ("checksum_hex", "nonce_hex", "chunk_size", "orig_size", "version", "payload_len", "deltas_mac"):
+        for streaming in (True, False):
+            with pytest.raises(ValueError, match=field):
+                pack_file(src, cont, KEY, streaming=streaming, extra_meta={field: 1})
+            assert not cont.exists()
+    with pytest.raises(ValueError, match="deltas"):
+        pack_file(src, cont, KEY, b"pk", streaming=False, extra_meta={"deltas": 0})
+
+
+def test_v2_tampered_chunk(tmp_path):
+    src = tmp_path / "in.bin"
+    src.write_bytes(os.urandom(3000))
+    cont = tmp_path / "out.zil"
+    pack_file(src, cont, KEY, streaming=True)
+    raw = bytearray(cont.read_bytes())
+    raw[raw.find(b"\n\n") + 1500] ^= 1
+    cont.write_bytes(bytes(raw))
+
+    with pytest.raises(InvalidTag):
+        unpack_file(cont, tmp_path / "out.bin", KEY)
+    assert not (tmp_path / "out.bin").exists()
+    assert not (tmp_path / "out.bin.tmp").exists()
+
+
+def test_v2_truncated_last_chunk(tmp_path):
+    src = tmp_path / "in.bin"
+    src.write_bytes(os.urandom(4096))
+    cont = tmp_path / "out.zil"
+    pack_file(src, cont, KEY, streaming=True)
+    raw = cont.read_bytes()
+    cont.write_bytes(raw[: -(1024 + 16)])
+
+    assert not verify_integrity(cont)
+    with pytest.raises(ValueError, match="Truncated"):
+        unpack_file(cont, tmp_path / "out.bin", KEY)
+
+
+def test_v2_dropped_tail_detected(tmp_path):
+    # Lowering orig_size to a chunk boundary must not silently drop the tail.
+    src = tmp_path / "in.bin"
+    src.write_bytes(os.urandom(4096))
+    cont = tmp_path / "out.zil"
+    pack_file(src, cont, KEY, streaming=True)
+    raw = cont.read_bytes()
+    header, body = raw.split(b"\n\n", 1)
+    meta = json.loads(header)
+    meta["orig_size"] = 3072
+    cont.write_bytes(json.dumps(meta).encode() + b"\n\n" + body)
+
+    with pytest.raises(InvalidTag):
+        unpack_file(cont, tmp_path / "out.bin", KEY)
+
+
+def test_v2_pq_roundtrip(tmp_path, monkeypatch):
+    import zilant_prime_core.utils.pq_crypto as pq
+
+    class FakeKEM:
+        def encapsulate(self, pub):
+            return b"C" * 12, b"S" * 32
+
+        def decapsulate(self, priv, ct):
+            assert ct == b"C" * 12
+            return b"S" * 32
+
+    monkeypatch.setattr(pq, "Kyber768KEM", FakeKEM)
+    monkeypatch.setattr(pq, "derive_key_pq", lambda shared: b"d" * 32)
+
+    data = os.urandom(2500)
+    src = tmp_path / "in.bin"
+    src.write_bytes(data)
+    cont = tmp_path / "out.zil"
+    pack_file(src, cont, KEY, pq_public_key=b"pub", streaming=True)
+    meta = get_metadata(cont)
+    assert meta["mode"] == "pq"
+    assert meta["kem_ct_len"] == 12
+    assert verify_integrity(cont)
+
+    with pytest.raises(TypeError):
+        unpack_file(cont, tmp_path / "x.bin", KEY)
+    unpack_file(cont, tmp_path / "out.bin", KEY, pq_private_key=b"priv")
+    assert (tmp_path / "out.bin").read_bytes() == data
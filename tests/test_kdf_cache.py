@@ -0,0 +1,128 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import os
+import pytest
+import tempfile
+import threading
+from click.testing import CliRunner
+
+import zilant_prime_core.crypto.kdf as kdf
+from zilant_prime_core.crypto import kdf_cache
+from zilant_prime_core.crypto.kdf_cache import AGENT_ENV, CACHE_ENV, KDFAgent, KeyCache
+from zilant_prime_core.crypto_core import derive_key_double
+
+SALT = b"s" * 16
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.delenv(AGENT_ENV, raising=False)
+    monkeypatch.delenv(CACHE_ENV, raising=False)
+    kdf_cache.disable_key_cache()
+    yield
+    kdf_cache.disable_key_cache()
+
+
+@pytest.fixture
+def argon_calls(monkeypatch):
+    calls = []
+    real = kdf.a2.hash_secret_raw
+
+    def counting(**kw):
+        calls.append(kw)
+        return real(**{**kw, "memory_cost": 8, "time_cost": 1})
+
+    monkeypatch.setattr(kdf.a2, "hash_secret_raw", counting)
+    return calls
+
+
+def test_cache_ttl_and_lru():
+    now = [0.0]
+    cache = KeyCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", b"pw", SALT, {}, b"1" * 32)
+    cache.put("a", b"pw", b"t" * 16, {}, b"2" * 32)
+    assert cache.get("a", b"pw", SALT, {}) == b"1" * 32
+    cache.put("a", b"pw", b"u" * 16, {}, b"3" * 32)
+    assert cache.get("a", b"pw", b"t" * 16, {}) is None  # LRU evicted
+    assert cache.get("a", b"pw", SALT, {"t": 1}) is None  # params are part of the key
+
+    buf = cache._entries[cache._slot("a", b"pw", SALT, {})][1]
+    now[0] = 11
+    assert cache.get("a", b"pw", SALT, {}) is None
+    assert buf == bytearray(32)
+    assert cache.purge_expired() == 1
+    assert len(cache) == 0
+
+    with pytest.raises(ValueError):
+        KeyCache(max_entries=0)
+    with pytest.raises(ValueError):
+        KeyCache(ttl=0)
+
+
+def test_derive_key_uses_cache(argon_calls):
+    k1 = kdf.derive_key("pw", SALT)
+    kdf.derive_key("pw", SALT)
+    assert len(argon_calls) == 2
+
+    kdf_cache.enable_key_cache()
+    assert kdf.derive_key("pw", SALT) == k1
+    assert kdf.derive_key(b"pw", SALT) == k1
+    kdf.derive_key("pw", SALT, key_length=16)
+    assert len(argon_calls) == 4
+
+
+def test_env_enables_cache(argon_calls, monkeypatch):
+    monkeypatch.setenv(CACHE_ENV, "1")
+    for _ in range(5):
+        kdf.derive_key_dynamic("pw", SALT, 0.5)
+    assert len(argon_calls) == 1
+
+
+def test_derive_key_double_cached(monkeypatch):
+    import zilant_prime_core.crypto_core as cc
+
+    calls = []
+    monkeypatch.setattr(cc, "_derive_key_double", lambda pw, salt: calls.append(1) or b"d" * 32)
+    kdf_cache.enable_key_cache()
+    assert derive_key_double(b"pw", SALT) == b"d" * 32
+    assert derive_key_double(b"pw", SALT) == b"d" * 32
+    assert len(calls) == 1
+
+
+def test_agent_shares_keys(argon_calls, monkeypatch):
+    path = os.path.join(tempfile.mkdtemp(), "agent.sock")
+    agent = KDFAgent(path)
+    agent.start()
+    try:
+        assert os.stat(path).st_mode & 0o777 == 0o600
+        monkeypatch.setenv(AGENT_ENV, path)
+        key = kdf.derive_key("pw", SALT)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(kdf.derive_key("pw", SALT))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == [key] * 4
+        assert len(argon_calls) == 1
+        assert len(agent.cache) == 1
+        assert agent.dispatch({"op": "bogus"}) == {"error": "unknown op"}
+        assert agent.dispatch({"op": "clear"}) == {"ok": True}
+    finally:
+        agent.stop()
+    assert not os.path.exists(path)
+
+
+def test_unreachable_agent_falls_back(argon_calls, monkeypatch):
+    monkeypatch.setenv(AGENT_ENV, os.path.join(tempfile.mkdtemp(), "missing.sock"))
+    assert len(kdf.derive_key("pw", SALT)) == 32
+    assert len(argon_calls) == 1
+
+
+def test_kdf_agent_cli_help():
+    from zilant_prime_core.cli import cli
+
+    res = CliRunner().invoke(cli, ["kdf-agent", "--help"])
+    assert res.exit_code == 0
+    assert "--socket" in res.output
@@ -0,0 +1,194 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import importlib
+import json
+import pytest
+import sys
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+from types import ModuleType
+
+import container
+
+
+class CountingKEM:
+    decaps = 0
+
+    def encapsulate(self, pub):
+        return b"C" * 16, b"S" * 32
+
+    def decapsulate(self, priv, ct):
+        CountingKEM.decaps += 1
+        return b"S" * 32
+
+
+@pytest.fixture
+def pq():
+    # other tests reload pq_crypto: use the module container will import now
+    return importlib.import_module("zilant_prime_core.utils.pq_crypto")
+
+
+@pytest.fixture
+def fake_kem(monkeypatch, pq):
+    CountingKEM.decaps = 0
+    monkeypatch.setattr(pq, "Kyber768KEM", CountingKEM)
+    yield CountingKEM
+    pq.disable_pq_key_cache()
+
+
+def test_hkdf_is_deterministic_and_distinct_from_legacy(monkeypatch, pq):
+    monkeypatch.setattr(pq, "derive_key", lambda secret, salt: b"L" * 32)
+    key = pq.derive_key_pq(b"secret")
+    assert key == pq.derive_key_pq(bytearray(b"secret"))
+    assert len(pq.derive_key_pq(b"secret", length=16)) == 16
+    assert key != pq.derive_key_pq_legacy(b"secret")
+    with pytest.raises(TypeError):
+        pq.derive_key_pq_legacy("nope")  # type: ignore[arg-type]
+
+
+def test_unknown_kdf_rejected(fake_kem, pq):
+    with pytest.raises(ValueError):
+        pq.open_kem_key(b"sk", b"ct", "scrypt")
+
+
+def test_cache_lru_and_wipe(pq):
+    cache = pq.PQKeyCache(max_entries=2)
+    cache.put(pq.PQ_KDF_HKDF, b"sk", b"a", b"1" * 32)
+    cache.put(pq.PQ_KDF_HKDF, b"sk", b"b", b"2" * 32)
+    assert cache.get(pq.PQ_KDF_HKDF, b"sk", b"a") == b"1" * 32
+    evicted = cache._entries[cache._slot(pq.PQ_KDF_HKDF, b"sk", b"b")]
+    cache.put(pq.PQ_KDF_HKDF, b"sk", b"c", b"3" * 32)
+    assert len(cache) == 2
+    assert cache.get(pq.PQ_KDF_HKDF, b"sk", b"b") is None
+    assert evicted == bytearray(32)
+    # a different private key or kdf never hits another entry
+    assert cache.get(pq.PQ_KDF_HKDF, b"other", b"a") is None
+    assert cache.get(pq.PQ_KDF_LEGACY, b"sk", b"a") is None
+    cache.clear()
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        pq.PQKeyCache(0)
+
+
+def test_open_kem_key_uses_cache(fake_kem, pq):
+    pq.open_kem_key(b"sk", b"ct")
+    pq.open_kem_key(b"sk", b"ct")
+    assert fake_kem.decaps == 2
+
+    pq.enable_pq_key_cache(4)
+    first = pq.open_kem_key(b"sk", b"ct")
+    second = pq.open_kem_key(b"sk", b"ct")
+    assert first == second == pq.derive_key_pq(b"S" * 32)
+    assert fake_kem.decaps == 3
+
+
+def test_v1_pq_container_records_hkdf(tmp_path, monkeypatch, pq):
+    monkeypatch.setattr(container.PQAEAD, "encrypt", staticmethod(lambda pub, pt, aad=b"": b"KEM" + pt))
+    src = tmp_path / "in.bin"
+    src.write_bytes(b"payload")
+    cont = tmp_path / "out.zil"
+    container.pack_file(src, cont, b"k" * 32, pq_public_key=b"pk", streaming=False)
+    meta = container.get_metadata(cont)
+    assert meta["pq_kdf"] == pq.PQ_KDF_HKDF
+    # readers that predate pq_kdf only know version 1 and reject this one cleanly
+    assert meta["version"] == container.ZIL_PQ_VERSION
+
+
+def test_v2_pq_container_roundtrip(tmp_path, fake_kem, pq):
+    src = tmp_path / "in.bin"
+    src.write_bytes(b"payload" * 100)
+    cont = tmp_path / "out.zil"
+    container.pack_file(src, cont, b"k" * 32, pq_public_key=b"pk", streaming=True)
+    assert container.get_metadata(cont)["pq_kdf"] == pq.PQ_KDF_HKDF
+
+    pq.enable_pq_key_cache()
+    for _ in range(3):
+        container.unpack_file(cont, tmp_path / "out.bin", b"k" * 32, pq_private_key=b"sk")
+    assert (tmp_path / "out.bin").read_bytes() == src.read_bytes()
+    assert fake_kem.decaps == 1
+
+
+def test_legacy_container_uses_argon2(tmp_path, fake_kem, monkeypatch, pq):
+    monkeypatch.setattr(pq, "derive_key", lambda secret, salt: b"L" * 32)
+    key = pq.derive_key_pq_legacy(b"S" * 32)
+    nonce, ct = container.encrypt(key, b"old data")
+    meta = {
+        "magic": "ZILANT",
+        "version": 1,
+        "mode": "pq",
+        "kem_ct_len": 16,
+        "orig_size": 8,
+        "checksum_hex": container.hash_sha3(b"old data").hex(),
+    }
+    cont = tmp_path / "legacy.zil"
+    cont.write_bytes(json.dumps(meta).encode() + b"\n\n" + b"C" * 16 + nonce + ct)
+
+    container.unpack_file(cont, tmp_path / "out.bin", b"k" * 32, pq_private_key=b"sk")
+    assert (tmp_path / "out.bin").read_bytes() == b"old data"
+
+
+def test_pq_version_requires_named_kdf(tmp_path, fake_kem):
+    meta = {"magic": "ZILANT", "version": container.ZIL_PQ_VERSION, "mode": "pq", "kem_ct_len": 16}
+    meta.update(orig_size=1, checksum_hex="00" * 32)
+    cont = tmp_path / "nokdf.zil"
+    cont.write_bytes(json.dumps(meta).encode() + b"\n\n" + b"C" * 16 + b"\0" * 40)
+    with pytest.raises(ValueError, match="pq_kdf"):
+        container.unpack_file(cont, tmp_path / "out.bin", b"k" * 32, pq_private_key=b"sk")
+    assert fake_kem.decaps == 0
+
+
+@pytest.fixture
+def pqaead(monkeypatch):
+    import src.aead
+
+    stub = ModuleType("src.utils.pq_crypto")
+    named = []
+
+    class KEM:
+        def ciphertext_length(self):
+            return 4
+
+        def encapsulate(self, pub):
+            return b"C" * 4, b"S" * 32
+
+        def decapsulate(self, priv, ct):
+            return b"S" * 32
+
+    stub.Kyber768KEM = KEM
+    stub.PQ_KDF_HKDF = "hkdf-sha256"
+    stub.PQ_KDF_LEGACY = "argon2id"
+    stub.derive_key_pq = lambda shared: b"H" * 32
+    stub.open_kem_key = lambda priv, ct, kdf: named.append(kdf) or {"hkdf-sha256": b"H", "argon2id": b"L"}[kdf] * 32
+    monkeypatch.setitem(sys.modules, "src.utils.pq_crypto", stub)
+    # test_aead_more swaps the cipher for a dummy that never checks tags
+    monkeypatch.setattr(src.aead, "ChaCha20Poly1305", ChaCha20Poly1305)
+    return src.aead.PQAEAD, named
+
+
+def test_pqaead_never_retries_another_kdf(pqaead):
+    from src.aead import PQAEAD_MAGIC
+
+    PQAEAD, named = pqaead
+    sealed = PQAEAD.encrypt(b"pk", b"data")
+    assert sealed.startswith(PQAEAD_MAGIC)
+    assert PQAEAD.decrypt(b"sk", sealed) == b"data"
+    with pytest.raises(InvalidTag):
+        PQAEAD.decrypt(b"sk", sealed[:-1] + bytes([sealed[-1] ^ 1]))
+    assert named == []  # a bad tag costs one derivation, never a fallback Argon2id run
+    with pytest.raises(ValueError, match="argon2id"):
+        PQAEAD.decrypt(b"sk", sealed, kdf="argon2id")
+    assert named == []
+
+
+def test_pqaead_unmarked_payloads_use_argon2id(pqaead):
+    PQAEAD, named = pqaead
+    nonce = b"N" * 12
+    legacy = b"C" * 4 + nonce + ChaCha20Poly1305(b"L" * 32).encrypt(nonce, b"old", b"")
+    assert PQAEAD.decrypt(b"sk", legacy) == b"old"
+    assert named == ["argon2id"]
+    with pytest.raises(InvalidTag):
+        PQAEAD.decrypt(b"sk", legacy, kdf="hkdf-sha256")
+    assert named == ["argon2id", "hkdf-sha256"]
+    with pytest.raises(ValueError, match="too short"):
+        PQAEAD.decrypt(b"sk", legacy[:10])
@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import io
+import json
+import pytest
+
+import container
+from utils.file_utils import read_header
+
+
+class CountingIO(io.BytesIO):
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.reads = 0
+
+    def read(self, n: int = -1) -> bytes:
+        self.reads += 1
+        return super().read(n)
+
+
+def test_read_header_single_read_and_position():
+    fh = CountingIO(b'{"a":1}\n\nBODY')
+    assert read_header(fh) == b'{"a":1}'
+    assert fh.reads == 1
+    assert fh.read() == b"BODY"
+
+
+def test_read_header_large_header_spans_blocks():
+    header = json.dumps({"pad": "x" * 50_000}).encode()
+    fh = io.BytesIO(header + b"\n\n" + b"payload")
+    assert read_header(fh) == header
+    assert fh.read() == b"payload"
+
+
+def test_read_header_separator_split_across_blocks():
+    header = b"h" * 4095
+    fh = io.BytesIO(header + b"\n\nrest")
+    assert read_header(fh) == header
+    assert fh.read() == b"rest"
+
+
+def test_read_header_errors():
+    with pytest.raises(ValueError, match="truncated header"):
+        read_header(io.BytesIO(b"no separator here"))
+    with pytest.raises(ValueError, match="header too large"):
+        read_header(io.BytesIO(b"x" * 10_000 + b"\n\n"), limit=100)
+
+
+def test_get_metadata_reads_only_header(tmp_path, monkeypatch):
+    path = tmp_path / "c.zil"
+    meta = {"magic": "ZILANT", "version": 1, "orig_size": 3}
+    path.write_bytes(json.dumps(meta).encode() + b"\n\n" + b"\0" * 100_000)
+
+    seen = []
+    real_open = open
+
+    def spy_open(*args, **kwargs):
+        fh = real_open(*args, **kwargs)
+        orig = fh.read
+
+        def read(n=-1):
+            data = orig(n)
+            seen.append(len(data))
+            return data
+
+        fh.read = read
+        return fh
+
+    monkeypatch.setattr("builtins.open", spy_open)
+    assert container.get_metadata(path)["orig_size"] == 3
+    assert container.verify_integrity(path)
+    assert sum(seen) < 100_000
+
+
+def test_read_meta_stops_at_header_limit(tmp_path, monkeypatch):
+    import zilant_prime_core.zilfs as zilfs
+
+    path = tmp_path / "not-a-container.bin"
+    path.write_bytes(b"x" * (4 * 1024 * 1024))  # no separator anywhere
+    seen = []
+    real_read_header = zilfs.read_header
+
+    def spy(fh, separator=b"\n\n", limit=None):
+        seen.append(limit)
+        return real_read_header(fh, separator, limit)
+
+    monkeypatch.setattr(zilfs, "read_header", spy)
+    monkeypatch.setattr(zilfs, "HEADER_LIMIT", 8192)
+    assert zilfs._read_meta(path) == {}
+    assert seen == [8192]
@@ -4,6 +4,7 @@ import base64
 import secrets
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
+from zilant_prime_core.utils import secure_logging
 from zilant_prime_core.utils.secure_logging import SecureLogger
 
 
@@ -15,8 +16,8 @@ def test_secure_logger_write_and_zeroize(tmp_path):
     slog.log("a")
     slog.log("b")
     slog.log("c")
-    lines = log_path.read_bytes().splitlines()
-    assert len(lines) == 3
+    assert len(slog.read_logs()) == 3
+    assert log_path.read_bytes().startswith(secure_logging.MAGIC)  # three records, one frame
     slog.zeroize()
     enc = log_path.with_suffix(".log.enc")
     assert not log_path.exists() and enc.exists()
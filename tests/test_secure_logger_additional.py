@@ -1,6 +1,7 @@
 # SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
 # SPDX-License-Identifier: MIT
 
+import os
 import secrets
 
 from zilant_prime_core.utils.secure_logging import SecureLogger
@@ -27,13 +28,14 @@ def test_tampered_line_restores(tmp_path):
 
     # Запишем пару валидных записей
     slog.log("First entry", "INFO")
+    slog.flush()
+    first = os.path.getsize(log_file)
     slog.log("Second entry", "DEBUG")
+    slog.flush()
 
-    # Повреждаем вторую строку (дописав мусор)
+    # Повреждаем второй кадр (шифротекст)
     with open(log_file, "r+b") as f:
-        lines = f.readlines()
-        # портим вторую строку целиком
-        f.seek(len(lines[0]))
+        f.seek(first + 20)
         f.write(b"invalid|line\n")
 
     # Теперь slog.read_logs() должен вернуть только первую (валидную) запись
@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import base64
+import gc
+import os
+import pytest
+import secrets
+import stat
+import time
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+import zilant_prime_core.utils.secure_logging as sl
+from zilant_prime_core.utils.secure_logging import SecureLogger, get_decryption_attempts
+
+KEY = b"k" * 32
+
+
+def _frames(path):
+    data = open(path, "rb").read()
+    out, pos = [], 0
+    while pos < len(data):
+        assert data[pos : pos + 4] == sl.MAGIC
+        n = int.from_bytes(data[pos + 4 : pos + 8], "big")
+        out.append(data[pos : pos + 8 + n])
+        pos += 8 + n
+    return out
+
+
+def test_records_share_one_frame(tmp_path):
+    log = tmp_path / "s.log"
+    slog = SecureLogger(KEY, str(log), flush_interval=None)
+    for i in range(100):
+        slog.log(f"m{i}", i=i)
+    assert log.exists() and log.stat().st_size == 0  # buffered
+    assert stat.S_IMODE(log.stat().st_mode) == 0o600
+    slog.flush()
+    assert len(_frames(log)) == 1
+    assert b"m1" not in log.read_bytes()
+    before = get_decryption_attempts()
+    assert [r["i"] for r in slog.iter_logs()] == list(range(100))
+    assert get_decryption_attempts() == before + 1
+
+
+def test_max_records_seals_a_frame(tmp_path):
+    log = tmp_path / "s.log"
+    slog = SecureLogger(KEY, str(log), max_records=10, flush_interval=None)
+    for i in range(25):
+        slog.log(f"m{i}")
+    assert len(_frames(log)) == 2  # the last five are still in memory
+    assert len(list(slog.iter_logs())) == 25
+    assert len(_frames(log)) == 3
+
+
+def test_background_flusher(tmp_path):
+    log = tmp_path / "s.log"
+    slog = SecureLogger(KEY, str(log), flush_interval=0.05)
+    slog.log("tick")
+    deadline = time.monotonic() + 5
+    while log.stat().st_size == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(_frames(log)) == 1
+    slog.close()
+    assert slog._flusher is None and slog._fd is None
+    assert SecureLogger(KEY, str(log)).read_logs() == [("INFO", "tick")]
+
+
+def test_fsync_cadence(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(sl.os, "fsync", synced.append)
+    slog = SecureLogger(KEY, str(tmp_path / "a.log"), flush_interval=0, fsync_interval=3600)
+    slog.log("one")
+    slog.log("two")
+    assert synced == []  # two frames, no fsync due yet
+    slog.close()
+    assert len(synced) == 1
+
+    synced.clear()
+    slog = SecureLogger(KEY, str(tmp_path / "b.log"), flush_interval=0, fsync_interval=0)
+    slog.log("one")
+    slog.log("two")
+    assert len(synced) == 2
+
+    synced.clear()
+    with SecureLogger(KEY, str(tmp_path / "c.log"), fsync_interval=None) as slog:
+        slog.log("one")
+    assert synced == []
+    assert slog.read_logs() == [("INFO", "one")]
+
+
+def test_legacy_lines_and_corrupt_frame(tmp_path):
+    log = tmp_path / "s.log"
+    nonce = secrets.token_bytes(12)
+    legacy = base64.b64encode(nonce) + b"|" + base64.b64encode(AESGCM(KEY).encrypt(nonce, b'{"msg":"old"}', None))
+    log.write_bytes(legacy + b"\n" + b"garbage\n")
+    slog = SecureLogger(KEY, str(log), flush_interval=0)
+    slog.log("first")
+    slog.log("second")
+    slog.log("third")
+    data = bytearray(log.read_bytes())
+    start = len(legacy) + len(b"\ngarbage\n")
+    second = start + 8 + int.from_bytes(data[start + 4 : start + 8], "big")
+    data[second + 30] ^= 1  # inside the ciphertext of the second frame
+    log.write_bytes(bytes(data))
+    assert [r["msg"] for r in slog.iter_logs()] == ["old", "first", "third"]
+
+
+def test_dropped_logger_keeps_its_buffer(tmp_path):
+    log = tmp_path / "s.log"
+
+    def orphan():
+        SecureLogger(KEY, str(log), flush_interval=None).log("hello")  # no close()
+
+    orphan()
+    gc.collect()
+    assert log.stat().st_size == 0
+    sl._flush_all()  # what atexit runs
+    assert SecureLogger(KEY, str(log)).read_logs() == [("INFO", "hello")]
+
+
+def test_dropped_logger_is_flushed_by_its_thread(tmp_path):
+    log = tmp_path / "s.log"
+    SecureLogger(KEY, str(log), flush_interval=0.05).log("tick")
+    gc.collect()
+    deadline = time.monotonic() + 5
+    while log.stat().st_size == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert SecureLogger(KEY, str(log)).read_logs() == [("INFO", "tick")]
+
+
+def test_dropped_logger_closes_its_fd(tmp_path):
+    slog = SecureLogger(KEY, str(tmp_path / "s.log"), flush_interval=None)
+    slog.log("one")
+    slog.flush()
+    fd = slog._fd
+    del slog
+    gc.collect()
+    with pytest.raises(OSError):
+        os.fstat(fd)
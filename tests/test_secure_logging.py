@@ -195,10 +195,12 @@ def test_tampered_line_restores(tmp_path):
     log_file = str(tmp_path / "tamper.log")
     slog = SecureLogger(key=key, log_path=log_file)
     slog.log("First entry", "INFO")
+    slog.flush()
+    first = os.path.getsize(log_file)
     slog.log("Second entry", "DEBUG")
+    slog.flush()
     with open(log_file, "r+b") as f:
-        lines = f.readlines()
-        f.seek(len(lines[0]))
+        f.seek(first + 20)
         f.write(b"invalid|line\n")
     entries = slog.read_logs()
     assert ("INFO", "First entry") in entries
@@ -1,13 +1,13 @@
 # SPDX-License-Identifier: MIT
 # SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
 
-import base64
 import json
 import secrets
+import struct
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from pathlib import Path
 
-from zilant_prime_core.utils.secure_logging import SecureLogger
+from zilant_prime_core.utils.secure_logging import MAGIC, SecureLogger
 
 
 def test_secure_logger_zeroize(tmp_path):
@@ -17,13 +17,18 @@ def test_secure_logger_zeroize(tmp_path):
     for i in range(3):
         slog.log(f"m{i}", "L{i}")
 
+    slog.flush()
+
     records = []
-    aes = AESGCM(key)
-    for line in log_path.read_bytes().splitlines():
-        nonce_b64, ct_b64 = line.split(b"|")
-        pt = aes.decrypt(base64.b64decode(nonce_b64), base64.b64decode(ct_b64), None)
-        records.append(json.loads(pt.decode()))
-    assert len(records) == 3
+    data = log_path.read_bytes()
+    header, size = data[:8], struct.unpack(">I", data[4:8])[0]
+    assert header[:4] == MAGIC and len(data) == 8 + size
+    pt = AESGCM(key).decrypt(data[8:20], data[20:], header)
+    while pt:
+        n = struct.unpack(">I", pt[:4])[0]
+        records.append(json.loads(pt[4 : 4 + n]))
+        pt = pt[4 + n :]
+    assert [r["msg"] for r in records] == ["m0", "m1", "m2"]
 
     slog.zeroize()
     assert not log_path.exists()
@@ -0,0 +1,129 @@
+import os
+import pytest
+import sys
+from cryptography.exceptions import InvalidTag
+from pathlib import Path
+
+import streaming_aead
+from utils.pipeline import ordered_map, resolve_workers
+
+try:
+    import nacl.bindings
+    from nacl.exceptions import CryptoError
+except ImportError:  # pragma: no cover - native backend only
+    nacl = None  # type: ignore[assignment]
+    CryptoError = InvalidTag  # type: ignore[assignment,misc]
+
+# captured at collection time, before any test swaps the backend out
+_NATIVE = streaming_aead._NativeAEAD
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(streaming_aead, "CHUNK", 64 * 1024)
+
+
+@pytest.fixture
+def real_aead(monkeypatch):
+    """test_streaming_aead_full leaves a fake ``nacl`` in sys.modules: pin the real backend."""
+    monkeypatch.setattr(streaming_aead, "_NativeAEAD", _NATIVE)
+    if nacl is not None:
+        monkeypatch.setitem(sys.modules, "nacl", nacl)
+        monkeypatch.setitem(sys.modules, "nacl.bindings", nacl.bindings)
+
+
+def test_parallel_pack_is_byte_identical(tmp_path: Path, small_chunks) -> None:
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(300 * 1024) + b"\0" * (200 * 1024))
+    key = os.urandom(32)
+
+    seq = tmp_path / "seq.zst"
+    par = tmp_path / "par.zst"
+    streaming_aead.pack_stream(src, seq, key, threads=1)
+    streaming_aead.pack_stream(src, par, key, threads=4)
+    assert seq.read_bytes() == par.read_bytes()
+
+    out = tmp_path / "out.bin"
+    streaming_aead.unpack_stream(par, out, key)
+    assert out.read_bytes() == src.read_bytes()
+
+
+def test_parallel_pack_empty_file(tmp_path: Path) -> None:
+    src = tmp_path / "empty.bin"
+    src.write_bytes(b"")
+    dst = tmp_path / "empty.zst"
+    streaming_aead.pack_stream(src, dst, os.urandom(32), threads=3)
+    assert b'"chunks": 0' in dst.read_bytes()
+
+
+def test_ordered_map_preserves_order_and_errors() -> None:
+    assert list(ordered_map(lambda x: x * 2, range(50), workers=4, window=3)) == [x * 2 for x in range(50)]
+    assert list(ordered_map(lambda x: x + 1, [1, 2], workers=1)) == [2, 3]
+
+    def boom(x: int) -> int:
+        if x == 7:
+            raise RuntimeError("bad chunk")
+        return x
+
+    with pytest.raises(RuntimeError, match="bad chunk"):
+        list(ordered_map(boom, range(20), workers=3))
+
+
+def test_resolve_workers() -> None:
+    assert resolve_workers(3) == 3
+    assert resolve_workers(0) >= 1
+
+
+def test_parallel_unpack_and_resume_match_sequential(tmp_path: Path, small_chunks) -> None:
+    data = os.urandom(150 * 1024) + b"z" * (250 * 1024)
+    src = tmp_path / "src.bin"
+    src.write_bytes(data)
+    key = os.urandom(32)
+    packed = tmp_path / "p.zst"
+    streaming_aead.pack_stream(src, packed, key, threads=2)
+
+    for threads in (1, 4):
+        out = tmp_path / f"out{threads}.bin"
+        streaming_aead.unpack_stream(packed, out, key, threads=threads)
+        assert out.read_bytes() == data
+
+        res = tmp_path / f"res{threads}.bin"
+        streaming_aead.resume_decrypt(packed, key, packed.stat().st_size, res, threads=threads)
+        assert res.read_bytes() == data
+
+
+def test_parallel_unpack_detects_tampered_chunk(tmp_path: Path, small_chunks, real_aead) -> None:
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(256 * 1024))
+    key = os.urandom(32)
+    packed = tmp_path / "p.zst"
+    streaming_aead.pack_stream(src, packed, key)
+
+    raw = bytearray(packed.read_bytes())
+    raw[raw.find(b"\n\n") + 100_000] ^= 0xFF
+    packed.write_bytes(bytes(raw))
+    with pytest.raises((InvalidTag, CryptoError, ValueError)):
+        streaming_aead.unpack_stream(packed, tmp_path / "bad.bin", key, threads=4)
+
+
+def test_cli_stream_unpack_threads(tmp_path: Path) -> None:
+    from click.testing import CliRunner
+
+    from zilant_prime_core.cli import cli
+
+    key_file = tmp_path / "k.bin"
+    key_file.write_bytes(os.urandom(32))
+    src = tmp_path / "data.bin"
+    src.write_bytes(b"payload" * 1000)
+    packed = tmp_path / "data.zst"
+    runner = CliRunner()
+    res = runner.invoke(cli, ["stream", "pack", str(src), str(packed), "--key", str(key_file), "--threads", "2"])
+    assert res.exit_code == 0, res.output
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    res = runner.invoke(
+        cli,
+        ["stream", "unpack", str(packed), "--key", str(key_file), "--threads", "3", "--out-dir", str(out_dir)],
+    )
+    assert res.exit_code == 0, res.output
+    assert (out_dir / "data").read_bytes() == src.read_bytes()
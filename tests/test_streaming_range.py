@@ -0,0 +1,87 @@
+import json
+import os
+import pytest
+from pathlib import Path
+
+import streaming_aead
+
+
+@pytest.fixture
+def packed(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(streaming_aead, "CHUNK", 32 * 1024)
+    data = os.urandom(200 * 1024 + 123)
+    src = tmp_path / "src.bin"
+    src.write_bytes(data)
+    key = os.urandom(32)
+    dst = tmp_path / "src.zst"
+    streaming_aead.pack_stream(src, dst, key)
+    return dst, key, data
+
+
+def _meta(path: Path) -> dict:
+    raw = path.read_bytes()
+    return json.loads(raw[: raw.find(b"\n\n")].decode())
+
+
+def test_v2_header_fields(packed) -> None:
+    dst, _, data = packed
+    meta = _meta(dst)
+    assert meta["version"] == 2
+    assert meta["chunk_size"] == 32 * 1024
+    assert meta["orig_size"] == len(data)
+    assert len(bytes.fromhex(meta["index_mac"])) == 32
+
+
+@pytest.mark.parametrize(
+    "start,length",
+    [(0, 10), (32 * 1024 - 5, 10), (50_000, 100_000), (0, 10**9), (200 * 1024, 500), (10**9, 1), (7, 0)],
+)
+def test_read_range_matches_plaintext(packed, start: int, length: int) -> None:
+    dst, key, data = packed
+    assert streaming_aead.read_range(dst, key, start, length) == data[start : start + length]
+
+
+def test_read_range_decrypts_only_needed_chunks(packed, monkeypatch) -> None:
+    dst, key, data = packed
+    calls = []
+    real = streaming_aead.decrypt_chunk
+
+    def spy(k, nonce, cipher, aad=b""):
+        calls.append(nonce)
+        return real(k, nonce, cipher, aad)
+
+    monkeypatch.setattr(streaming_aead, "decrypt_chunk", spy)
+    assert streaming_aead.read_range(dst, key, 40 * 1024, 100) == data[40 * 1024 : 40 * 1024 + 100]
+    assert calls == [streaming_aead._derive_nonce(1, key)]
+
+
+def test_read_range_rejects_tampered_index(packed) -> None:
+    dst, key, _ = packed
+    raw = bytearray(dst.read_bytes())
+    raw[-3] ^= 0x01
+    dst.write_bytes(bytes(raw))
+    with pytest.raises(ValueError, match="index MAC mismatch"):
+        streaming_aead.read_range(dst, key, 0, 1)
+
+
+def test_read_range_wrong_key(packed) -> None:
+    dst, _, _ = packed
+    with pytest.raises(ValueError, match="index MAC mismatch"):
+        streaming_aead.read_range(dst, os.urandom(32), 0, 1)
+
+
+def test_read_range_requires_v2(tmp_path: Path) -> None:
+    legacy = tmp_path / "v1.zst"
+    meta = {"magic": "ZSTR", "version": 1, "chunks": 0, "root_tag": "", "orig_size": 0}
+    legacy.write_bytes(json.dumps(meta).encode() + b"\n\n")
+    with pytest.raises(ValueError, match="no chunk index"):
+        streaming_aead.read_range(legacy, b"k" * 32, 0, 1)
+    with pytest.raises(ValueError):
+        streaming_aead.read_range(legacy, b"k" * 32, -1, 1)
+
+
+def test_sequential_readers_ignore_index(packed, tmp_path: Path) -> None:
+    dst, key, data = packed
+    out = tmp_path / "out.bin"
+    streaming_aead.unpack_stream(dst, out, key)
+    assert out.read_bytes() == data
@@ -0,0 +1,103 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import io
+import os
+import pytest
+import tarfile
+import threading
+
+import zilant_prime_core.zilfs as zilfs
+from zilant_prime_core import tarstream
+from zilant_prime_core.tarstream import TarStream
+
+KEY = b"k" * 32
+
+
+@pytest.fixture
+def tree(tmp_path):
+    d = tmp_path / "tree"
+    (d / "sub" / "deep").mkdir(parents=True)
+    for i in range(200):
+        (d / "sub" / f"small{i:03d}.txt").write_bytes(b"%d" % i * (i + 1))
+    (d / "big.bin").write_bytes(os.urandom(tarstream.SMALL_FILE + 12345))
+    (d / "empty").write_bytes(b"")
+    (d / "sub" / "deep" / "note.md").write_text("deep")
+    os.symlink("big.bin", d / "link")
+    os.link(d / "big.bin", d / "sub" / "hard.bin")
+    return d
+
+
+def _read_all(stream, size=100_000):
+    out = bytearray()
+    while block := stream.read(size):
+        out += block
+    return bytes(out)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_archive_matches_tarfile(tmp_path, tree, workers):
+    with TarStream(tree, workers) as stream:
+        data = _read_all(stream)
+    assert len(data) % tarfile.RECORDSIZE == 0
+
+    ref = tmp_path / "ref.tar"
+    with tarfile.open(ref, "w") as tar:
+        files = zilfs._tar_tree(tar, tree)
+    assert stream.files == files
+
+    with tarfile.open(fileobj=io.BytesIO(data)) as got, tarfile.open(ref) as want:
+        got_members, want_members = got.getmembers(), want.getmembers()
+        assert [m.name for m in got_members] == [m.name for m in want_members]
+        for a, b in zip(got_members, want_members, strict=True):
+            assert (a.type, a.size, a.mode, a.mtime, a.linkname) == (b.type, b.size, b.mode, b.mtime, b.linkname)
+            if a.isreg():
+                assert got.extractfile(a).read() == want.extractfile(b).read()
+
+
+def test_pack_dir_stream_roundtrip(tmp_path, tree):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir_stream(tree, cont, KEY, threads=4)
+    out = tmp_path / "out"
+    zilfs.unpack_dir(cont, out, KEY)
+    for f in tree.rglob("*"):
+        if f.is_file() and not f.is_symlink():
+            assert (out / f.relative_to(tree)).read_bytes() == f.read_bytes()
+    assert os.readlink(out / "link") == "big.bin"
+    files = zilfs._open_manifest(zilfs.get_metadata(cont), KEY)
+    assert files["sub/hard.bin"] == files["big.bin"]
+
+
+def test_read_error_propagates(tmp_path, tree, monkeypatch):
+    real = tarstream._Member.open
+
+    def broken(member):
+        if member.path.endswith("small150.txt"):
+            raise PermissionError("denied")
+        real(member)
+
+    monkeypatch.setattr(tarstream._Member, "open", broken)
+    cont = tmp_path / "c.zil"
+    with pytest.raises(PermissionError):
+        zilfs.pack_dir_stream(tree, cont, KEY, threads=4)
+    assert list(tmp_path.glob("c.zil*")) == []  # neither a container nor a leftover .tmp
+
+
+def test_close_mid_stream_stops_read_ahead(tree):
+    stream = TarStream(tree, workers=4)
+    assert stream.read(4096)
+    stream.close()
+    assert not [t for t in threading.enumerate() if t.name.startswith("zil-pipe")]
+
+
+def test_file_shrinking_while_archived(tmp_path, monkeypatch):
+    d = tmp_path / "d"
+    d.mkdir()
+    (d / "a.bin").write_bytes(b"x" * 1000)
+    monkeypatch.setattr(tarstream, "SMALL_FILE", 0)  # stream it from the producer
+    with TarStream(d, workers=1) as stream:
+        while b"a.bin" not in stream.read(512):  # up to the member header: size is already fixed
+            pass
+        (d / "a.bin").write_bytes(b"x" * 10)
+        with pytest.raises(OSError, match="shrank"):
+            _read_all(stream)
@@ -197,11 +197,14 @@ def test_zilantfs_rw_check(tmp_path, password):
         fs.unlink("/dummy.txt")
 
 
-def test_mount_umount_stub():
+def test_mount_umount_stub(monkeypatch, tmp_path):
+    monkeypatch.setattr(zilfs, "FUSE", None)
     with pytest.raises(RuntimeError):
-        zilfs.mount_fs(None)
+        zilfs.mount_fs(tmp_path / "c.zil", tmp_path / "mnt", b"k" * 32)
+    monkeypatch.setattr(zilfs.shutil, "which", lambda _name: None)
+    monkeypatch.setattr(zilfs.sys, "platform", "linux")
     with pytest.raises(RuntimeError):
-        zilfs.umount_fs(None)
+        zilfs.umount_fs(tmp_path / "mnt")
 
 
 def test_zero_file_read_past_end():
@@ -0,0 +1,97 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import os
+import pytest
+import time
+
+import zilant_prime_core.zilfs as zilfs
+
+KEY = b"k" * 32
+
+
+@pytest.fixture
+def cont(tmp_path):
+    d = tmp_path / "vol"
+    d.mkdir()
+    (d / "a.txt").write_text("alpha")
+    c = tmp_path / "c.zil"
+    zilfs.pack_dir(d, c, KEY)
+    return c
+
+
+def _write(fs, path, data):
+    fh = fs.create(path, 0o644)
+    fs.write(path, data, 0, fh)
+    fs.release(path, fh)
+
+
+def _wait_deltas(cont, n, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if zilfs.get_metadata(cont).get("deltas", 0) >= n:
+            return
+        time.sleep(0.02)
+    pytest.fail(f"no checkpoint within {timeout}s")
+
+
+def test_periodic_checkpoint_persists_while_mounted(tmp_path, cont):
+    fs = zilfs.ZilantFS(cont, KEY, checkpoint_interval=0.05)
+    _write(fs, "/b.txt", b"bravo")
+    _wait_deltas(cont, 1)
+
+    out = tmp_path / "out"
+    zilfs.unpack_dir(cont, out, KEY)  # a crash now would not lose b.txt
+    assert (out / "b.txt").read_bytes() == b"bravo"
+
+    fs.destroy("/")
+    assert fs._checkpoint is None
+    assert zilfs.get_metadata(cont)["deltas"] == 1  # nothing left for the final flush
+
+
+def test_dirty_bytes_threshold_triggers_early(cont):
+    fs = zilfs.ZilantFS(cont, KEY, checkpoint_interval=3600, checkpoint_dirty_bytes=16)
+    _write(fs, "/small.txt", b"x")
+    time.sleep(0.1)
+    assert "deltas" not in zilfs.get_metadata(cont)
+    _write(fs, "/big.txt", b"y" * 32)
+    _wait_deltas(cont, 1)
+    fs.destroy("/")
+
+
+def test_throttled_flush(tmp_path, cont, monkeypatch):
+    class Limiter:
+        calls = 0
+
+        def allow(self):
+            self.calls += 1
+            return self.calls % 3 == 0
+
+    monkeypatch.setattr(zilfs, "_THROTTLE_SLEEP", 0)
+    limiter = Limiter()
+    fs = zilfs.ZilantFS(cont, KEY)
+    _write(fs, "/b.txt", os.urandom(1000))
+    assert fs.flush_changes(limiter=limiter) == "delta"
+    assert limiter.calls >= 3
+    fs.destroy("/")
+
+
+def test_failed_append_keeps_changes_pending(tmp_path, cont, monkeypatch):
+    fs = zilfs.ZilantFS(cont, KEY)
+    _write(fs, "/b.txt", b"bravo")
+    real = zilfs.append_delta
+
+    def broken(*a, **kw):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(zilfs, "append_delta", broken)
+    with pytest.raises(OSError):
+        fs.flush_changes()
+    monkeypatch.setattr(zilfs, "append_delta", real)
+    assert fs.flush_changes() == "delta"
+    assert fs.flush_changes() == "none"
+    fs.destroy("/")
+
+    out = tmp_path / "out"
+    zilfs.unpack_dir(cont, out, KEY)
+    assert (out / "b.txt").read_bytes() == b"bravo"
@@ -45,7 +45,7 @@ def test_pack_dir_stream_fifo(tmp_path, monkeypatch):
             pass
 
     monkeypatch.setattr(subprocess, "Popen", lambda *a, **k: FakeProc(), raising=False)
-    monkeypatch.setattr(zfs, "pack_stream", lambda fifo, dest, key: dest.write_bytes(b"X"), raising=False)
+    monkeypatch.setattr(zfs, "pack_stream", lambda fifo, dest, key, **kw: dest.write_bytes(b"X"), raising=False)
     zfs.pack_dir_stream(src, out, key)
     assert out.is_file()
     assert out.read_bytes() == b"X"
@@ -68,10 +68,14 @@ def test_snapshot_and_diff(tmp_path):
     assert diff["x.txt"][0] != diff["x.txt"][1]
 
 
-def test_stub_mount_api():
-    for fn in (zfs.mount_fs, zfs.umount_fs):
-        with pytest.raises(RuntimeError):
-            fn()
+def test_stub_mount_api(monkeypatch, tmp_path):
+    monkeypatch.setattr(zfs, "FUSE", None)
+    with pytest.raises(RuntimeError):
+        zfs.mount_fs(tmp_path / "c.zil", tmp_path / "mnt", b"k" * 32)
+    monkeypatch.setattr(zfs.shutil, "which", lambda _name: None)
+    monkeypatch.setattr(zfs.sys, "platform", "linux")
+    with pytest.raises(RuntimeError):
+        zfs.umount_fs(tmp_path / "mnt")
 
 
 def test_throughput(tmp_path):
@@ -0,0 +1,247 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import io
+import json
+import os
+import pytest
+
+import container
+import zilant_prime_core.deltalog as deltalog
+import zilant_prime_core.zilfs as zilfs
+
+KEY = b"k" * 32
+
+
+@pytest.fixture
+def vol(tmp_path):
+    d = tmp_path / "vol"
+    (d / "sub").mkdir(parents=True)
+    (d / "a.txt").write_text("alpha")
+    (d / "sub" / "big.bin").write_bytes(os.urandom(200_000))
+    (d / "sub" / "c.txt").write_text("gamma")
+    return d
+
+
+def _no_repack(monkeypatch):
+    def boom(*a, **kw):
+        raise AssertionError("container must not be repacked")
+
+    monkeypatch.setattr(zilfs, "pack_dir", boom)
+    monkeypatch.setattr(zilfs, "pack_dir_stream", boom)
+
+
+def _unpacked(cont, tmp_path, name="out"):
+    out = tmp_path / name
+    zilfs.unpack_dir(cont, out, KEY)
+    return out
+
+
+def test_one_changed_file_is_appended(tmp_path, vol, monkeypatch):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    size = cont.stat().st_size
+    payload = cont.read_bytes().split(b"\n\n", 1)[1]
+
+    fs = zilfs.ZilantFS(cont, KEY)
+    _no_repack(monkeypatch)
+    fh = fs.open("/a.txt", os.O_WRONLY)
+    fs.write("/a.txt", b"ALPHA", 0, fh)
+    fs.release("/a.txt", fh)
+    fs.destroy("/")
+
+    raw = cont.read_bytes()
+    assert raw.split(b"\n\n", 1)[1].startswith(payload)  # base payload untouched
+    assert cont.stat().st_size - size < 20_000  # far less than the 200 kB volume
+    meta = zilfs.get_metadata(cont)
+    assert meta["deltas"] == 1
+    assert zilfs._open_manifest(meta, KEY)["a.txt"][0] == 5
+
+    out = _unpacked(cont, tmp_path)
+    assert (out / "a.txt").read_text() == "ALPHA"
+    assert (out / "sub" / "big.bin").read_bytes() == (vol / "sub" / "big.bin").read_bytes()
+
+
+def test_unchanged_mount_writes_nothing(tmp_path, vol, monkeypatch):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    before = cont.read_bytes()
+    fs = zilfs.ZilantFS(cont, KEY)
+    _no_repack(monkeypatch)
+    assert fs.flush_changes() == "none"
+    fs.destroy("/")
+    assert cont.read_bytes() == before
+
+
+def test_deletes_renames_and_direct_writes(tmp_path, vol):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir_stream(vol, cont, KEY)
+
+    fs = zilfs.ZilantFS(cont, KEY)
+    fs.unlink("/sub/c.txt")
+    fs.rename("/sub", "/moved")
+    (fs.root / "direct.txt").write_text("bypassed FUSE")  # caught by the stat scan at unmount
+    assert fs.flush_changes() == "delta"
+    fs.mkdir("/empty", 0o755)
+    fs.destroy("/")
+    assert zilfs.get_metadata(cont)["deltas"] == 2
+
+    out = _unpacked(cont, tmp_path)
+    assert sorted(os.listdir(out)) == ["a.txt", "direct.txt", "empty", "moved"]
+    assert sorted(os.listdir(out / "moved")) == ["big.bin"]
+
+    original = tmp_path / "orig.zil"
+    zilfs.pack_dir(vol, original, KEY)
+    diff = zilfs.diff_snapshots(original, cont, KEY)
+    assert set(diff) == {
+        "direct.txt",
+        os.path.join("sub", "big.bin"),
+        os.path.join("sub", "c.txt"),
+        os.path.join("moved", "big.bin"),
+    }
+
+
+def test_compaction_after_delta_max(tmp_path, vol, monkeypatch):
+    monkeypatch.setattr(zilfs, "DELTA_MAX", 2)
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    modes = []
+    for i in range(3):
+        fs = zilfs.ZilantFS(cont, KEY)
+        (fs.root / "a.txt").write_text(f"v{i}")
+        modes.append(fs.flush_changes(final=True))
+        fs.destroy("/")
+    assert modes == ["delta", "delta", "full"]
+    assert "deltas" not in zilfs.get_metadata(cont)
+    assert (_unpacked(cont, tmp_path) / "a.txt").read_text() == "v2"
+
+
+def test_checkpoints_defer_compaction(tmp_path, vol, monkeypatch):
+    monkeypatch.setattr(zilfs, "DELTA_MAX", 1)
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    fs = zilfs.ZilantFS(cont, KEY)
+    pack_dir = zilfs.pack_dir
+    monkeypatch.setattr(zilfs, "pack_dir", lambda *a, **k: pytest.fail("checkpoint repacked the volume"))
+    modes = []
+    for i in range(3):
+        fh = fs.open("/a.txt", os.O_WRONLY)
+        fs.write("/a.txt", f"beta{i}".encode(), 0, fh)  # same length as "alpha"
+        fs.release("/a.txt", fh)
+        modes.append(fs.flush_changes())
+    assert modes == ["delta"] * 3
+    assert zilfs.delta_count(zilfs.get_metadata(cont)) == 3
+    monkeypatch.setattr(zilfs, "pack_dir", pack_dir)
+    fs.destroy("/")  # nothing new to write, but the log is over DELTA_MAX
+    assert "deltas" not in zilfs.get_metadata(cont)
+    assert (_unpacked(cont, tmp_path) / "a.txt").read_text() == "beta2"
+
+
+def test_torn_tail_is_ignored_and_replaced(tmp_path, vol):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    fs = zilfs.ZilantFS(cont, KEY)
+    (fs.root / "a.txt").write_text("committed")
+    fs.destroy("/")
+
+    with cont.open("ab") as fh:  # crash in the middle of the next append
+        fh.write(deltalog.DELTA_MAGIC + b"\x00\x00\x01\x00{garbage")
+    assert (_unpacked(cont, tmp_path, "o1") / "a.txt").read_text() == "committed"
+
+    data = b"x" * 10
+    assert deltalog.append_delta(cont, KEY, io.BytesIO(data), len(data)) == 2
+    records = [b"".join(rec) for rec in deltalog.iter_deltas(cont, KEY)]
+    assert records[1] == data
+
+    with pytest.raises(ValueError, match="commit pointer"):
+        list(next(deltalog.iter_deltas(cont, b"x" * 32)))
+
+
+def test_checkpoints_track_changes_without_walking(tmp_path, vol, monkeypatch):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    fs = zilfs.ZilantFS(cont, KEY)
+    scan = fs._scan
+    monkeypatch.setattr(fs, "_scan", lambda: pytest.fail("checkpoint walked the tree"))
+    fh = fs.create("/new.txt", 0o644)
+    fs.write("/new.txt", b"one", 0, fh)
+    fs.release("/new.txt", fh)
+    fs.unlink("/sub/c.txt")
+    assert fs.flush_changes() == "delta"
+    assert fs.flush_changes() == "none"
+    fh = fs.open("/new.txt", os.O_WRONLY)
+    fs.write("/new.txt", b"two", 0, fh)
+    fs.release("/new.txt", fh)
+    assert fs.flush_changes() == "delta"
+    monkeypatch.setattr(fs, "_scan", scan)
+    fs.destroy("/")  # nothing changed behind the FS: no further record
+    assert zilfs.get_metadata(cont)["deltas"] == 2
+
+    out = _unpacked(cont, tmp_path)
+    assert (out / "new.txt").read_text() == "two"
+    assert sorted(os.listdir(out / "sub")) == ["big.bin"]
+
+
+def test_lowered_commit_pointer_is_detected(tmp_path, vol):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    for text in ("first", "second"):
+        fs = zilfs.ZilantFS(cont, KEY)
+        (fs.root / "a.txt").write_text(text)
+        fs.destroy("/")
+    container.rewrite_header(cont, {"deltas": 1}, allow=("deltas",))  # hide the latest change
+    with pytest.raises(ValueError, match="commit pointer"):
+        zilfs.unpack_dir(cont, tmp_path / "out", KEY)
+    with pytest.raises(ValueError, match="commit pointer"):
+        deltalog.append_delta(cont, KEY, io.BytesIO(b"x"), 1)
+
+
+def test_zeroed_commit_pointer_is_detected(tmp_path, vol):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    fs = zilfs.ZilantFS(cont, KEY)
+    (fs.root / "a.txt").write_text("changed")
+    fs.destroy("/")
+    good = cont.read_bytes()
+
+    container.rewrite_header(cont, {"deltas": 0}, allow=("deltas",))  # roll back to the base payload
+    with pytest.raises(ValueError, match="commit pointer"):
+        zilfs.unpack_dir(cont, tmp_path / "out", KEY)
+    fs = zilfs.ZilantFS(cont, KEY, lazy=True)
+    assert fs._lower is None and fs.ro  # mounted neither lazily nor writable
+    fs.destroy("/")
+    with pytest.raises(ValueError, match="commit pointer"):
+        deltalog.append_delta(cont, KEY, io.BytesIO(b"x"), 1)
+
+    header, sep, body = good.partition(b"\n\n")
+    meta = json.loads(header)
+    del meta["deltas"]
+    cont.write_bytes(json.dumps(meta).encode().ljust(len(header)) + sep + body)
+    with pytest.raises(ValueError, match="commit pointer"):
+        zilfs.unpack_dir(cont, tmp_path / "out2", KEY)
+
+
+def test_lazy_mount_sees_deltas(tmp_path, vol, monkeypatch):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    fs = zilfs.ZilantFS(cont, KEY)
+    (fs.root / "a.txt").write_text("delta")
+    fs.unlink("/sub/c.txt")
+    fs.destroy("/")
+
+    _no_repack(monkeypatch)
+    fs = zilfs.ZilantFS(cont, KEY, lazy=True)
+    assert fs._lower is not None
+    assert set(fs.readdir("/sub", 0)) == {".", "..", "big.bin"}
+    fh = fs.open("/a.txt", os.O_RDONLY)
+    assert fs.read("/a.txt", 100, 0, fh) == b"delta"
+    fs.release("/a.txt", fh)
+    fh = fs.create("/sub/new.txt", 0o644)
+    fs.write("/sub/new.txt", b"new", 0, fh)
+    fs.release("/sub/new.txt", fh)
+    fs.destroy("/")
+    assert zilfs.get_metadata(cont)["deltas"] == 2
+
+    out = _unpacked(cont, tmp_path)
+    assert sorted(os.listdir(out / "sub")) == ["big.bin", "new.txt"]
+    assert (out / "a.txt").read_text() == "delta"
@@ -39,9 +39,11 @@ def test_destroy_branches(tmp_path):
     fs.destroy("/")  # второй раз — ветка 251
 
 
-def test_stub_mounts():
-    # строки 374-375
+def test_stub_mounts(monkeypatch, tmp_path):
+    monkeypatch.setattr(zl, "FUSE", None)
     with pytest.raises(RuntimeError):
-        zl.mount_fs()
+        zl.mount_fs(tmp_path / "c.zil", tmp_path / "mnt", b"k" * 32)
+    monkeypatch.setattr(zl.shutil, "which", lambda _name: None)
+    monkeypatch.setattr(zl.sys, "platform", "linux")
     with pytest.raises(RuntimeError):
-        zl.umount_fs()
+        zl.umount_fs(tmp_path / "mnt")
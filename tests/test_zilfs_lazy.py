@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import os
+import pytest
+
+import container
+import zilant_prime_core.zilfs as zilfs
+from container import PlaintextChunks
+from zilant_prime_core.lazytar import LazyTar, open_lazy
+
+KEY = b"k" * 32
+
+
+@pytest.fixture
+def vol(tmp_path):
+    d = tmp_path / "vol"
+    (d / "sub").mkdir(parents=True)
+    (d / "a.txt").write_text("alpha")
+    (d / "sub" / "big.bin").write_bytes(os.urandom(300_000))
+    (d / "sub" / "c.txt").write_text("gamma")
+    return d
+
+
+@pytest.fixture
+def small_v2(monkeypatch):
+    # force the chunked v2 layout with small chunks so random access spans many chunks
+    monkeypatch.setattr(container, "STREAM_THRESHOLD", 0)
+    monkeypatch.setattr(container, "STREAM_CHUNK", 16 * 1024)
+
+
+def test_plaintext_chunks_match_payload(tmp_path, small_v2):
+    src = tmp_path / "in.bin"
+    src.write_bytes(os.urandom(100_000))
+    cont = tmp_path / "c.zil"
+    container.pack_file(src, cont, KEY)
+    with PlaintextChunks(cont, KEY) as chunks:
+        assert chunks.count == 7
+        assert b"".join(chunks.chunk(i) for i in range(chunks.count)) == src.read_bytes()
+        with pytest.raises(IndexError):
+            chunks.chunk(7)
+
+
+def test_lazy_mount_decrypts_only_needed_chunks(tmp_path, vol, small_v2, monkeypatch):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    monkeypatch.setattr(zilfs, "unpack_dir", lambda *a, **kw: pytest.fail("lazy mount must not unpack"))
+
+    calls = []
+    real_chunk = PlaintextChunks.chunk
+    monkeypatch.setattr(PlaintextChunks, "chunk", lambda self, i: calls.append(i) or real_chunk(self, i))
+
+    fs = zilfs.ZilantFS(cont, KEY, lazy=True, cache_bytes=4 * 16 * 1024)
+    assert fs._lower is not None
+    assert not any(fs.root.iterdir())
+    assert set(fs.readdir("/", 0)) == {".", "..", "a.txt", "sub"}
+    assert fs.getattr("/sub/big.bin")["st_size"] == 300_000
+    assert fs.getattr("/sub")["st_mode"] & 0o040000
+
+    calls.clear()
+    fh = fs.open("/sub/big.bin", os.O_RDONLY)
+    assert fs.read("/sub/big.bin", 100, 200_000, fh) == (vol / "sub" / "big.bin").read_bytes()[200_000:200_100]
+    assert len(calls) == 1
+    fs.read("/sub/big.bin", 100, 200_000, fh)
+    assert len(calls) == 1  # served from the chunk cache
+    fs.release("/sub/big.bin", fh)
+    assert len(fs._lower._cache) <= 4
+
+    with pytest.raises(OSError):
+        fs.getattr("/missing")
+    fs.destroy("/")
+    assert zilfs.get_metadata(cont)  # untouched container stays readable
+
+
+def test_lazy_mount_copy_up_and_repack(tmp_path, vol, small_v2):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    before = cont.read_bytes()
+
+    fs = zilfs.ZilantFS(cont, KEY, lazy=True)
+    fs.destroy("/")
+    assert cont.read_bytes() == before  # nothing changed, nothing repacked
+
+    fs = zilfs.ZilantFS(cont, KEY, lazy=True)
+    fh = fs.open("/a.txt", os.O_RDWR)
+    fs.write("/a.txt", b"ALPHA", 0, fh)
+    fs.release("/a.txt", fh)
+    fs.unlink("/sub/c.txt")
+    fh = fs.create("/sub/new.txt", 0o644)
+    fs.write("/sub/new.txt", b"new", 0, fh)
+    fs.release("/sub/new.txt", fh)
+    assert set(fs.readdir("/sub", 0)) == {".", "..", "big.bin", "new.txt"}
+    assert not (fs.root / "sub" / "big.bin").exists()  # untouched files stay in the lower layer
+    fs.destroy("/")
+
+    out = tmp_path / "out"
+    zilfs.unpack_dir(cont, out, KEY)
+    assert (out / "a.txt").read_text() == "ALPHA"
+    assert (out / "sub" / "new.txt").read_text() == "new"
+    assert not (out / "sub" / "c.txt").exists()
+    assert (out / "sub" / "big.bin").read_bytes() == (vol / "sub" / "big.bin").read_bytes()
+
+
+def test_lazy_stream_container_and_sparse(tmp_path):
+    d = tmp_path / "vol"
+    d.mkdir()
+    (d / "x.txt").write_text("x")
+    cont = tmp_path / "s.zil"
+    zilfs.pack_dir_stream(d, cont, KEY)
+    lazy = open_lazy(cont, KEY)
+    assert isinstance(lazy, LazyTar)
+    assert lazy.read("x.txt", 10, 0) == b"x"
+    info = lazy.members["x.txt"]
+    info.pax_headers = {"ZIL_SPARSE_SIZE": "8"}
+    assert lazy.read("x.txt", 100, 0) == b"x" + bytes(7)
+    lazy.close()
+
+
+def test_lazy_falls_back_for_snapshots(tmp_path, vol):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    snap = zilfs.snapshot_container(cont, KEY, "s1")
+    assert open_lazy(snap, KEY) is None
+    fs = zilfs.ZilantFS(snap, KEY, lazy=True, force=True)
+    assert fs._lower is None
+    assert (fs.root / "a.txt").read_text() == "alpha"
+    fs.destroy("/")
@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import hashlib
+import os
+import pytest
+import tarfile
+
+import zilant_prime_core.zilfs as zilfs
+
+KEY = b"k" * 32
+
+
+@pytest.fixture
+def vol(tmp_path):
+    d = tmp_path / "vol"
+    (d / "sub").mkdir(parents=True)
+    (d / "a.txt").write_text("a")
+    (d / "sub" / "b.bin").write_bytes(os.urandom(3000))
+    return d
+
+
+def _no_decrypt(monkeypatch):
+    def boom(*a, **kw):
+        raise AssertionError("content must not be decrypted")
+
+    for name in ("unpack_file", "unpack_stream", "iter_plaintext", "iter_snapshot", "unpack_dir"):
+        monkeypatch.setattr(zilfs, name, boom)
+
+
+def test_pack_dir_writes_manifest(tmp_path, vol):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    meta = zilfs.get_metadata(cont)
+    assert b"a.txt" not in meta[zilfs.MANIFEST_FIELD].encode()  # sealed
+    files = zilfs._open_manifest(meta, KEY)
+    expected = hashlib.sha256((vol / "sub" / "b.bin").read_bytes()).hexdigest()
+    assert files[os.path.join("sub", "b.bin")][0] == 3000
+    assert files[os.path.join("sub", "b.bin")][2] == expected
+    assert set(files) == {"a.txt", os.path.join("sub", "b.bin")}
+
+    with pytest.raises(ValueError):
+        zilfs._open_manifest(meta, b"x" * 32)
+
+    # the tar layout is unchanged: same member names as tar.add(src, ".")
+    out = tmp_path / "out"
+    zilfs.unpack_dir(cont, out, KEY)
+    assert (out / "sub" / "b.bin").read_bytes() == (vol / "sub" / "b.bin").read_bytes()
+
+
+def test_diff_uses_manifests_only(tmp_path, vol, monkeypatch):
+    c1, c2 = tmp_path / "1.zil", tmp_path / "2.zil"
+    zilfs.pack_dir(vol, c1, KEY)
+    (vol / "a.txt").write_text("changed")
+    (vol / "new.txt").write_text("n")
+    zilfs.pack_dir(vol, c2, KEY)
+    snap = zilfs.snapshot_container(c2, KEY, "s1")
+
+    _no_decrypt(monkeypatch)
+    diff = zilfs.diff_snapshots(c1, snap, KEY)
+    assert set(diff) == {"a.txt", "new.txt"}
+    assert diff["new.txt"][0] == ""
+    assert zilfs.diff_snapshots(c2, snap, KEY) == {}
+
+
+def test_diff_stream_container_manifest(tmp_path, vol, monkeypatch):
+    c1, c2 = tmp_path / "1.zil", tmp_path / "2.zil"
+    zilfs.pack_dir_stream(vol, c1, KEY)
+    (vol / "sub" / "b.bin").write_bytes(b"other")
+    zilfs.pack_dir(vol, c2, KEY)
+    _no_decrypt(monkeypatch)
+    assert set(zilfs.diff_snapshots(c1, c2, KEY)) == {os.path.join("sub", "b.bin")}
+
+
+def test_diff_without_manifest_streams_tar(tmp_path, vol):
+    tar_path = tmp_path / "legacy.tar"
+    with tarfile.open(tar_path, "w") as tar:
+        tar.add(vol, arcname=".")
+    legacy = tmp_path / "legacy.zil"
+    zilfs.pack_file(tar_path, legacy, KEY)
+    assert zilfs.MANIFEST_FIELD not in zilfs.get_metadata(legacy)
+
+    current = tmp_path / "cur.zil"
+    zilfs.pack_dir(vol, current, KEY)
+    assert zilfs.diff_snapshots(legacy, current, KEY) == {}
+    (vol / "a.txt").write_text("b")
+    zilfs.pack_dir(vol, current, KEY)
+    assert set(zilfs.diff_snapshots(legacy, current, KEY)) == {"a.txt"}
+
+
+def test_block_reader():
+    reader = zilfs._BlockReader(iter([b"abc", b"", b"defgh", b"i"]))
+    assert reader.read(2) == b"ab"
+    assert reader.read(5) == b"cdefg"
+    assert reader.read() == b"hi"
+    assert reader.read(1) == b""
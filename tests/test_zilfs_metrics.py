@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import os
+
+import zilant_prime_core.zilfs as zilfs
+from zilant_prime_core.health import app
+from zilant_prime_core.metrics import metrics
+
+KEY = b"k" * 32
+
+
+def _samples(op):
+    for metric in metrics.fs_op_duration_seconds.collect():
+        for s in metric.samples:
+            if s.name.endswith("_count") and s.labels.get("op") == op:
+                return s.value
+    return 0.0
+
+
+def _value(counter, label):
+    return counter.labels(label)._value.get()
+
+
+def test_fs_ops_are_timed_and_bytes_counted(tmp_path):
+    d = tmp_path / "vol"
+    d.mkdir()
+    (d / "a.txt").write_text("alpha")
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(d, cont, KEY)
+
+    ops = ("getattr", "readdir", "open", "read", "write", "truncate", "destroy")
+    before = {op: _samples(op) for op in ops}
+    read0 = _value(metrics.fs_bytes_total, "read")
+    written0 = _value(metrics.fs_bytes_total, "write")
+
+    fs = zilfs.ZilantFS(cont, KEY)
+    fs.getattr("/a.txt")
+    fs.readdir("/", 0)
+    fh = fs.open("/a.txt", os.O_RDWR)
+    assert fs.read("/a.txt", 100, 0, fh) == b"alpha"
+    fs.write("/a.txt", b"ALPHA!", 0, fh)
+    fs.release("/a.txt", fh)
+    fs.truncate("/a.txt", 3)
+    fs.destroy("/")
+
+    assert all(_samples(op) == before[op] + 1 for op in ops)
+    assert _value(metrics.fs_bytes_total, "read") - read0 == 5
+    assert _value(metrics.fs_bytes_total, "write") - written0 == 6
+
+
+def test_lazy_cache_lookups_and_endpoint(tmp_path):
+    d = tmp_path / "vol"
+    d.mkdir()
+    (d / "a.txt").write_text("alpha")
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(d, cont, KEY)
+    fs = zilfs.ZilantFS(cont, KEY, lazy=True)
+    hits0 = _value(metrics.fs_cache_lookups_total, "hit") - fs._lower.hits
+    misses0 = _value(metrics.fs_cache_lookups_total, "miss") - fs._lower.misses
+    fh = fs.open("/a.txt", os.O_RDONLY)
+    fs.read("/a.txt", 5, 0, fh)
+    fs.read("/a.txt", 5, 0, fh)
+    fs.release("/a.txt", fh)
+    assert _value(metrics.fs_cache_lookups_total, "hit") - hits0 == fs._lower.hits >= 1
+    assert _value(metrics.fs_cache_lookups_total, "miss") - misses0 == fs._lower.misses
+    fs.destroy("/")
+
+    body = app.test_client().get("/metrics").data
+    assert b'zilfs_op_duration_seconds_bucket{le="0.0001",op="read"}' in body
+    assert b"zilfs_cache_lookups_total" in body
+    assert b'zilfs_bytes_total{direction="write"}' in body
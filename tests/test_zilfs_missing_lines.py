@@ -39,7 +39,7 @@ def test_pack_dir_stream_windows(monkeypatch, tmp_path: Path):
     monkeypatch.setattr(_winapi, "CopyFile2", lambda *a, **k: 0, raising=False)
 
     # заставляем pack_stream просто создавать целевой файл
-    def fake_pack(_fifo, Out, _key):
+    def fake_pack(_fifo, Out, _key, **_kw):
         Out.touch()
 
     monkeypatch.setattr(zl, "pack_stream", fake_pack)
@@ -64,9 +64,12 @@ def test_truncate_and_double_destroy(tmp_path: Path):
     fs.destroy("/")  # второй – ветка повторного вызова
 
 
-def test_mount_umount_stub():
-    """Стр. 374-375 (stub-функции)."""
+def test_mount_umount_stub(monkeypatch, tmp_path):
+    """Без fusepy и fusermount — понятная ошибка."""
+    monkeypatch.setattr(zl, "FUSE", None)
     with pytest.raises(RuntimeError):
-        zl.mount_fs()
+        zl.mount_fs(tmp_path / "c.zil", tmp_path / "mnt", b"k" * 32)
+    monkeypatch.setattr(zl.shutil, "which", lambda _name: None)
+    monkeypatch.setattr(zl.sys, "platform", "linux")
     with pytest.raises(RuntimeError):
-        zl.umount_fs()
+        zl.umount_fs(tmp_path / "mnt")
@@ -0,0 +1,156 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import os
+import pytest
+import random
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import zilant_prime_core.zilfs as zilfs
+
+KEY = b"k" * 32
+
+
+@pytest.fixture
+def cont(tmp_path):
+    d = tmp_path / "vol"
+    d.mkdir()
+    for i in range(8):
+        (d / f"f{i}.bin").write_bytes(os.urandom(64 * 1024))
+    c = tmp_path / "c.zil"
+    zilfs.pack_dir(d, c, KEY)
+    return c
+
+
+def test_mount_fs_runs_fuse_multithreaded_and_writes_back(tmp_path, cont, monkeypatch):
+    calls = {}
+
+    def fake_fuse(ops, mountpoint, **kw):
+        calls.update(kw, mountpoint=mountpoint)
+        fh = ops.create("/new.txt", 0o644)
+        ops.write("/new.txt", b"mounted", 0, fh)
+        ops.release("/new.txt", fh)
+
+    monkeypatch.setattr(zilfs, "FUSE", fake_fuse)
+    mnt = tmp_path / "mnt"
+    zilfs.mount_fs(cont, mnt, "k" * 32)
+    assert calls == {"mountpoint": str(mnt), "foreground": True, "nothreads": False, "ro": False}
+    assert mnt.is_dir()
+    assert not any(fs.container == cont for fs in zilfs.ACTIVE_FS)
+
+    out = tmp_path / "out"
+    zilfs.unpack_dir(cont, out, KEY)
+    assert (out / "new.txt").read_bytes() == b"mounted"
+
+    with pytest.raises(RuntimeError, match="remote"):
+        zilfs.mount_fs(cont, mnt, KEY, remote="user@host:/c.zil")
+
+
+def test_umount_fs_calls_fusermount(tmp_path, monkeypatch):
+    seen = []
+
+    def fake_run(cmd, **kw):
+        seen.append(cmd)
+        return subprocess.CompletedProcess(cmd, 1 if len(seen) > 1 else 0, "", "not mounted")
+
+    monkeypatch.setattr(zilfs.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(zilfs.subprocess, "run", fake_run)
+    zilfs.umount_fs(tmp_path / "mnt")
+    assert seen == [["/usr/bin/fusermount3", "-u", str(tmp_path / "mnt")]]
+    with pytest.raises(RuntimeError, match="not mounted"):
+        zilfs.umount_fs(tmp_path / "mnt")
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_concurrent_operations(tmp_path, cont, lazy):
+    expected = {}
+    out = tmp_path / "expected"
+    zilfs.unpack_dir(cont, out, KEY)
+    for i in range(8):
+        expected[f"/f{i}.bin"] = (out / f"f{i}.bin").read_bytes()
+
+    fs = zilfs.ZilantFS(cont, KEY, lazy=lazy, checkpoint_interval=0.01)
+    handles = {path: fs.open(path, os.O_RDONLY) for path in expected}
+
+    def reader(seed):
+        rnd = random.Random(seed)
+        for _ in range(200):
+            path = rnd.choice(sorted(expected))
+            off = rnd.randrange(0, 64 * 1024)
+            size = rnd.randrange(1, 8192)
+            # handles are shared between threads, as FUSE does for one open file
+            assert fs.read(path, size, off, handles[path]) == expected[path][off : off + size]
+
+    def writer(i):
+        path = f"/w{i}.txt"
+        fh = fs.create(path, 0o644)
+        for n in range(50):
+            fs.write(path, b"%04d" % n, n * 4, fh)
+        fs.release(path, fh)
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        jobs = [pool.submit(reader, s) for s in range(8)] + [pool.submit(writer, i) for i in range(4)]
+        for job in jobs:
+            job.result()
+    for path, fh in handles.items():
+        fs.release(path, fh)
+    fs.destroy("/")
+
+    final = tmp_path / "final"
+    zilfs.unpack_dir(cont, final, KEY)
+    for i in range(4):
+        assert (final / f"w{i}.txt").read_bytes() == b"".join(b"%04d" % n for n in range(50))
+
+
+def test_write_data_does_not_wait_for_the_fs_lock(tmp_path, cont):
+    fs = zilfs.ZilantFS(cont, KEY)
+    fh = fs.open("/f0.bin", os.O_WRONLY)
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with fs._lock:  # e.g. a checkpoint snapshotting another file
+            held.set()
+            release.wait(10)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(10)
+    with ThreadPoolExecutor(1) as pool:
+        pending = pool.submit(fs.write, "/f0.bin", b"DATA", 0, fh)
+        deadline = time.monotonic() + 5
+        while (fs.root / "f0.bin").read_bytes()[:4] != b"DATA":
+            assert time.monotonic() < deadline, "write blocked on the FS-wide lock"
+            time.sleep(0.01)
+        assert not pending.done()  # only marking the path dirty waits for the lock
+        release.set()
+        assert pending.result(10) == 4
+    holder.join()
+    assert "f0.bin" in fs._changed
+    fs.release("/f0.bin", fh)
+    fs.destroy("/")
+
+
+@pytest.mark.skipif(
+    zilfs.FUSE is None or not os.path.exists("/dev/fuse") or shutil.which("fusermount") is None,
+    reason="needs fusepy, /dev/fuse and fusermount",
+)
+def test_real_fuse_mount(tmp_path, cont):  # pragma: no cover - needs a FUSE-capable host
+    mnt = tmp_path / "mnt"
+    mounted = threading.Thread(target=zilfs.mount_fs, args=(cont, mnt, KEY))
+    mounted.start()
+    deadline = time.monotonic() + 10
+    while not os.path.ismount(mnt):
+        assert time.monotonic() < deadline, "mount did not come up"
+        time.sleep(0.05)
+    assert sorted(os.listdir(mnt)) == [f"f{i}.bin" for i in range(8)]
+    (mnt / "via-kernel.txt").write_text("hello")
+    zilfs.umount_fs(mnt)
+    mounted.join(10)
+
+    out = tmp_path / "out"
+    zilfs.unpack_dir(cont, out, KEY)
+    assert (out / "via-kernel.txt").read_text() == "hello"
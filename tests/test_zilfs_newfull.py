@@ -125,8 +125,11 @@ def test_zilantfs_rw_check(tmp_path):
         fs._rw_check()
 
 
-def test_mount_umount_fs():
+def test_mount_umount_fs(monkeypatch, tmp_path):
+    monkeypatch.setattr(zilfs, "FUSE", None)
     with pytest.raises(RuntimeError):
-        zilfs.mount_fs()
+        zilfs.mount_fs(tmp_path / "c.zil", tmp_path / "mnt", b"k" * 32)
+    monkeypatch.setattr(zilfs.shutil, "which", lambda _name: None)
+    monkeypatch.setattr(zilfs.sys, "platform", "linux")
     with pytest.raises(RuntimeError):
-        zilfs.umount_fs()
+        zilfs.umount_fs(tmp_path / "mnt")
@@ -0,0 +1,84 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+import container
+import zilant_prime_core.zilfs as zilfs
+from utils.file_utils import pread_slab
+from zilant_prime_core.lazytar import open_lazy
+
+KEY = b"k" * 32
+
+
+def test_pread_slab_reuses_buffer(tmp_path):
+    path = tmp_path / "data.bin"
+    data = os.urandom(10_000)
+    path.write_bytes(data)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        first = pread_slab(fd, 100, 50)
+        assert first == data[50:150]
+        second = pread_slab(fd, 100, 9_950)
+        assert second == data[9_950:]  # short read at EOF
+        if hasattr(os, "preadv"):
+            assert first.obj is second.obj  # same slab, no new allocation
+            assert first == data[9_950:] + data[100:150]  # and the old view is overwritten
+        assert pread_slab(fd, 20_000, 0) == data  # grows when needed
+    finally:
+        os.close(fd)
+
+
+def test_pread_slab_without_positional_reads(tmp_path, monkeypatch):
+    monkeypatch.delattr(os, "preadv", raising=False)
+    monkeypatch.delattr(os, "pread", raising=False)
+    path = tmp_path / "data.bin"
+    data = os.urandom(10_000)
+    path.write_bytes(data)
+    with open(path, "rb") as fh:
+        fd = fh.fileno()
+
+        def read(off):
+            return bytes(pread_slab(fd, 1000, off))
+
+        with ThreadPoolExecutor(4) as pool:
+            chunks = list(pool.map(read, range(0, 10_000, 1000)))
+        assert b"".join(chunks) == data
+        assert read(9_500) == data[9_500:]
+
+
+@pytest.mark.skipif(not zilfs._HAS_PREAD, reason="pread/pwrite not available")
+def test_read_write_do_not_seek(tmp_path, monkeypatch):
+    d = tmp_path / "vol"
+    d.mkdir()
+    (d / "a.txt").write_text("alpha")
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(d, cont, KEY)
+    fs = zilfs.ZilantFS(cont, KEY)
+    monkeypatch.setattr(zilfs.os, "lseek", lambda *a: pytest.fail("read/write must not lseek"))
+    fh = fs.open("/a.txt", os.O_RDWR)
+    assert fs.write("/a.txt", b"LP", 1, fh) == 2
+    assert fs.read("/a.txt", 10, 0, fh) == b"aLPha"
+    fs.release("/a.txt", fh)
+    monkeypatch.undo()
+    fs.destroy("/")
+
+
+def test_lazy_reads_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(container, "STREAM_THRESHOLD", 0)
+    monkeypatch.setattr(container, "STREAM_CHUNK", 4096)
+    d = tmp_path / "vol"
+    d.mkdir()
+    data = os.urandom(50_000)
+    (d / "big.bin").write_bytes(data)
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(d, cont, KEY)
+    lazy = open_lazy(cont, KEY)
+    assert lazy is not None
+    for off, size in ((0, 10), (4000, 200), (1000, 20_000), (49_990, 100)):
+        out = lazy.read("big.bin", size, off)
+        assert type(out) is bytes
+        assert out == data[off : off + size]
+    lazy.close()
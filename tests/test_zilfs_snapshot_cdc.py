@@ -0,0 +1,152 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import json
+import os
+import pytest
+import random
+
+import container
+import zilant_prime_core.chunkstore as cs
+import zilant_prime_core.zilfs as zilfs
+
+KEY = b"k" * 32
+
+
+@pytest.fixture
+def small_cdc(monkeypatch):
+    monkeypatch.setattr(cs, "CDC_RUN", 6)
+    monkeypatch.setattr(cs, "CDC_MIN", 1024)
+    monkeypatch.setattr(cs, "CDC_MAX", 16 * 1024)
+    monkeypatch.setattr(cs.cdc_split, "__defaults__", (1024, 16 * 1024, 6))
+
+
+def test_cdc_split_is_content_defined(small_cdc):
+    table = cs._cdc_table(KEY)
+    rnd = random.Random(1)
+    data = bytes(rnd.getrandbits(8) for _ in range(200_000))
+    blocks = [data[i : i + 7000] for i in range(0, len(data), 7000)]
+    chunks = list(cs.cdc_split(blocks, table))
+    assert b"".join(chunks) == data
+    assert all(len(c) <= 16 * 1024 for c in chunks)
+    assert all(len(c) >= 1024 for c in chunks[:-1])
+
+    # inserting bytes near the start only disturbs the chunks around the edit
+    edited = data[:500] + b"INSERTED" + data[500:]
+    again = list(cs.cdc_split([edited], table))
+    assert len(set(chunks) & set(again)) >= len(chunks) - 2
+
+
+def test_delta_roundtrip():
+    parent = [bytes([i]) * 32 for i in range(10)]
+    refs = parent[:4] + [b"\xaa" * 32] + parent[5:]
+    ops = cs._delta(refs, parent)
+    assert ops == [["copy", 0, 4], ["add", ["aa" * 32]], ["copy", 5, 5]]
+    assert cs._apply(ops, parent) == refs
+    with pytest.raises(ValueError):
+        cs._apply([["copy", 8, 5]], parent)
+
+
+def test_rewrite_header_in_place_and_copy(tmp_path):
+    src = tmp_path / "in.bin"
+    src.write_bytes(os.urandom(1000))
+    cont = tmp_path / "c.zil"
+    container.pack_file(src, cont, KEY)
+    payload = cont.read_bytes().split(b"\n\n", 1)[1]
+
+    container.rewrite_header(cont, {"label": "x" * 100})
+    grown = cont.read_bytes()
+    assert grown.split(b"\n\n", 1)[1] == payload
+    size = len(grown)
+
+    container.rewrite_header(cont, {"label": "short"})
+    assert len(cont.read_bytes()) == size  # fits into the padding, rewritten in place
+    assert container.get_metadata(cont)["label"] == "short"
+    container.unpack_file(cont, tmp_path / "out.bin", KEY)
+    assert (tmp_path / "out.bin").read_bytes() == src.read_bytes()
+
+    with pytest.raises(ValueError, match="nonce_hex"):
+        container.rewrite_header(cont, {"nonce_hex": "00" * 12})
+
+
+def test_rewrite_metadata_does_not_decrypt(tmp_path, monkeypatch):
+    d = tmp_path / "d"
+    d.mkdir()
+    (d / "a.txt").write_text("a")
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(d, cont, KEY)
+
+    def boom(*a, **kw):
+        raise AssertionError("payload must not be decrypted")
+
+    monkeypatch.setattr(zilfs, "unpack_file", boom)
+    monkeypatch.setattr(zilfs, "pack_file", boom)
+    zilfs._rewrite_metadata(cont, {"x": 1}, KEY)
+    assert zilfs._read_meta(cont)["x"] == 1
+
+
+def test_incremental_snapshots_share_chunks(tmp_path, small_cdc):
+    d = tmp_path / "vol"
+    d.mkdir()
+    rnd = random.Random(7)
+    for i in range(8):
+        (d / f"f{i}.bin").write_bytes(bytes(rnd.getrandbits(8) for _ in range(20_000)))
+    cont = tmp_path / "vol.zil"
+    zilfs.pack_dir(d, cont, KEY)
+
+    snap1 = zilfs.snapshot_container(cont, KEY, "h1")
+    store = cs.store_path(cont)
+    first = {p.name for p in store.glob("*/*")}
+    assert zilfs._read_meta(snap1)["magic"] == cs.ZSNAP_MAGIC
+
+    (d / "f3.bin").write_bytes(b"changed" * 100)
+    zilfs.pack_dir(d, cont, KEY)
+    snap2 = zilfs.snapshot_container(cont, KEY, "h2")
+    second = {p.name for p in store.glob("*/*")}
+    assert first <= second
+    assert len(second - first) < len(first) // 2
+
+    refs, manifest = cs.snapshot_refs(snap2, KEY)
+    assert manifest["parent"] == snap1.name
+    assert any(op[0] == "copy" for op in manifest["ops"])
+    assert zilfs.get_metadata(cont)["latest_snapshot_id"] == "h2"
+    assert zilfs.get_metadata(snap2)["label"] == "h2"
+
+    out1, out2 = tmp_path / "o1", tmp_path / "o2"
+    zilfs.unpack_dir(snap1, out1, KEY)
+    zilfs.unpack_dir(snap2, out2, KEY)
+    assert (out2 / "f3.bin").read_bytes() == b"changed" * 100
+    assert (out1 / "f3.bin").read_bytes() != (out2 / "f3.bin").read_bytes()
+    assert set(zilfs.diff_snapshots(snap1, snap2, KEY)) == {"f3.bin"}
+
+
+def test_full_manifest_every_n(tmp_path, small_cdc, monkeypatch):
+    monkeypatch.setattr(cs, "FULL_EVERY", 2)
+    d = tmp_path / "vol"
+    d.mkdir()
+    (d / "a.txt").write_text("a")
+    cont = tmp_path / "vol.zil"
+    zilfs.pack_dir(d, cont, KEY)
+    depths = []
+    for label in ("s1", "s2", "s3"):
+        snap = zilfs.snapshot_container(cont, KEY, label)
+        depths.append(cs.snapshot_refs(snap, KEY)[1]["depth"])
+    assert depths == [0, 1, 0]
+
+
+def test_tampered_chunk_detected(tmp_path, small_cdc):
+    d = tmp_path / "vol"
+    d.mkdir()
+    (d / "a.txt").write_text("hello")
+    cont = tmp_path / "vol.zil"
+    zilfs.pack_dir(d, cont, KEY)
+    snap = zilfs.snapshot_container(cont, KEY, "s1")
+    victim = next(cs.store_path(cont).glob("*/*"))
+    raw = bytearray(victim.read_bytes())
+    raw[-1] ^= 1
+    victim.write_bytes(bytes(raw))
+    with pytest.raises(ValueError):
+        zilfs.unpack_dir(snap, tmp_path / "out", KEY)
+
+    header = json.loads(snap.read_bytes().split(b"\n\n", 1)[0])
+    assert header["store"] == cs.store_path(cont).name
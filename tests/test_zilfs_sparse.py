@@ -0,0 +1,112 @@
+# SPDX-License-Identifier: MIT
+# SPDX-FileCopyrightText: 2025 Zilant Prime Core contributors
+
+import hashlib
+import os
+import pytest
+import tarfile
+
+import zilant_prime_core.zilfs as zilfs
+from zilant_prime_core import tarstream
+from zilant_prime_core.lazytar import open_lazy
+
+KEY = b"k" * 32
+MiB = 1024 * 1024
+
+
+def _make_sparse(path, size, chunks):
+    with open(path, "wb") as fh:
+        fh.truncate(size)
+        for off, data in chunks:
+            os.pwrite(fh.fileno(), data, off)
+
+
+def _holes_supported(tmp_path):
+    probe = tmp_path / "probe"
+    _make_sparse(probe, 4 * MiB, [(0, b"x")])
+    fd = os.open(probe, os.O_RDONLY)
+    try:
+        return os.lseek(fd, 0, os.SEEK_HOLE) < 4 * MiB
+    finally:
+        os.close(fd)
+        probe.unlink()
+
+
+@pytest.fixture
+def vol(tmp_path):
+    if not tarstream.SEEK_HOLES or not _holes_supported(tmp_path):
+        pytest.skip("filesystem does not report holes")
+    d = tmp_path / "vol"
+    d.mkdir()
+    _make_sparse(d / "disk.img", 8 * MiB, [(0, b"boot" * 1024), (5 * MiB, os.urandom(70_000))])
+    _make_sparse(d / "tail.db", 3 * MiB, [(MiB, b"page" * 2048)])  # ends in a hole
+    _make_sparse(d / "empty.img", 2 * MiB, [])
+    (d / "plain.txt").write_text("dense")
+    return d
+
+
+def test_data_extents(vol):
+    fd = os.open(vol / "disk.img", os.O_RDONLY)
+    try:
+        extents = tarstream.data_extents(fd, 8 * MiB)
+    finally:
+        os.close(fd)
+    assert extents is not None
+    assert extents[-1] == (8 * MiB, 0)
+    assert sum(n for _, n in extents) < MiB
+    assert all(off + n <= 8 * MiB for off, n in extents)
+
+
+@pytest.mark.parametrize("packer", [zilfs.pack_dir, zilfs.pack_dir_stream])
+def test_sparse_roundtrip(tmp_path, vol, packer):
+    cont = tmp_path / "c.zil"
+    packer(vol, cont, KEY)
+
+    out = tmp_path / "out"
+    zilfs.unpack_dir(cont, out, KEY)
+    for name in ("disk.img", "tail.db", "empty.img", "plain.txt"):
+        assert (out / name).read_bytes() == (vol / name).read_bytes()
+    st = (out / "disk.img").stat()
+    assert st.st_size == 8 * MiB
+    assert st.st_blocks * 512 < 2 * MiB  # holes recreated, not zero-filled
+
+    files = zilfs._open_manifest(zilfs.get_metadata(cont), KEY)
+    assert files["disk.img"][0] == 8 * MiB
+    assert files["disk.img"][2] == hashlib.sha256((vol / "disk.img").read_bytes()).hexdigest()
+
+
+def test_tar_stores_only_data_extents(tmp_path, vol):
+    tar_path = tmp_path / "t.tar"
+    with tarfile.open(tar_path, "w") as tar:
+        zilfs._tar_tree(tar, vol)
+    assert tar_path.stat().st_size < MiB
+    with tarfile.open(tar_path) as tar:
+        member = tar.getmember("./disk.img")
+        assert member.sparse is not None
+        assert member.size == 8 * MiB
+        assert tar.extractfile(member).read() == (vol / "disk.img").read_bytes()
+
+
+def test_lazy_reads_holes(tmp_path, vol):
+    cont = tmp_path / "c.zil"
+    zilfs.pack_dir(vol, cont, KEY)
+    data = (vol / "disk.img").read_bytes()
+    lazy = open_lazy(cont, KEY)
+    assert lazy.file_size(lazy.members["disk.img"]) == 8 * MiB
+    for off, size in ((0, 10_000), (4090, 20), (5 * MiB - 100, 300), (8 * MiB - 10, 100)):
+        assert lazy.read("disk.img", size, off) == data[off : off + size]
+    assert lazy.read("empty.img", 50, MiB) == bytes(50)
+    lazy.close()
+
+
+def test_sparse_and_dense_copies_do_not_diff(tmp_path, vol):
+    sparse_cont = tmp_path / "sparse.zil"
+    zilfs.pack_dir(vol, sparse_cont, KEY)
+    dense = tmp_path / "dense"
+    dense.mkdir()
+    for f in vol.iterdir():
+        (dense / f.name).write_bytes(f.read_bytes())
+        os.utime(dense / f.name, ns=(f.stat().st_atime_ns, f.stat().st_mtime_ns))
+    dense_cont = tmp_path / "dense.zil"
+    zilfs.pack_dir(dense, dense_cont, KEY)
+    assert zilfs.diff_snapshots(sparse_cont, dense_cont, KEY) == {}